@@ -0,0 +1,62 @@
+"""
+Throughput comparison of the CPI row parsers in cpi_extract.
+
+Runs the original DictReader/strptime loop, the fast parser and the
+parallel fast parser over the same CSV with every CPI extractor
+registered, checks they collect the same points, and reports rows per
+second.
+
+Usage: python benchmark_cpi_parser.py [path/to/inflation_data.csv] [repeats]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from cpi_extract import SCANNERS, build_product_index
+from process_multi_series_inflation import multi_series_extractor
+from fetch_food_subcategories import food_subcategory_extractor
+from fetch_all_subcategories import all_subcategories_extractor
+
+
+def count_rows(csv_path: Path) -> int:
+    with open(csv_path, 'rb') as f:
+        return sum(1 for _ in f) - 1
+
+
+def time_scanner(name: str, csv_path: Path, repeats: int):
+    """Return (best seconds, collected category data) for one parser."""
+    best = None
+    for _ in range(repeats):
+        extractors = [multi_series_extractor(), food_subcategory_extractor(), all_subcategories_extractor()]
+        for extractor in extractors:
+            extractor.start()
+        index = build_product_index(extractors)
+        
+        start = time.perf_counter()
+        SCANNERS[name](csv_path, index)
+        elapsed = time.perf_counter() - start
+        
+        best = elapsed if best is None else min(best, elapsed)
+    return best, [e.category_data for e in extractors]
+
+
+if __name__ == "__main__":
+    project_root = Path(__file__).parent.parent
+    csv_path = Path(sys.argv[1]) if len(sys.argv) > 1 else project_root / "data" / "inflation_data.csv"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    
+    rows = count_rows(csv_path)
+    print(f"Benchmarking {csv_path} ({rows:,} rows, best of {repeats})\n")
+    
+    results = {}
+    for name in ["dict", "fast", "parallel"]:
+        seconds, data = time_scanner(name, csv_path, repeats)
+        results[name] = (seconds, data)
+        print(f"  {name:<8} {seconds:8.2f} s  {rows / seconds:>12,.0f} rows/s")
+    
+    baseline = results["dict"]
+    print()
+    for name in ["fast", "parallel"]:
+        seconds, data = results[name]
+        print(f"  {name}: {baseline[0] / seconds:.1f}x speed-up, same output: {baseline[1] == data}")
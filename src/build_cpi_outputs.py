@@ -0,0 +1,42 @@
+"""
+Build every CPI series output from data/inflation_data.csv in one scan.
+Writes inflation_multi_series.json, food_subcategories.json and
+all_subcategories.json, then the log-level index used for range queries
+(see cpi_log_index).
+
+By default the rows come from the columnar cache (see cpi_cache), which is
+built on the first run and reused until the CSV changes. --columnar writes
+all_subcategories.json in the compact columnar layout (see series_codec);
+--sharded also writes its per-category shards (see cpi_shards).
+"""
+
+import sys
+from pathlib import Path
+
+from cpi_extract import run_extractors
+from process_multi_series_inflation import multi_series_extractor
+from fetch_food_subcategories import food_subcategory_extractor
+from fetch_all_subcategories import all_subcategories_extractor
+from cpi_log_index import build_log_index
+
+
+def build_cpi_outputs(csv_path: Path, output_dir: Path, years: int = 10, parser: str = "cache",
+                      columnar: bool = False, sharded: bool = False) -> dict:
+    """Run all CPI extractors over a single scan of csv_path."""
+    extractors = [
+        multi_series_extractor(output_dir / "inflation_multi_series.json"),
+        food_subcategory_extractor(output_dir / "food_subcategories.json"),
+        all_subcategories_extractor(output_dir / "all_subcategories.json", columnar, sharded),
+    ]
+    results = run_extractors(csv_path, extractors, years, parser=parser)
+    build_log_index(output_dir)
+    return results
+
+
+if __name__ == "__main__":
+    project_root = Path(__file__).parent.parent
+    csv_path = project_root / "data" / "inflation_data.csv"
+    output_dir = project_root / "data"
+    
+    build_cpi_outputs(csv_path, output_dir, years=10, columnar="--columnar" in sys.argv,
+                      sharded="--sharded" in sys.argv)
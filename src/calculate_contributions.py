@@ -1,60 +1,312 @@
 """
 Script to calculate percentage point contributions of Food subcategories to Food inflation.
+
+With --rolling, writes the year-over-year contributions for every month
+in the data to data/contribution_timeseries.json instead.
 """
 
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
-def calculate_percentage_change(start_value: float, end_value: float) -> float:
+import numpy as np
+
+from cpi_series import CPI_GEO, CPI_UOM, make_data_point, month_ordinal, ordinal_to_date
+from fetch_inflation_data import CPI_PRODUCT_ID
+from fetch_food_subcategories import FOOD_CATEGORIES
+from observation_store import connect, query_series
+
+# Window of the rolling contribution series (year-over-year)
+ROLLING_LAG_MONTHS = 12
+
+# Decimal places kept in the rolling series JSON
+ROLLING_DECIMALS = 4
+
+
+def load_food_data_from_store(start_date: str = None, end_date: str = None, db_path: Path = None) -> Dict:
     """
-    Calculate percentage change between two CPI values.
+    Build food_subcategories.json-shaped data straight from the observation store.
     
     Args:
-        start_value: CPI value at start date
-        end_value: CPI value at end date
+        start_date: Optional first month to load ('YYYY-MM')
+        end_date: Optional last month to load ('YYYY-MM')
+        db_path: Observation store path (defaults to data/statcan_observations.sqlite)
         
     Returns:
-        Percentage change as a decimal (e.g., 0.04 for 4%)
+        Dictionary with a 'series' list like food_subcategories.json
     """
-    if start_value == 0:
-        return 0.0
-    return (end_value / start_value - 1) * 100
+    conn = connect(db_path)
+    try:
+        series = []
+        for product, display_name in FOOD_CATEGORIES:
+            rows = query_series(conn, CPI_PRODUCT_ID, product, geo=CPI_GEO, uom=CPI_UOM,
+                                start=start_date, end=end_date)
+            if rows:
+                series.append({
+                    'category': display_name,
+                    'data': [make_data_point(date, value) for date, value in rows]
+                })
+        return {'series': series}
+    finally:
+        conn.close()
 
 
-def calculate_contribution(weight: float, percentage_change: float) -> float:
+class IndexedSeries:
+    """
+    One CPI series indexed by month for O(1) lookups.
+    
+    Values are held in a NumPy array where position = month ordinal - first
+    ordinal (see cpi_series.month_ordinal); months with no data are NaN.
     """
-    Calculate percentage point contribution.
+    
+    def __init__(self, category: str, data: List[Dict]):
+        self.category = category
+        ordinals = [month_ordinal(point['date']) for point in data]
+        self.first = min(ordinals) if ordinals else 0
+        self.values = np.full(max(ordinals) - self.first + 1 if ordinals else 0, np.nan)
+        for ordinal, point in zip(ordinals, data):
+            self.values[ordinal - self.first] = point['value']
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def value_at(self, date: str) -> Optional[float]:
+        """CPI value for a 'YYYY-MM' date, or None if missing."""
+        value = self.values_at(np.array([month_ordinal(date)]))[0]
+        return None if np.isnan(value) else float(value)
+    
+    def values_at(self, ordinals: np.ndarray) -> np.ndarray:
+        """CPI values for an array of month ordinals (NaN where missing)."""
+        positions = ordinals - self.first
+        inside = (positions >= 0) & (positions < len(self.values))
+        result = np.full(len(ordinals), np.nan)
+        result[inside] = self.values[positions[inside]]
+        return result
+
+
+class ContributionEngine:
+    """
+    Food subcategory contributions for any number of periods.
+    
+    The series and weights are loaded and indexed once; compute() then
+    evaluates many (start, end) pairs in one vectorized call, and
+    calculate_batch() turns them into calculate_food_contributions results.
     
     Args:
-        weight: Basket weight as decimal (e.g., 0.647 for 64.7% within Food category)
-        percentage_change: Percentage change (e.g., 4.67 for 4.67%)
-        
-    Returns:
-        Contribution in percentage points
+        food_data: Parsed food_subcategories.json (or load_food_data_from_store())
+        weights_data: Parsed basket_weights.json
+        use_link_month_weights: If True, use link month weights; else use reference period weights
     """
-    # Weight is already a decimal (0.647), percentage_change is in percent (4.67)
-    # Contribution = weight × percentage_change
-    # Example: 0.647 × 4.67 = 3.02 percentage points
-    return weight * percentage_change
+    
+    def __init__(self, food_data: Dict, weights_data: Dict, use_link_month_weights: bool = True):
+        self.use_link_month_weights = use_link_month_weights
+        
+        # Select which weights to use
+        weights_key = 'link_month_weights' if use_link_month_weights else 'reference_period_weights'
+        weights = weights_data.get(weights_key, {})
+        
+        # The main "Food" series is only used for validation
+        self.food_series = None
+        self.subcategories: List[IndexedSeries] = []
+        for series in food_data['series']:
+            category = series['category']
+            if category == 'Food':
+                if self.food_series is None:
+                    self.food_series = IndexedSeries(category, series['data'])
+                continue
+            
+            if weights.get(category, 0.0) == 0:
+                print(f"⚠ Warning: No weight found for {category}")
+                continue
+            self.subcategories.append(IndexedSeries(category, series['data']))
+        
+        self.weights = np.array([weights[series.category] for series in self.subcategories])
+    
+    @classmethod
+    def from_files(cls, food_data_path: Path, weights_path: Path, use_link_month_weights: bool = True):
+        """Load food_subcategories.json and basket_weights.json once."""
+        with open(food_data_path, 'r', encoding='utf-8') as f:
+            food_data = json.load(f)
+        with open(weights_path, 'r', encoding='utf-8') as f:
+            weights_data = json.load(f)
+        return cls(food_data, weights_data, use_link_month_weights)
+    
+    def compute(self, start_ordinals: np.ndarray, end_ordinals: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized contributions for N (start, end) month-ordinal pairs.
+        
+        Returns:
+            Dictionary of arrays:
+                start_values, end_values: (N, categories) CPI values, NaN if missing
+                percentage_change, contribution_pp: (N, categories), NaN if missing
+                total_contribution_pp, total_food_inflation_pct: (N,)
+        """
+        start_ordinals = np.asarray(start_ordinals, dtype=np.int64)
+        end_ordinals = np.asarray(end_ordinals, dtype=np.int64)
+        shape = (len(start_ordinals), len(self.subcategories))
+        
+        start_values = np.empty(shape)
+        end_values = np.empty(shape)
+        for i, series in enumerate(self.subcategories):
+            start_values[:, i] = series.values_at(start_ordinals)
+            end_values[:, i] = series.values_at(end_ordinals)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_change = np.where(start_values == 0, 0.0, (end_values / start_values - 1) * 100)
+            contributions = self.weights * pct_change
+            
+            total_food_inflation = np.zeros(len(start_ordinals))
+            if self.food_series is not None:
+                food_start = self.food_series.values_at(start_ordinals)
+                food_end = self.food_series.values_at(end_ordinals)
+                valid = ~np.isnan(food_start) & ~np.isnan(food_end) & (food_start != 0) & (food_end != 0)
+                total_food_inflation = np.where(valid, (food_end / food_start - 1) * 100, 0.0)
+        
+        # Categories are added in series order, as in the single-period loop
+        total_contribution = np.zeros(len(start_ordinals))
+        for i in range(shape[1]):
+            total_contribution += np.nan_to_num(contributions[:, i])
+        
+        return {
+            'start_values': start_values,
+            'end_values': end_values,
+            'percentage_change': pct_change,
+            'contribution_pp': contributions,
+            'total_contribution_pp': total_contribution,
+            'total_food_inflation_pct': total_food_inflation,
+        }
+    
+    def calculate_batch(self, periods: List[Tuple[str, str]], warn: bool = False) -> List[Dict]:
+        """
+        calculate_food_contributions results for many (start_date, end_date) pairs.
+        
+        Args:
+            periods: (start, end) dates in 'YYYY-MM' format
+            warn: Print a warning for every category missing data in a period
+            
+        Returns:
+            One result dictionary per period, in the same order
+        """
+        arrays = self.compute(
+            [month_ordinal(start) for start, _ in periods],
+            [month_ordinal(end) for _, end in periods],
+        )
+        
+        results = []
+        for n, (start_date, end_date) in enumerate(periods):
+            contributions = []
+            for i, series in enumerate(self.subcategories):
+                start_value = arrays['start_values'][n, i]
+                end_value = arrays['end_values'][n, i]
+                if np.isnan(start_value) or np.isnan(end_value):
+                    if warn:
+                        print(f"⚠ Warning: Missing data for {series.category} at {start_date} or {end_date}")
+                    continue
+                
+                contributions.append({
+                    'category': series.category,
+                    'weight': float(self.weights[i]),
+                    'start_value': float(start_value),
+                    'end_value': float(end_value),
+                    'percentage_change': float(arrays['percentage_change'][n, i]),
+                    'contribution_pp': float(arrays['contribution_pp'][n, i])
+                })
+            
+            # Sort by absolute contribution (descending)
+            contributions.sort(key=lambda x: abs(x['contribution_pp']), reverse=True)
+            
+            total_food_inflation = float(arrays['total_food_inflation_pct'][n])
+            total_contribution = float(arrays['total_contribution_pp'][n])
+            results.append({
+                'start_date': start_date,
+                'end_date': end_date,
+                'use_link_month_weights': self.use_link_month_weights,
+                'total_food_inflation_pct': total_food_inflation,
+                'total_contribution_pp': total_contribution,
+                'contributions': contributions,
+                'validation': {
+                    'difference_pp': abs(total_food_inflation - total_contribution),
+                    'within_tolerance': abs(total_food_inflation - total_contribution) < 0.1
+                }
+            })
+        
+        return results
+    
+    def calculate(self, start_date: str, end_date: str) -> Dict:
+        """Contribution analysis for a single period."""
+        return self.calculate_batch([(start_date, end_date)], warn=True)[0]
+    
+    def month_range(self) -> Tuple[int, int]:
+        """First and last month ordinals covered by any loaded series."""
+        series_list = [s for s in self.subcategories + [self.food_series] if s is not None and len(s)]
+        if not series_list:
+            return 0, -1
+        return min(s.first for s in series_list), max(s.first + len(s) - 1 for s in series_list)
+    
+    def rolling_contributions(self, lag: int = ROLLING_LAG_MONTHS) -> Dict:
+        """
+        Contributions over every `lag`-month window in the data, in one pass.
+        
+        With the default lag of 12 this is the year-over-year contribution
+        of each subcategory for every month that has a year of history.
+        
+        Returns:
+            Compact time series: a shared 'dates' list, and one list of
+            values per category (None where a month is missing)
+        """
+        first, last = self.month_range()
+        end_ordinals = np.arange(first + lag, last + 1)
+        arrays = self.compute(end_ordinals - lag, end_ordinals)
+        
+        def to_list(values: np.ndarray) -> list:
+            return [None if np.isnan(v) else v for v in np.round(values, ROLLING_DECIMALS).tolist()]
+        
+        return {
+            'lag_months': lag,
+            'use_link_month_weights': self.use_link_month_weights,
+            'dates': [ordinal_to_date(int(ordinal)) for ordinal in end_ordinals],
+            'total_food_inflation_pct': to_list(arrays['total_food_inflation_pct']),
+            'total_contribution_pp': to_list(arrays['total_contribution_pp']),
+            'series': [
+                {
+                    'category': series.category,
+                    'weight': float(self.weights[i]),
+                    'percentage_change': to_list(arrays['percentage_change'][:, i]),
+                    'contribution_pp': to_list(arrays['contribution_pp'][:, i])
+                }
+                for i, series in enumerate(self.subcategories)
+            ]
+        }
 
 
-def get_cpi_value(series_data: List[Dict], date: str) -> Optional[float]:
+def load_food_data_from_index(index=None) -> Dict:
     """
-    Get CPI value for a specific date from series data.
+    Build food_subcategories.json-shaped data from the precomputed log index.
     
     Args:
-        series_data: List of data points with 'date' and 'value' keys
-        date: Date string in 'YYYY-MM' format
+        index: LogIndex (defaults to the persisted cpi_log_index.load_log_index())
         
     Returns:
-        CPI value or None if not found
+        Dictionary with a 'series' list like food_subcategories.json
     """
-    for point in series_data:
-        if point['date'] == date:
-            return point['value']
-    return None
+    from cpi_log_index import load_log_index
+    
+    if index is None:
+        index = load_log_index()
+    
+    series = []
+    for product, display_name in FOOD_CATEGORIES:
+        if product not in index.columns:
+            continue
+        # CPI values are published to one decimal; drop exp/log rounding noise
+        values = np.round(index.levels(product), 6)
+        data = [make_data_point(ordinal_to_date(index.first + i), float(value))
+                for i, value in enumerate(values) if not np.isnan(value)]
+        if data:
+            series.append({'category': display_name, 'data': data})
+    return {'series': series}
 
 
 def calculate_food_contributions(
@@ -62,105 +314,47 @@ def calculate_food_contributions(
     weights_path: Path,
     start_date: str,
     end_date: str,
-    use_link_month_weights: bool = True
+    use_link_month_weights: bool = True,
+    food_data: Dict = None
 ) -> Dict:
     """
     Calculate percentage point contributions of Food subcategories.
     
+    Loads both files on every call; build a ContributionEngine once to
+    evaluate many periods.
+    
     Args:
         food_data_path: Path to food_subcategories.json
         weights_path: Path to basket_weights.json
         start_date: Start date in 'YYYY-MM' format
         end_date: End date in 'YYYY-MM' format
         use_link_month_weights: If True, use link month weights; else use reference period weights
+        food_data: Already-loaded series (e.g. from load_food_data_from_store); food_data_path is then ignored
         
     Returns:
         Dictionary with contribution analysis results
     """
     # Load food subcategory data
-    with open(food_data_path, 'r', encoding='utf-8') as f:
-        food_data = json.load(f)
+    if food_data is None:
+        with open(food_data_path, 'r', encoding='utf-8') as f:
+            food_data = json.load(f)
     
     # Load basket weights
     with open(weights_path, 'r', encoding='utf-8') as f:
         weights_data = json.load(f)
     
-    # Select which weights to use
-    weights_key = 'link_month_weights' if use_link_month_weights else 'reference_period_weights'
-    weights = weights_data.get(weights_key, {})
-    
-    # Calculate contributions for each subcategory
-    contributions = []
-    total_contribution = 0.0
-    total_food_inflation = 0.0
-    
-    # Find the main Food category for overall inflation calculation
-    food_series = None
-    for series in food_data['series']:
-        if series['category'] == 'Food':
-            food_series = series
-            break
-    
-    if food_series:
-        food_start = get_cpi_value(food_series['data'], start_date)
-        food_end = get_cpi_value(food_series['data'], end_date)
-        if food_start and food_end:
-            total_food_inflation = calculate_percentage_change(food_start, food_end)
-    
-    # Calculate contributions for each subcategory
-    for series in food_data['series']:
-        category = series['category']
-        
-        # Skip the main "Food" category (we'll use it for validation)
-        if category == 'Food':
-            continue
-        
-        # Get weight for this category
-        weight = weights.get(category, 0.0)
-        
-        if weight == 0:
-            print(f"⚠ Warning: No weight found for {category}")
-            continue
-        
-        # Get CPI values
-        start_value = get_cpi_value(series['data'], start_date)
-        end_value = get_cpi_value(series['data'], end_date)
-        
-        if start_value is None or end_value is None:
-            print(f"⚠ Warning: Missing data for {category} at {start_date} or {end_date}")
-            continue
-        
-        # Calculate percentage change
-        pct_change = calculate_percentage_change(start_value, end_value)
-        
-        # Calculate contribution
-        contribution = calculate_contribution(weight, pct_change)
-        total_contribution += contribution
-        
-        contributions.append({
-            'category': category,
-            'weight': weight,
-            'start_value': start_value,
-            'end_value': end_value,
-            'percentage_change': pct_change,
-            'contribution_pp': contribution
-        })
-    
-    # Sort by absolute contribution (descending)
-    contributions.sort(key=lambda x: abs(x['contribution_pp']), reverse=True)
-    
-    return {
-        'start_date': start_date,
-        'end_date': end_date,
-        'use_link_month_weights': use_link_month_weights,
-        'total_food_inflation_pct': total_food_inflation,
-        'total_contribution_pp': total_contribution,
-        'contributions': contributions,
-        'validation': {
-            'difference_pp': abs(total_food_inflation - total_contribution),
-            'within_tolerance': abs(total_food_inflation - total_contribution) < 0.1
-        }
-    }
+    engine = ContributionEngine(food_data, weights_data, use_link_month_weights)
+    return engine.calculate(start_date, end_date)
+
+
+def save_rolling_contributions(engine: ContributionEngine, output_path: Path, lag: int = ROLLING_LAG_MONTHS) -> Dict:
+    """Write the full-history rolling contribution series for a stacked contribution chart."""
+    series = engine.rolling_contributions(lag)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(series, f, separators=(',', ':'))
+    print(f"✓ Saved {len(series['dates'])} months of {lag}-month contributions to {output_path}")
+    return series
 
 
 def format_contribution_report(results: Dict) -> str:
@@ -200,6 +394,12 @@ if __name__ == "__main__":
     food_data_path = project_root / "data" / "food_subcategories.json"
     weights_path = project_root / "data" / "basket_weights.json"
     
+    # Every month's year-over-year contributions in one pass
+    if "--rolling" in sys.argv:
+        engine = ContributionEngine.from_files(food_data_path, weights_path)
+        save_rolling_contributions(engine, project_root / "data" / "contribution_timeseries.json")
+        sys.exit(0)
+    
     # Example: Calculate contributions for last year
     # You can modify these dates as needed
     # Use 2024-11 to 2025-11 as example (year-over-year)
@@ -214,7 +414,9 @@ if __name__ == "__main__":
             weights_path,
             start_date_str,
             end_date_str,
-            use_link_month_weights=True
+            use_link_month_weights=True,
+            # --index reads the series from the precomputed log index
+            food_data=load_food_data_from_index() if "--index" in sys.argv else None
         )
         
         print("\n" + format_contribution_report(results))
@@ -0,0 +1,304 @@
+"""
+Chain-linked contributions across CPI basket updates.
+
+The CPI basket is re-weighted at each basket link month, so a contribution
+over a window that crosses a basket update cannot use a single set of
+weights. This engine splits the window at every link month it crosses:
+
+    segment j:  basket b_j, weights w_ij at link month prices (share of the parent)
+    relative:   R_ij(t) = I_i(t) / I_i(L_j)
+    aggregate:  A_j(t) = sum_i w_ij R_ij(t), chained as Level(t) = C_j A_j(t)
+                with C_j = Level(L_j), precomputed once per link month
+
+and the contribution of category i over s -> t is
+
+    c_i = sum_j C_j w_ij (R_ij(e_j) - R_ij(a_j)) / Level(s) x 100
+
+where [a_j, e_j] is the part of the window inside segment j. The c_i add
+up exactly to the chained aggregate change Level(t) / Level(s) - 1, and are
+evaluated for all categories of a parent at once as NumPy vectors.
+
+Weight vintages come from data/basket_weights_by_year.json (written by
+fetch_all_weights.py); index series from all_subcategories.json and
+inflation_multi_series.json.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from calculate_contributions import IndexedSeries
+from cpi_hierarchy import ALL_CATEGORIES, CPI_HIERARCHY
+from cpi_series import month_ordinal, ordinal_to_date
+from hierarchy_contributions import ALL_ITEMS
+from process_multi_series_inflation import CATEGORIES
+from series_codec import load_series_json
+
+# Month each basket vintage was linked into the CPI (the last month priced
+# with the previous basket). The new basket applies from the next month.
+BASKET_LINK_MONTHS = {
+    "2013": "2014-12",
+    "2015": "2016-12",
+    "2017": "2018-12",
+    "2020": "2021-05",
+    "2021": "2022-05",
+    "2022": "2023-05",
+    "2023": "2024-05",
+    "2024": "2025-05",
+}
+
+
+def link_month(vintage: str) -> str:
+    """Link month of a basket vintage; unknown vintages follow the annual May update."""
+    return BASKET_LINK_MONTHS.get(vintage, f"{int(vintage) + 1}-05")
+
+
+def load_weight_vintages(data_dir: Path = None) -> Dict[str, Dict[str, float]]:
+    """
+    Basket weights (percent, link month prices) by vintage year.
+
+    Falls back to the single vintage in basket_weights.json when
+    basket_weights_by_year.json has not been written yet.
+    """
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / "data"
+
+    vintages_path = data_dir / "basket_weights_by_year.json"
+    if vintages_path.exists():
+        with open(vintages_path, 'r', encoding='utf-8') as f:
+            return json.load(f)["weights_pct_by_year"]
+
+    with open(data_dir / "basket_weights.json", 'r', encoding='utf-8') as f:
+        weights_data = json.load(f)
+    return {weights_data["year"]: weights_data["all_weights_pct"]}
+
+
+def load_statcan_series(data_dir: Path = None) -> Dict[str, List[Dict]]:
+    """Index series keyed by StatCan product name, from the CPI series JSON files."""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / "data"
+
+    series = {}
+    for filename, categories in (("inflation_multi_series.json", dict(CATEGORIES)),
+                                 ("all_subcategories.json", ALL_CATEGORIES)):
+        path = data_dir / filename
+        if not path.exists():
+            continue
+        names = {display_name: product for product, display_name in categories.items()}
+        for entry in load_series_json(path)['series']:
+            product = names.get(entry['category'])
+            if product is not None:
+                series[product] = entry['data']
+    return series
+
+
+def find_children(parent: str, tree: dict = None) -> List[str]:
+    """Direct children of a node of CPI_HIERARCHY (the main categories for All-items)."""
+    if tree is None:
+        tree = CPI_HIERARCHY
+    if parent == ALL_ITEMS:
+        return list(tree)
+    for name, subtree in tree.items():
+        if name == parent:
+            return list(subtree)
+        children = find_children(parent, subtree) if subtree else None
+        if children is not None:
+            return children
+    return None
+
+
+class ChainLinkedEngine:
+    """
+    Chain-linked contributions of a parent's children over any window.
+
+    Args:
+        series: StatCan product name -> list of data points
+        vintages: Vintage year -> {StatCan product name: weight in percent}
+        parent: Aggregate to decompose (default All-items)
+        children: Its components (default: its children in CPI_HIERARCHY)
+    """
+
+    def __init__(self, series: Dict[str, List[Dict]], vintages: Dict[str, Dict[str, float]],
+                 parent: str = ALL_ITEMS, children: List[str] = None):
+        self.parent = parent
+        self.children = children if children is not None else find_children(parent)
+        if not self.children:
+            raise ValueError(f"No components known for {parent}")
+
+        self.parent_series = IndexedSeries(parent, series[parent]) if series.get(parent) else None
+
+        # Dense (months x children) index matrix
+        indexed = [IndexedSeries(name, series.get(name, [])) for name in self.children]
+        present = [s for s in indexed if len(s)]
+        self.first = min(s.first for s in present) if present else 0
+        last = max(s.first + len(s) - 1 for s in present) if present else -1
+        months = np.arange(self.first, last + 1)
+        self.values = np.column_stack([s.values_at(months) for s in indexed]) if len(months) else \
+            np.empty((0, len(self.children)))
+
+        self._build_links(vintages)
+
+    def _build_links(self, vintages: Dict[str, Dict[str, float]]):
+        """Precompute each basket segment's weights, base prices and chain factor."""
+        segments = []
+        for vintage in sorted(vintages):
+            position = month_ordinal(link_month(vintage)) - self.first
+            if position >= len(self.values):
+                continue
+            # Baskets linked before the data starts apply from its first month
+            position = max(position, 0)
+
+            weights = np.array([vintages[vintage].get(name, 0.0) for name in self.children])
+            base = self.values[position]
+            weights = np.where(np.isnan(base) | (weights <= 0), 0.0, weights)
+            if weights.sum() <= 0:
+                continue
+
+            if segments and segments[-1]['position'] >= position:
+                segments.pop()
+            segments.append({
+                'vintage': vintage,
+                'position': position,
+                'weights': weights / weights.sum(),
+                'base': np.where(np.isnan(base), 1.0, base),
+            })
+
+        if not segments:
+            raise ValueError(f"No basket weights cover the components of {self.parent}")
+
+        # Chain factor: implied aggregate level at each link month
+        level = 1.0
+        for i, segment in enumerate(segments):
+            segment['level'] = level
+            if i + 1 < len(segments):
+                level *= self._aggregate(segment, segments[i + 1]['position'])
+        self.segments = segments
+        self.link_positions = np.array([segment['position'] for segment in segments])
+
+    def _relatives(self, segment: dict, position: int) -> np.ndarray:
+        return self.values[position] / segment['base']
+
+    def _aggregate(self, segment: dict, position: int) -> float:
+        """A_j(t): the segment's implied aggregate relative to its link month."""
+        return float(np.nansum(segment['weights'] * self._relatives(segment, position)))
+
+    def _segment_index(self, position: int) -> int:
+        return max(int(np.searchsorted(self.link_positions, position, side='right')) - 1, 0)
+
+    def level(self, position: int) -> float:
+        """Chained aggregate level at a month position (1.0 at the first link month)."""
+        segment = self.segments[self._segment_index(position)]
+        return segment['level'] * self._aggregate(segment, position)
+
+    def contribution_vector(self, start_position: int, end_position: int) -> Tuple[np.ndarray, float, list]:
+        """
+        Chain-linked contributions of every child between two month positions.
+
+        Returns:
+            (contributions in percentage points, chained aggregate change in
+            percent, link months crossed)
+        """
+        if start_position > end_position:
+            raise ValueError("Start month must not be after end month")
+
+        contributions = np.zeros(len(self.children))
+        start_level = self.level(start_position)
+        crossed = []
+
+        first_segment = self._segment_index(start_position)
+        last_segment = self._segment_index(end_position)
+        position = start_position
+        for j in range(first_segment, last_segment + 1):
+            segment = self.segments[j]
+            stop = self.segments[j + 1]['position'] if j < last_segment else end_position
+            change = self._relatives(segment, stop) - self._relatives(segment, position)
+            contributions += segment['level'] * segment['weights'] * change / start_level * 100
+            if j < last_segment:
+                crossed.append(ordinal_to_date(self.first + stop))
+            position = stop
+
+        aggregate_change = (self.level(end_position) / start_level - 1) * 100
+        return contributions, aggregate_change, crossed
+
+    def calculate(self, start_date: str, end_date: str) -> Dict:
+        """
+        Chain-linked contribution analysis for one window.
+
+        Returns:
+            Dictionary in the style of calculate_food_contributions results
+        """
+        start_position = month_ordinal(start_date) - self.first
+        end_position = month_ordinal(end_date) - self.first
+        for date, position in ((start_date, start_position), (end_date, end_position)):
+            if not 0 <= position < len(self.values):
+                raise ValueError(f"No data for {date}")
+        if start_position > end_position:
+            raise ValueError(f"Start date {start_date} is after end date {end_date}")
+
+        contributions, aggregate_change, crossed = self.contribution_vector(start_position, end_position)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct_changes = (self.values[end_position] / self.values[start_position] - 1) * 100
+
+        published_change = None
+        if self.parent_series is not None:
+            start_value = self.parent_series.value_at(start_date)
+            end_value = self.parent_series.value_at(end_date)
+            if start_value and end_value:
+                published_change = (end_value / start_value - 1) * 100
+
+        rows = []
+        for i, name in enumerate(self.children):
+            if np.isnan(contributions[i]):
+                continue
+            rows.append({
+                'category': ALL_CATEGORIES.get(name, name),
+                'statcan_name': name,
+                'percentage_change': None if np.isnan(pct_changes[i]) else float(pct_changes[i]),
+                'contribution_pp': float(contributions[i])
+            })
+        rows.sort(key=lambda x: abs(x['contribution_pp']), reverse=True)
+
+        total_contribution = float(np.nansum(contributions))
+        difference = abs(published_change - total_contribution) if published_change is not None else None
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'parent': self.parent,
+            'basket_links': crossed,
+            'chained_change_pct': aggregate_change,
+            'published_change_pct': published_change,
+            'total_contribution_pp': total_contribution,
+            'contributions': rows,
+            'validation': {
+                'difference_pp': difference,
+                'within_tolerance': difference is not None and difference < 0.1
+            }
+        }
+
+
+if __name__ == "__main__":
+    parent = sys.argv[3] if len(sys.argv) >= 4 else ALL_ITEMS
+
+    try:
+        engine = ChainLinkedEngine(load_statcan_series(), load_weight_vintages(), parent)
+        if len(sys.argv) >= 3:
+            start_date, end_date = sys.argv[1], sys.argv[2]
+        else:
+            end_date = ordinal_to_date(engine.first + len(engine.values) - 1)
+            start_date = ordinal_to_date(engine.first)
+
+        results = engine.calculate(start_date, end_date)
+        print(f"{parent}: {start_date} to {end_date}, basket links {', '.join(results['basket_links']) or 'none'}")
+        for row in results['contributions']:
+            print(f"  {row['category']:<25} {row['contribution_pp']:>8.2f} pp")
+        print(f"  {'Total':<25} {results['total_contribution_pp']:>8.2f} pp "
+              f"(chained {results['chained_change_pct']:.2f}%)")
+        if results['published_change_pct'] is not None:
+            print(f"  Published change: {results['published_change_pct']:.2f}%")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        exit(1)
@@ -2,10 +2,17 @@
 // Requires D3.js to be loaded globally
 // Extracted from R Markdown file, preserving exact structure and styling
 
+import { decodeCropComponents, decodeDecomposition } from "../data/grainCodec.js";
+import { loadGrainLod, periodLabeller } from "../data/grainLod.js";
+
+// Pixels one plotted year needs; each chart loads the finest level of
+// detail that fits its width (see data/grainLod.js)
+const LINE_POINT_SPACING = 4;
+const PANEL_POINT_SPACING = 2;
+const WATERFALL_POINT_SPACING = 6;
+
 // Production History Chart
 function initProductionChart() {
-  const baseUrl = import.meta.env.BASE_URL;
-  
   // Wait for D3.js to load and container to exist
   if (typeof d3 === "undefined") {
     console.error("D3.js is not loaded. Please ensure d3.min.js is available.");
@@ -23,10 +30,14 @@ function initProductionChart() {
     return;
   }
   
-  d3.json(baseUrl + "data/grain_production_by_year.json")
+  // Plot width in pixels (margins as below)
+  const plotWidth = Math.min(container.clientWidth || 960, 960) - 100;
+  
+  loadGrainLod("grain_production_by_year", plotWidth, LINE_POINT_SPACING)
     .then(function(jsonData) {
       const data = jsonData.data;
       const xAxisBreaks = jsonData.xAxisBreaks;
+      const yearLabel = periodLabeller(jsonData);
       
       // LabelClean function (replicates R function)
       function labelClean(value) {
@@ -160,7 +171,7 @@ function initProductionChart() {
         // Show year label on x-axis
         hoverYearLabel
           .attr("x", xPos)
-          .text(String(d.year))
+          .text(yearLabel(d.year))
           .transition()
           .duration(100)
           .style("opacity", 1);
@@ -305,8 +316,6 @@ function initProductionChart() {
 
 // Area History Chart
 function initAreaChart() {
-  const baseUrl = import.meta.env.BASE_URL;
-  
   // Wait for D3.js to load and container to exist
   if (typeof d3 === "undefined") {
     console.error("D3.js is not loaded. Please ensure d3.min.js is available.");
@@ -324,10 +333,14 @@ function initAreaChart() {
     return;
   }
   
-  d3.json(baseUrl + "data/grain_area_by_year.json")
+  // Plot width in pixels (margins as below)
+  const plotWidth = Math.min(container.clientWidth || 960, 960) - 100;
+  
+  loadGrainLod("grain_area_by_year", plotWidth, LINE_POINT_SPACING)
     .then(function(jsonData) {
       const data = jsonData.data;
       const xAxisBreaks = jsonData.xAxisBreaks;
+      const yearLabel = periodLabeller(jsonData);
       
       // LabelClean function (replicates R function)
       function labelClean(value) {
@@ -464,7 +477,7 @@ function initAreaChart() {
         // Show year label on x-axis
         hoverYearLabel
           .attr("x", xPos)
-          .text(String(d.year))
+          .text(yearLabel(d.year))
           .transition()
           .duration(100)
           .style("opacity", 1);
@@ -609,8 +622,6 @@ function initAreaChart() {
 
 // Crop Components Chart
 function initCropComponentsChart() {
-  const baseUrl = import.meta.env.BASE_URL;
-  
   if (typeof d3 === "undefined") {
     console.error("D3.js is not loaded.");
     return;
@@ -627,12 +638,17 @@ function initCropComponentsChart() {
     return;
   }
   
-  d3.json(baseUrl + "data/grain_crop_components.json")
+  // Rendered panel width in pixels: the fixed 920px wide layout below is scaled down to the container
+  const panelPixels = 250 * Math.min(1, (container.clientWidth || 920) / 920);
+  
+  loadGrainLod("grain_crop_components", panelPixels, PANEL_POINT_SPACING)
+    .then(decodeCropComponents)
     .then(function(jsonData) {
       const rawData = jsonData.data;
       const crops = jsonData.crops;
       const xAxisBreaks = jsonData.xAxisBreaks;
       const measureColours = jsonData.measureColours;
+      const yearLabel = periodLabeller(jsonData);
       const measures = ["Effective yield (t/ha seeded)", "Seeded area (hectares)", "Production (tonnes)"];
       
       // LabelClean function
@@ -936,7 +952,7 @@ function initCropComponentsChart() {
           // Show year label below each panel in the hovered row
           ref.hoverYearLabel
             .attr("x", xPos)
-            .text(String(year))
+            .text(yearLabel(year))
             .transition()
             .duration(100)
             .style("opacity", 1);
@@ -1022,6 +1038,18 @@ function initCropComponentsChart() {
       // Year selector functionality
       let selectedYear = null;
       
+      // Plotted point for a picked year: on decimated and decade levels the
+      // nearest one within the panel's years
+      function pointForYear(panelData, year) {
+        if (!jsonData.level) {
+          return panelData.find(p => p.year === year);
+        }
+        if (year < panelData[0].year || year > panelData[panelData.length - 1].year) {
+          return undefined;
+        }
+        return panelData.reduce((best, p) => (Math.abs(p.year - year) < Math.abs(best.year - year) ? p : best));
+      }
+      
       // Function to show year across all panels for all crops
       function showYearSelector(year) {
         selectedYear = year;
@@ -1032,7 +1060,7 @@ function initCropComponentsChart() {
             if (!ref) return;
             
             // Find data point for this year
-            const dataPoint = ref.data.find(p => p.year === year);
+            const dataPoint = pointForYear(ref.data, year);
             if (!dataPoint) {
               // Hide elements if no data for this year
               ref.hoverValueLabel.style("opacity", 0);
@@ -1042,7 +1070,7 @@ function initCropComponentsChart() {
               return;
             }
             
-            const xPos = ref.xScale(year);
+            const xPos = ref.xScale(dataPoint.year);
             const yPos = ref.yScale(dataPoint.value);
             
             // Show value label on y-axis
@@ -1074,7 +1102,7 @@ function initCropComponentsChart() {
             // Show year label below each panel
             ref.hoverYearLabel
               .attr("x", xPos)
-              .text(String(year))
+              .text(yearLabel(dataPoint.year))
               .transition()
               .duration(100)
               .style("opacity", 1);
@@ -1360,8 +1388,6 @@ function initCropComponentsChart() {
 
 // Cumulative Decomposition Chart
 function initCumulativeChart() {
-  const baseUrl = import.meta.env.BASE_URL;
-  
   if (typeof d3 === "undefined") {
     console.error("D3.js is not loaded.");
     return;
@@ -1378,7 +1404,11 @@ function initCumulativeChart() {
     return;
   }
   
-  d3.json(baseUrl + "data/grain_decomposition.json")
+  // Plot width in pixels (margins as below)
+  const plotWidth = Math.min(container.clientWidth || 960, 960) - 100;
+  
+  loadGrainLod("grain_decomposition", plotWidth, WATERFALL_POINT_SPACING)
+    .then(decodeDecomposition)
     .then(function(jsonData) {
       const cumulativeData = jsonData.cumulativeData;
       const connectingSegments = jsonData.connectingSegments;
@@ -1386,6 +1416,17 @@ function initCumulativeChart() {
       const xAxisBreaks = jsonData.xAxisBreaks;
       const colours = jsonData.colours;
       const uniqueYears = jsonData.uniqueYears;
+      const yearLabel = periodLabeller(jsonData);
+      
+      // Offset of the outer component bars from their year (wider on aggregated levels)
+      const barOffset = d3.max(cumulativeData, d => d.xPosition - d.year) || 0.25;
+      
+      // Hover band of each plotted year, halfway to its neighbours
+      const yearBands = new Map(uniqueYears.map((year, i) => {
+        const before = i > 0 ? year - uniqueYears[i - 1] : (uniqueYears[i + 1] || year + 1) - year;
+        const after = i < uniqueYears.length - 1 ? uniqueYears[i + 1] - year : before;
+        return [year, { x0: year - before / 2, x1: year + after / 2 }];
+      }));
       
       // Set dimensions and margins - make responsive
       const margin = {top: 60, right: 20, bottom: 50, left: 80};
@@ -1447,8 +1488,8 @@ function initCumulativeChart() {
         .enter()
         .append("line")
         .attr("class", "connecting-segment")
-        .attr("x1", d => xScale(d.year + 0.4))
-        .attr("x2", d => xScale(d.yearEnd - 0.4))
+        .attr("x1", d => xScale(d.year + 1.6 * barOffset))
+        .attr("x2", d => xScale(d.yearEnd - 1.6 * barOffset))
         .attr("y1", d => yScale(d.yValue))
         .attr("y2", d => yScale(d.yValue))
         .attr("stroke-width", 0.5);
@@ -1692,7 +1733,7 @@ function initCumulativeChart() {
         .attr("class", "mini-window-label")
         .attr("dy", "0.32em")
         .style("font-weight", "bold")
-        .text("Year Net:");
+        .text(jsonData.periods ? "Net:" : "Year Net:");
       
       const yearNetValue = yearNetLabel.append("text")
         .attr("class", "mini-window-value")
@@ -1717,16 +1758,14 @@ function initCumulativeChart() {
         .style("font-weight", "bold");
       
       // Create invisible rectangles for hover detection (one per year)
-      const yearWidth = xScale(uniqueYears[1]) - xScale(uniqueYears[0]);
-      
       svg.selectAll(".hover-rect")
         .data(uniqueYears)
         .enter()
         .append("rect")
         .attr("class", "hover-rect")
-        .attr("x", d => xScale(d) - yearWidth / 2)
+        .attr("x", d => xScale(yearBands.get(d).x0))
         .attr("y", 0)
-        .attr("width", yearWidth)
+        .attr("width", d => xScale(yearBands.get(d).x1) - xScale(yearBands.get(d).x0))
         .attr("height", height)
         .attr("fill", "transparent")
         .style("cursor", "crosshair")
@@ -1742,9 +1781,9 @@ function initCumulativeChart() {
         const yearComponents = cumulativeData.filter(d => d.year === year);
         if (yearComponents.length === 0) return;
         
-        // Show highlight ribbon (spans from -0.50 to +0.50 around the year)
-        const ribbonX1 = xScale(year - 0.50);
-        const ribbonX2 = xScale(year + 0.50);
+        // Show highlight ribbon (spans the year's hover band, -0.50 to +0.50 on the full level)
+        const ribbonX1 = xScale(yearBands.get(year).x0);
+        const ribbonX2 = xScale(yearBands.get(year).x1);
         highlightRibbon
           .attr("x", ribbonX1)
           .attr("width", ribbonX2 - ribbonX1)
@@ -1753,7 +1792,7 @@ function initCumulativeChart() {
         // Show year label on x-axis
         hoverYearLabel
           .attr("x", xScale(year))
-          .text(year)
+          .text(yearLabel(year))
           .style("opacity", 1);
         
         // Hide nearby x-axis labels (within 10 years)
@@ -1769,7 +1808,7 @@ function initCumulativeChart() {
         });
         
         // Update title
-        miniWindowTitle.text(year);
+        miniWindowTitle.text(yearLabel(year));
         
         // Get data in component order
         const areaData = yearComponents.find(d => d.component === "Seeded Area");
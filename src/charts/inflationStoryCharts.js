@@ -1,139 +1,34 @@
 // Inflation Story Charts - D3 visualizations
 // Requires D3.js to be loaded globally
 
+import { loadDataJson } from "../data/artifacts.js";
+import { decodeSeries } from "../data/seriesCodec.js";
+import cpiHierarchy from "../data/cpi_hierarchy.json";
+
 let allSubcatData = null;
 let weightsData = null;
+// Per-category shards of all_subcategories (see src/cpi_shards.py): the
+// index holds the top-level series, a branch is fetched when expanded
+let shardsByName = new Map();
+const shardRequests = new Map();
 let dataDateRange = { start: "2015-01", end: "2025-11" };
 
-// Complete hierarchy definition
-const HIERARCHY = {
-  "Food": {
-    children: {
-      "Food from Stores": {
-        children: {
-          "Meat": {
-            children: {
-              "Fresh/Frozen Meat": { children: { "Beef": {}, "Pork": {} } },
-              "Poultry": { children: { "Chicken": {} } },
-              "Processed Meat": {}
-            }
-          },
-          "Fish & Seafood": {},
-          "Dairy & Eggs": {
-            children: {
-              "Dairy Products": { children: { "Fresh Milk": {}, "Butter": {}, "Cheese": {} } },
-              "Eggs": {}
-            }
-          },
-          "Bakery & Cereals": { children: { "Bakery Products": {}, "Cereal Products": {} } },
-          "Fruits & Nuts": { children: { "Fresh Fruit": {}, "Preserved Fruit": {}, "Nuts & Seeds": {} } },
-          "Vegetables": { children: { "Fresh Vegetables": {}, "Preserved Vegetables": {} } },
-          "Other Food & Beverages": { children: { "Sugar & Candy": {}, "Coffee & Tea": {}, "Soft Drinks": {}, "Other Prepared Foods": {} } }
-        }
-      },
-      "Restaurants": { children: { "Fast Food": {}, "Table Service": {}, "Cafeterias": {} } }
-    }
-  },
-  "Shelter": {
-    children: {
-      "Rented": { children: { "Rent": {}, "Tenant Insurance": {} } },
-      "Owned": { children: { "Mortgage Interest": {}, "Replacement Cost": {}, "Property Taxes": {}, "Home Insurance": {}, "Maintenance": {} } },
-      "Utilities": { children: { "Electricity": {}, "Natural Gas": {}, "Water": {}, "Fuel Oil": {} } }
-    }
-  },
-  "Transportation": {
-    children: {
-      "Private Transport": {
-        children: {
-          "Vehicle Purchase": { children: { "New/Used Vehicles": {}, "Vehicle Leasing": {} } },
-          "Gasoline": {},
-          "Vehicle Operation": { children: { "Parts & Repairs": {}, "Auto Insurance": {} } }
-        }
-      },
-      "Public Transport": { children: { "Local Transit": { children: { "Bus & Subway": {} } }, "Inter-city": { children: { "Air Travel": {} } } } }
-    }
-  },
-  "Household": {
-    children: {
-      "Operations": { children: { "Communications": { children: { "Phone": {} } }, "Childcare & Housekeeping": {}, "Cleaning Products": {}, "Other Services": {} } },
-      "Furnishings": { children: { "Furniture": {}, "Equipment": { children: { "Appliances": {} } } } }
-    }
-  },
-  "Clothing": { children: { "Apparel": { children: { "Women's": {}, "Men's": {}, "Children's": {} } }, "Footwear": {} } },
-  "Health & Care": {
-    children: {
-      "Health Care": { children: { "Health Goods": { children: { "Medicines": {} } }, "Health Services": { children: { "Dental": {} } } } },
-      "Personal Care": { children: { "Personal Products": {}, "Personal Services": {} } }
-    }
-  },
-  "Recreation & Education": {
-    children: {
-      "Recreation": { children: { "Rec Equipment": {}, "Rec Vehicles": {}, "Home Entertainment": {}, "Travel": { children: { "Hotels": {}, "Tours": {} } }, "Other Recreation": {} } },
-      "Education": { children: { "Schools": { children: { "Tuition": {} } }, "Reading": {} } }
-    }
-  },
-  "Alcohol & Tobacco": { children: { "Alcohol": { children: { "Bars & Restaurants": {}, "Liquor Stores": {} } }, "Tobacco": {} } }
-};
+// Drill-down tree in display names, and display name -> StatCan name for the
+// weights, both from the category tree shared with the Python pipelines
+// (src/data/cpi_hierarchy.json, see src/cpi_hierarchy.py)
+const WEIGHT_MAP = {};
 
-// Weight mapping
-const WEIGHT_MAP = {
-  "Food": "Food", "Shelter": "Shelter", "Transportation": "Transportation",
-  "Household": "Household operations, furnishings and equipment", "Clothing": "Clothing and footwear",
-  "Health & Care": "Health and personal care", "Recreation & Education": "Recreation, education and reading",
-  "Alcohol & Tobacco": "Alcoholic beverages, tobacco products and recreational cannabis",
-  "Food from Stores": "Food purchased from stores", "Restaurants": "Food purchased from restaurants",
-  "Fast Food": "Food purchased from fast food and take-out restaurants",
-  "Table Service": "Food purchased from table-service restaurants",
-  "Cafeterias": "Food purchased from cafeterias and other restaurants",
-  "Meat": "Meat", "Fresh/Frozen Meat": "Fresh or frozen meat (excluding poultry)",
-  "Beef": "Fresh or frozen beef", "Pork": "Fresh or frozen pork",
-  "Poultry": "Fresh or frozen poultry", "Chicken": "Fresh or frozen chicken",
-  "Processed Meat": "Processed meat", "Fish & Seafood": "Fish, seafood and other marine products",
-  "Dairy & Eggs": "Dairy products and eggs", "Dairy Products": "Dairy products",
-  "Fresh Milk": "Fresh milk", "Butter": "Butter", "Cheese": "Cheese", "Eggs": "Eggs",
-  "Bakery & Cereals": "Bakery and cereal products (excluding baby food)",
-  "Bakery Products": "Bakery products", "Cereal Products": "Cereal products (excluding baby food)",
-  "Fruits & Nuts": "Fruit, fruit preparations and nuts", "Fresh Fruit": "Fresh fruit",
-  "Preserved Fruit": "Preserved fruit and fruit preparations", "Nuts & Seeds": "Nuts and seeds",
-  "Vegetables": "Vegetables and vegetable preparations", "Fresh Vegetables": "Fresh vegetables",
-  "Preserved Vegetables": "Preserved vegetables and vegetable preparations",
-  "Other Food & Beverages": "Other food products and non-alcoholic beverages",
-  "Sugar & Candy": "Sugar and confectionery", "Coffee & Tea": "Coffee and tea",
-  "Soft Drinks": "Non-alcoholic beverages", "Other Prepared Foods": "Other food preparations",
-  "Rented": "Rented accommodation", "Rent": "Rent", "Tenant Insurance": "Tenants' insurance premiums",
-  "Owned": "Owned accommodation", "Mortgage Interest": "Mortgage interest cost",
-  "Replacement Cost": "Homeowners' replacement cost", "Property Taxes": "Property taxes and other special charges",
-  "Home Insurance": "Homeowners' home and mortgage insurance", "Maintenance": "Homeowners' maintenance and repairs",
-  "Utilities": "Water, fuel and electricity", "Electricity": "Electricity",
-  "Natural Gas": "Natural gas", "Water": "Water", "Fuel Oil": "Fuel oil and other fuels",
-  "Private Transport": "Private transportation", "Vehicle Purchase": "Purchase, leasing and rental of passenger vehicles",
-  "New/Used Vehicles": "Purchase of passenger vehicles", "Vehicle Leasing": "Leasing of passenger vehicles",
-  "Gasoline": "Gasoline", "Vehicle Operation": "Operation of passenger vehicles",
-  "Parts & Repairs": "Passenger vehicle parts, maintenance and repairs",
-  "Auto Insurance": "Passenger vehicle insurance premiums", "Public Transport": "Public transportation",
-  "Local Transit": "Local and commuter transportation", "Bus & Subway": "City bus and subway transportation",
-  "Inter-city": "Inter-city transportation", "Air Travel": "Air transportation",
-  "Operations": "Household operations", "Communications": "Communications",
-  "Phone": "Telephone services", "Childcare & Housekeeping": "Child care and housekeeping services",
-  "Cleaning Products": "Household cleaning products", "Other Services": "Other household goods and services",
-  "Furnishings": "Household furnishings and equipment", "Furniture": "Furniture and household textiles",
-  "Equipment": "Household equipment", "Appliances": "Household appliances",
-  "Apparel": "Clothing", "Women's": "Women's clothing", "Men's": "Men's clothing",
-  "Children's": "Children's clothing", "Footwear": "Footwear",
-  "Health Care": "Health care", "Health Goods": "Health care goods",
-  "Medicines": "Medicinal and pharmaceutical products", "Health Services": "Health care services",
-  "Dental": "Dental care services", "Personal Care": "Personal care",
-  "Personal Products": "Personal care supplies and equipment", "Personal Services": "Personal care services",
-  "Recreation": "Recreation", "Rec Equipment": "Recreational equipment and services (excluding recreational vehicles)",
-  "Rec Vehicles": "Purchase and operation of recreational vehicles",
-  "Home Entertainment": "Home entertainment equipment, parts and services",
-  "Travel": "Travel services", "Hotels": "Traveller accommodation", "Tours": "Travel tours",
-  "Other Recreation": "Other cultural and recreational services",
-  "Education": "Education and reading", "Schools": "Education", "Tuition": "Tuition fees",
-  "Reading": "Reading material (excluding textbooks)",
-  "Alcohol": "Alcoholic beverages", "Bars & Restaurants": "Alcoholic beverages served in licensed establishments",
-  "Liquor Stores": "Alcoholic beverages purchased from stores", "Tobacco": "Tobacco products and smokers' supplies"
-};
+function chartHierarchy(nodes) {
+  const tree = {};
+  for (const [statCanName, node] of Object.entries(nodes)) {
+    if (node.chart === false) continue;
+    WEIGHT_MAP[node.display] = statCanName;
+    tree[node.display] = node.children ? { children: chartHierarchy(node.children) } : {};
+  }
+  return tree;
+}
+
+const HIERARCHY = chartHierarchy(cpiHierarchy);
 
 // Helper function to get responsive chart dimensions
 function getChartDimensions(chartType = 'cpi') {
@@ -167,7 +62,7 @@ function getChartDimensions(chartType = 'cpi') {
 export function initCpiChart() {
   const d3 = window.d3;
   
-  d3.json(import.meta.env.BASE_URL + "data/inflation_multi_series.json")
+  loadDataJson("inflation_multi_series")
     .then(data => {
       document.getElementById("cpi-loading").style.display = "none";
       
@@ -424,11 +319,14 @@ export function initIcicleChart() {
   const d3 = window.d3;
   
   Promise.all([
-    d3.json(import.meta.env.BASE_URL + "data/all_subcategories.json"),
-    d3.json(import.meta.env.BASE_URL + "data/basket_weights.json")
+    loadDataJson("all_subcategories/index")
+      .catch(() => loadDataJson("all_subcategories"))
+      .then(decodeSeries),
+    loadDataJson("basket_weights")
   ]).then(([subcats, weights]) => {
     allSubcatData = subcats;
     weightsData = weights;
+    shardsByName = new Map((subcats.shards || []).map(shard => [shard.name, shard]));
     
     if (subcats.date_range) {
       dataDateRange = subcats.date_range;
@@ -504,7 +402,46 @@ function updateDateDisplay() {
   }
 }
 
-function calculateContributions() {
+// Fetch the shard of a top-level category once and add its series
+function loadShard(shard) {
+  if (!shardRequests.has(shard.slug)) {
+    const request = loadDataJson(`all_subcategories/${shard.slug}`)
+      .then(decodeSeries)
+      .then(json => {
+        allSubcatData.series.push(...json.series);
+        shard.loaded = true;
+      })
+      .catch(error => {
+        shardRequests.delete(shard.slug);
+        throw error;
+      });
+    shardRequests.set(shard.slug, request);
+  }
+  return shardRequests.get(shard.slug);
+}
+
+// Top-level category whose shard has not been fetched yet
+function unloadedShard(name) {
+  const shard = shardsByName.get(name);
+  return shard && !shard.loaded ? shard : null;
+}
+
+function expandCategory(name) {
+  const shard = unloadedShard(name);
+  if (!shard) return;
+  
+  document.getElementById("food-loading").style.display = "block";
+  loadShard(shard)
+    .then(() => calculateContributions(name))
+    .catch(error => {
+      console.error("Shard loading error:", error);
+      document.getElementById("food-loading").style.display = "none";
+      document.getElementById("food-error").style.display = "block";
+      document.getElementById("food-error").textContent = `Error loading ${name}: ${error.message}`;
+    });
+}
+
+function calculateContributions(focusName = null) {
   const startDate = document.getElementById("startDate").value;
   const endDate = document.getElementById("endDate").value;
   
@@ -516,7 +453,7 @@ function calculateContributions() {
   try {
     const results = calculateAllContributions(startDate, endDate);
     displayResults(results);
-    drawIcicleChart(results);
+    drawIcicleChart(results, focusName);
     document.getElementById("food-loading").style.display = "none";
   } catch (error) {
     console.error("Calculation error:", error);
@@ -562,7 +499,10 @@ function buildHierarchyNode(name, hierarchyDef, startDate, endDate) {
   
   const node = { name, weight, percentageChange, contribution };
   
-  if (hierarchyDef.children) {
+  if (hierarchyDef.children && unloadedShard(name)) {
+    // Children are drawn once the shard is loaded
+    node.lazy = true;
+  } else if (hierarchyDef.children) {
     node.children = [];
     for (const [childName, childDef] of Object.entries(hierarchyDef.children)) {
       const childNode = buildHierarchyNode(childName, childDef, startDate, endDate);
@@ -610,7 +550,7 @@ function displayResults(results) {
   document.getElementById("period").textContent = `${formatDate(results.startDate)} → ${formatDate(results.endDate)}`;
 }
 
-function drawIcicleChart(results) {
+function drawIcicleChart(results, focusName = null) {
   const d3 = window.d3;
   
   // Get responsive dimensions
@@ -672,7 +612,7 @@ function drawIcicleChart(results) {
     .attr("rx", 3)
     .attr("stroke", "rgba(0,0,0,0.2)")
     .attr("stroke-width", 0.5)
-    .style("cursor", d => d.children ? "pointer" : "default")
+    .style("cursor", d => d.children || d.data.lazy ? "pointer" : "default")
     .on("click", clicked)
     .on("mouseover", function(event, d) { 
       d3.select(this).attr("fill-opacity", 1).attr("stroke", "#fff").attr("stroke-width", 2);
@@ -727,6 +667,10 @@ function drawIcicleChart(results) {
   let focus = root;
   
   function clicked(event, p) {
+    if (p.data.lazy) {
+      expandCategory(p.data.name);
+      return;
+    }
     if (!p.children) return;
     focus = focus === p ? p = p.parent : p;
     if (!p) p = root;
@@ -767,7 +711,7 @@ function drawIcicleChart(results) {
     if (data.percentageChange !== undefined && data.percentageChange !== null) {
       html += `<div class="value-row">Price Change: ${data.percentageChange >= 0 ? '+' : ''}${data.percentageChange.toFixed(2)}%</div>`;
     }
-    if (d.children) html += `<div class="value-row" style="color: var(--accent-primary, #C41E3A); margin-top: 4px;">Click to drill down →</div>`;
+    if (d.children || data.lazy) html += `<div class="value-row" style="color: var(--accent-primary, #C41E3A); margin-top: 4px;">Click to drill down →</div>`;
     tooltip.html(html).classed("visible", true);
   }
   
@@ -825,7 +769,7 @@ function drawIcicleChart(results) {
       event.stopPropagation();
       
       // If has children, drill down immediately
-      if (d.children) {
+      if (d.children || d.data.lazy) {
         clicked(event, d);
         mobileInfoPanel.style.display = 'none';
         return;
@@ -858,5 +802,11 @@ function drawIcicleChart(results) {
       }
     });
   }
+  
+  // Zoom into a category whose shard was just loaded
+  const focusNode = focusName && root.children && root.children.find(d => d.data.name === focusName);
+  if (focusNode && focusNode.children) {
+    clicked(null, focusNode);
+  }
 }
 
@@ -0,0 +1,182 @@
+"""
+Columnar, memory-mapped cache of the parsed CPI table.
+
+The first run tokenizes data/inflation_data.csv once and writes one NumPy
+array per column to data/cache/inflation_data/:
+
+    geo.npy, product.npy, uom.npy  int32 dictionary codes
+    month.npy                      int32 month ordinals (-1 if unparseable)
+    value.npy                      float64 values (NaN if missing)
+
+plus dictionaries.json with the code -> string tables and the size/mtime of
+the CSV it was built from. Later runs open the arrays with mmap_mode='r'
+and filter with vectorized masks, so re-running the derivations does not
+re-parse the CSV. The cache is rebuilt automatically when the CSV changes.
+"""
+
+import csv
+import json
+import logging
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from cpi_series import CPI_GEO, CPI_UOM, make_data_point, month_ordinal, ordinal_to_date
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+CODE_COLUMNS = {
+    "geo": "GEO",
+    "product": "Products and product groups",
+    "uom": "UOM",
+}
+
+
+def default_cache_dir(csv_path: Path) -> Path:
+    """Cache directory for a CSV: data/cache/<csv stem>/ next to the CSV."""
+    return csv_path.parent / "cache" / csv_path.stem
+
+
+def source_signature(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class CpiCache:
+    """Memory-mapped columns of one cached CPI table."""
+
+    def __init__(self, cache_dir: Path):
+        with open(cache_dir / "dictionaries.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.source = meta["source"]
+        self.dictionaries: Dict[str, List[str]] = meta["dictionaries"]
+        self.codes = {
+            column: {name: code for code, name in enumerate(names)}
+            for column, names in self.dictionaries.items()
+        }
+        self.geo = np.load(cache_dir / "geo.npy", mmap_mode='r')
+        self.product = np.load(cache_dir / "product.npy", mmap_mode='r')
+        self.uom = np.load(cache_dir / "uom.npy", mmap_mode='r')
+        self.month = np.load(cache_dir / "month.npy", mmap_mode='r')
+        self.value = np.load(cache_dir / "value.npy", mmap_mode='r')
+
+    def __len__(self):
+        return len(self.value)
+
+    def code(self, column: str, name: str) -> int:
+        """Dictionary code of a string value, or -1 if it never occurs."""
+        return self.codes[column].get(name, -1)
+
+    def base_mask(self, geo: str = CPI_GEO, uom: str = CPI_UOM) -> np.ndarray:
+        """Rows for one GEO and UOM with a valid month and value."""
+        return (
+            (self.geo == self.code("geo", geo))
+            & (self.uom == self.code("uom", uom))
+            & (self.month >= 0)
+            & ~np.isnan(self.value)
+        )
+
+
+def build_cache(csv_path: Path, cache_dir: Path = None) -> Path:
+    """Parse the CSV once and write the columnar cache. Returns the cache directory."""
+    if cache_dir is None:
+        cache_dir = default_cache_dir(csv_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Invalidate first, so a failed build never leaves a cache that looks valid
+    meta_path = cache_dir / "dictionaries.json"
+    if meta_path.exists():
+        meta_path.unlink()
+
+    logger.info(f"Building columnar cache for {csv_path}...")
+    dictionaries = {column: {} for column in CODE_COLUMNS}
+    columns = {column: array('i') for column in CODE_COLUMNS}
+    months = array('i')
+    values = array('d')
+
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = {column: header.index(name) for column, name in CODE_COLUMNS.items()}
+        date_idx = header.index('REF_DATE')
+        value_idx = header.index('VALUE')
+        min_length = max(*positions.values(), date_idx, value_idx) + 1
+
+        for row in reader:
+            # Blank or truncated lines, which the other parsers also skip
+            if len(row) < min_length:
+                continue
+            for column, idx in positions.items():
+                codes = dictionaries[column]
+                name = row[idx]
+                code = codes.get(name)
+                if code is None:
+                    code = codes[name] = len(codes)
+                columns[column].append(code)
+            try:
+                months.append(month_ordinal(row[date_idx]))
+            except ValueError:
+                months.append(-1)
+            try:
+                values.append(float(row[value_idx]))
+            except ValueError:
+                values.append(float('nan'))
+
+    for column, data in columns.items():
+        np.save(cache_dir / f"{column}.npy", np.frombuffer(data, dtype=np.int32))
+    np.save(cache_dir / "month.npy", np.frombuffer(months, dtype=np.int32))
+    np.save(cache_dir / "value.npy", np.frombuffer(values, dtype=np.float64))
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "version": CACHE_FORMAT_VERSION,
+            "source": source_signature(csv_path),
+            "dictionaries": {column: list(codes) for column, codes in dictionaries.items()},
+        }, f)
+
+    logger.info(f"✓ Cached {len(values)} rows in {cache_dir}")
+    return cache_dir
+
+
+def load_cache(csv_path: Path, cache_dir: Path = None) -> CpiCache:
+    """Open the cache for csv_path, (re)building it if missing or out of date."""
+    if cache_dir is None:
+        cache_dir = default_cache_dir(csv_path)
+
+    meta_path = cache_dir / "dictionaries.json"
+    if meta_path.exists():
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("version") == CACHE_FORMAT_VERSION and meta.get("source") == source_signature(csv_path):
+            return CpiCache(cache_dir)
+
+    build_cache(csv_path, cache_dir)
+    return CpiCache(cache_dir)
+
+
+def scan_cpi_cache(csv_path: Path, product_index: Dict[str, list]):
+    """
+    Cache-backed equivalent of cpi_extract.scan_cpi_csv.
+
+    Rows are selected with vectorized masks; points are appended in file
+    order, exactly as the CSV scanners do.
+    """
+    cache = load_cache(csv_path)
+    candidates = np.flatnonzero(cache.base_mask())
+    products = cache.product[candidates]
+
+    for product, targets in product_index.items():
+        code = cache.code("product", product)
+        if code < 0:
+            continue
+        rows = candidates[products == code]
+        points = [
+            make_data_point(ordinal_to_date(int(month)), float(value))
+            for month, value in zip(cache.month[rows], cache.value[rows])
+        ]
+        for category_data, display_name in targets:
+            category_data[display_name].extend(points)
@@ -0,0 +1,235 @@
+"""
+Single-pass extraction engine for the CPI table (data/inflation_data.csv).
+
+The CPI extractors (multi-series, Food subcategories, all subcategories)
+all keep Canada, 2002=100 rows for a set of products. Rather than each one
+scanning the whole file, extractors are registered with the engine, the
+CSV is scanned once, and every matching row is dispatched to each
+extractor that asked for that product.
+
+Two row parsers are available. "fast" (the default) resolves column
+positions once from the header, rejects non-Canada lines with a cheap
+string check before they are tokenized, and parses YYYY-MM by slicing.
+"dict" is the original csv.DictReader/strptime loop, kept as a reference
+for benchmark_cpi_parser.py. "parallel" runs the fast parser over byte
+ranges of the file on a process pool (see parallel_csv). "cache" reads
+the columnar NumPy cache built by cpi_cache instead of the CSV, and
+"store" queries the SQLite observation store (see observation_store).
+"""
+
+import csv
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from cpi_series import CPI_GEO, CPI_UOM, make_data_point, month_ordinal
+from cpi_cache import scan_cpi_cache
+from fetch_inflation_data import CPI_PRODUCT_ID
+from observation_store import connect, query_series
+from parallel_csv import map_csv_ranges, read_range_lines
+
+
+class SeriesExtractor:
+    """
+    Collects data points for one category map during a shared scan.
+
+    Args:
+        name: Short name used in logs and in the engine's results
+        categories: StatCan product name -> display name
+        save: Function (category_data, output_path, years) that writes the output
+        output_path: Where the output is written
+    """
+
+    def __init__(self, name: str, categories: Dict[str, str], save: Callable, output_path: Path):
+        self.name = name
+        self.categories = categories
+        self.save = save
+        self.output_path = output_path
+        self.category_data = {}
+
+    def start(self):
+        self.category_data = {display_name: [] for display_name in self.categories.values()}
+
+    def finish(self, years: int):
+        return self.save(self.category_data, self.output_path, years)
+
+
+def build_product_index(extractors: List[SeriesExtractor]) -> Dict[str, list]:
+    """Map each product name to the (extractor data dict, display name) pairs that want it."""
+    index = {}
+    for extractor in extractors:
+        for product, display_name in extractor.categories.items():
+            index.setdefault(product, []).append((extractor.category_data, display_name))
+    return index
+
+
+def iter_matching_rows(lines, header: List[str], products):
+    """
+    Yield (product, ref_date, month ordinal, value) for Canada 2002=100 rows
+    of the given products, in file order.
+
+    Assumes one record per line (true of StatCan full-table CSVs), so lines
+    can be filtered on the GEO field before csv tokenizes them.
+    """
+    columns = {name: i for i, name in enumerate(header)}
+    geo_idx = columns['GEO']
+    product_idx = columns['Products and product groups']
+    uom_idx = columns['UOM']
+    date_idx = columns['REF_DATE']
+    value_idx = columns['VALUE']
+    # Shorter rows are blank or truncated lines
+    min_length = max(geo_idx, product_idx, uom_idx, date_idx, value_idx) + 1
+
+    # GEO is normally the second column, right after the fixed-width
+    # REF_DATE, so a line can be rejected by looking at a single slice
+    if geo_idx == 1:
+        quoted = f'"{CPI_GEO}",'
+        bare = f'{CPI_GEO},'
+
+        def canada_lines():
+            for line in lines:
+                start = line.find(',') + 1
+                if line.startswith(quoted, start) or line.startswith(bare, start):
+                    yield line
+        rows = (row for row in csv.reader(canada_lines()) if len(row) >= min_length)
+    else:
+        rows = (row for row in csv.reader(lines) if len(row) >= min_length and row[geo_idx] == CPI_GEO)
+
+    for row in rows:
+        if row[uom_idx] != CPI_UOM:
+            continue
+
+        product = row[product_idx]
+        if product not in products:
+            continue
+
+        ref_date = row[date_idx]
+        try:
+            ordinal = month_ordinal(ref_date)
+            value = float(row[value_idx])
+        except ValueError:
+            continue
+
+        yield product, ref_date, ordinal, value
+
+
+def dispatch_row(product_index: Dict[str, list], product: str, ref_date: str, ordinal: int, value: float):
+    """Append one parsed row to every extractor that wants its product."""
+    point = {
+        'date': ref_date,
+        'year': ordinal // 12,
+        'month': ordinal % 12 + 1,
+        'value': value
+    }
+    for category_data, display_name in product_index[product]:
+        category_data[display_name].append(point)
+
+
+def scan_cpi_csv_fast(csv_path: Path, product_index: Dict[str, list]):
+    """Fast variant of scan_cpi_csv with the same results (see iter_matching_rows)."""
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader([f.readline()]))
+        for row in iter_matching_rows(f, header, product_index):
+            dispatch_row(product_index, *row)
+
+
+def scan_cpi_range(csv_path: Path, header: List[str], start: int, end: int, products: frozenset) -> list:
+    """Worker for scan_cpi_csv_parallel: matching rows of one byte range."""
+    return list(iter_matching_rows(read_range_lines(csv_path, start, end), header, products))
+
+
+def scan_cpi_csv_parallel(csv_path: Path, product_index: Dict[str, list], workers: int = None):
+    """
+    Parallel variant of scan_cpi_csv_fast: byte ranges of the file are
+    filtered on a process pool and the matches dispatched in file order.
+    """
+    chunks = map_csv_ranges(csv_path, scan_cpi_range, frozenset(product_index), workers=workers)
+    for rows in chunks:
+        for row in rows:
+            dispatch_row(product_index, *row)
+
+
+def scan_cpi_csv(csv_path: Path, product_index: Dict[str, list]):
+    """Scan the CPI CSV once and append matching Canada 2002=100 points to every target."""
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            geo = row.get('GEO', '').strip('"')
+            uom = row.get('UOM', '').strip('"')
+
+            # Filter for Canada, 2002=100
+            if geo != CPI_GEO or uom != CPI_UOM:
+                continue
+
+            targets = product_index.get(row.get('Products and product groups', '').strip('"'))
+            if not targets:
+                continue
+
+            ref_date = row.get('REF_DATE', '').strip('"')
+            value_str = row.get('VALUE', '').strip('"')
+            try:
+                date_obj = datetime.strptime(ref_date, '%Y-%m')
+                value = float(value_str)
+            except (ValueError, KeyError):
+                continue
+
+            point = {
+                'date': ref_date,
+                'year': date_obj.year,
+                'month': date_obj.month,
+                'value': value
+            }
+            for category_data, display_name in targets:
+                category_data[display_name].append(point)
+
+
+def scan_cpi_store(csv_path: Path, product_index: Dict[str, list]):
+    """
+    Store-backed equivalent of scan_cpi_csv: one indexed query per product.
+    csv_path is not read; the rows come from the observation store.
+    """
+    conn = connect()
+    try:
+        for product, targets in product_index.items():
+            for ref_date, value in query_series(conn, CPI_PRODUCT_ID, product, geo=CPI_GEO, uom=CPI_UOM):
+                try:
+                    point = make_data_point(ref_date, value)
+                except ValueError:
+                    continue
+                for category_data, display_name in targets:
+                    category_data[display_name].append(point)
+    finally:
+        conn.close()
+
+
+# Row parsers selectable in run_extractors
+SCANNERS = {
+    "fast": scan_cpi_csv_fast,
+    "parallel": scan_cpi_csv_parallel,
+    "dict": scan_cpi_csv,
+    "cache": scan_cpi_cache,
+    "store": scan_cpi_store,
+}
+
+
+def run_extractors(csv_path: Path, extractors: List[SeriesExtractor], years: int = 10, parser: str = "fast") -> dict:
+    """
+    Scan the CPI CSV once and write every extractor's output.
+
+    Args:
+        csv_path: Path to the inflation_data.csv file
+        extractors: Extractors to feed from the shared scan
+        years: Number of years of data each output keeps
+        parser: "fast", "parallel", "dict", "cache" or "store" (see SCANNERS)
+
+    Returns:
+        Dictionary mapping extractor name -> its save function's return value
+    """
+    for extractor in extractors:
+        extractor.start()
+
+    print(f"Reading CSV from: {csv_path} ({len(extractors)} extractors)")
+    SCANNERS[parser](csv_path, build_product_index(extractors))
+
+    return {extractor.name: extractor.finish(years) for extractor in extractors}
@@ -0,0 +1,50 @@
+"""
+The CPI category tree, shared by the Python pipelines and the inflation icicle chart.
+
+src/data/cpi_hierarchy.json is the only definition. It maps each StatCan
+product name to its chart name and its children:
+
+    {"Food": {"display": "Food", "children": {"Food purchased from stores": {...}}}}
+
+Nodes with "chart": false are series fetched for all_subcategories.json
+that are not drawn in the drill-down tree. charts/inflationStoryCharts.js
+imports the same file.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict
+
+HIERARCHY_PATH = Path(__file__).parent / "data" / "cpi_hierarchy.json"
+
+
+def load_hierarchy(path: Path = HIERARCHY_PATH) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def product_tree(nodes: dict) -> dict:
+    """Drill-down tree in StatCan product names; {} marks a leaf."""
+    return {
+        name: product_tree(node.get("children", {}))
+        for name, node in nodes.items()
+        if node.get("chart", True)
+    }
+
+
+def display_names(nodes: dict) -> Dict[str, str]:
+    """StatCan name -> display name of every node, parents before their children."""
+    names = {}
+    for name, node in nodes.items():
+        names[name] = node["display"]
+        names.update(display_names(node.get("children", {})))
+    return names
+
+
+_nodes = load_hierarchy()
+
+# Drill-down tree of the icicle chart, in StatCan product names
+CPI_HIERARCHY = product_tree(_nodes)
+
+# Every series of all_subcategories.json: StatCan name -> display name
+ALL_CATEGORIES = display_names(_nodes)
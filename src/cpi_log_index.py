@@ -0,0 +1,174 @@
+"""
+Precomputed log-level index of every CPI series for constant-time range queries.
+
+All series from all_subcategories.json and inflation_multi_series.json are
+stored as one dense (months x series) matrix of natural-log index levels,
+keyed by StatCan product name, in data/cache/cpi_log_index.npz. The change
+between any two months is then a single subtraction per series:
+
+    percentage change = (exp(L[end] - L[start]) - 1) x 100
+
+and many (start, end) ranges are answered with one fancy-indexing step.
+The index is written by build_cpi_outputs.py after the series JSON files,
+and rebuilt by load_log_index whenever those files change.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from chain_contributions import load_statcan_series
+from cpi_cache import source_signature
+from cpi_series import month_ordinal, ordinal_to_date
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# Series files the index is built from
+SOURCE_FILES = ["inflation_multi_series.json", "all_subcategories.json"]
+
+
+def default_index_path(data_dir: Path) -> Path:
+    return data_dir / "cache" / "cpi_log_index.npz"
+
+
+def sources_signature(data_dir: Path) -> dict:
+    return {name: source_signature(data_dir / name) for name in SOURCE_FILES if (data_dir / name).exists()}
+
+
+class LogIndex:
+    """
+    Dense log-level matrix with range queries.
+
+    Args:
+        first: Month ordinal of row 0
+        names: StatCan product name of each column
+        log_levels: (months, series) natural logs of index values, NaN where missing
+    """
+
+    def __init__(self, first: int, names: List[str], log_levels: np.ndarray):
+        self.first = first
+        self.names = list(names)
+        self.columns = {name: i for i, name in enumerate(self.names)}
+        self.log_levels = log_levels
+
+    def __len__(self):
+        return len(self.log_levels)
+
+    @property
+    def date_range(self) -> Tuple[str, str]:
+        return ordinal_to_date(self.first), ordinal_to_date(self.first + len(self) - 1)
+
+    def positions(self, dates: Iterable[str]) -> np.ndarray:
+        """Row positions of 'YYYY-MM' dates (ValueError if outside the index)."""
+        positions = np.array([month_ordinal(date) - self.first for date in dates], dtype=np.int64)
+        if len(positions) and (positions.min() < 0 or positions.max() >= len(self)):
+            start, end = self.date_range
+            raise ValueError(f"Dates must be between {start} and {end}")
+        return positions
+
+    def column_indices(self, categories: Optional[Iterable[str]] = None) -> Tuple[List[str], np.ndarray]:
+        """(names, column indices) for the requested series, or all of them."""
+        if categories is None:
+            return self.names, np.arange(len(self.names))
+        categories = list(categories)
+        missing = [name for name in categories if name not in self.columns]
+        if missing:
+            raise KeyError(f"Unknown series: {', '.join(missing)}")
+        return categories, np.array([self.columns[name] for name in categories], dtype=np.int64)
+
+    def percentage_changes(self, periods: List[Tuple[str, str]], categories: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Percentage changes for many (start, end) ranges at once.
+
+        Returns:
+            (ranges, series) array in the order of `categories`, NaN where a month is missing
+        """
+        _, columns = self.column_indices(categories)
+        starts = self.positions(start for start, _ in periods)
+        ends = self.positions(end for _, end in periods)
+        log_change = self.log_levels[np.ix_(ends, columns)] - self.log_levels[np.ix_(starts, columns)]
+        return np.expm1(log_change) * 100
+
+    def percentage_change(self, start: str, end: str, categories: Optional[Iterable[str]] = None) -> Dict[str, Optional[float]]:
+        """Percentage change of each series between two months."""
+        names, _ = self.column_indices(categories)
+        changes = self.percentage_changes([(start, end)], names)[0]
+        return {name: None if np.isnan(change) else float(change) for name, change in zip(names, changes)}
+
+    def contributions_batch(self, periods: List[Tuple[str, str]], weights: Dict[str, float]) -> np.ndarray:
+        """Contributions (weight x percentage change) for many ranges; columns follow `weights`."""
+        return self.percentage_changes(periods, weights) * np.array(list(weights.values()))
+
+    def contributions(self, start: str, end: str, weights: Dict[str, float]) -> Dict[str, Optional[float]]:
+        """Contribution in percentage points of each weighted series between two months."""
+        values = self.contributions_batch([(start, end)], weights)[0]
+        return {name: None if np.isnan(value) else float(value) for name, value in zip(weights, values)}
+
+    def levels(self, name: str) -> np.ndarray:
+        """Index values of one series, one per month of the index."""
+        return np.exp(self.log_levels[:, self.columns[name]])
+
+
+def build_log_index(data_dir: Path = None, index_path: Path = None) -> LogIndex:
+    """Build the log-level matrix from the series JSON files and save it."""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / "data"
+    if index_path is None:
+        index_path = default_index_path(data_dir)
+
+    series = load_statcan_series(data_dir)
+    names = sorted(series)
+    ordinals = {name: [month_ordinal(point['date']) for point in series[name]] for name in names}
+    all_ordinals = [o for values in ordinals.values() for o in values]
+    first = min(all_ordinals) if all_ordinals else 0
+    months = max(all_ordinals) - first + 1 if all_ordinals else 0
+
+    log_levels = np.full((months, len(names)), np.nan)
+    for column, name in enumerate(names):
+        values = np.array([point['value'] for point in series[name]], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            logs = np.where(values > 0, np.log(values), np.nan)
+        log_levels[np.array(ordinals[name], dtype=np.int64) - first, column] = logs
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(".tmp.npz")
+    np.savez(
+        tmp_path,
+        version=np.array(INDEX_FORMAT_VERSION),
+        source=np.array(json.dumps(sources_signature(data_dir), sort_keys=True)),
+        first=np.array(first),
+        names=np.array(names),
+        log_levels=log_levels,
+    )
+    tmp_path.replace(index_path)
+
+    logger.info(f"✓ Saved log index of {len(names)} series x {months} months to {index_path}")
+    return LogIndex(first, names, log_levels)
+
+
+def load_log_index(data_dir: Path = None, index_path: Path = None) -> LogIndex:
+    """Load the persisted index, rebuilding it if missing or older than its sources."""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / "data"
+    if index_path is None:
+        index_path = default_index_path(data_dir)
+
+    if index_path.exists():
+        with np.load(index_path) as data:
+            current = json.dumps(sources_signature(data_dir), sort_keys=True)
+            if int(data['version']) == INDEX_FORMAT_VERSION and str(data['source']) == current:
+                return LogIndex(int(data['first']), data['names'].tolist(), data['log_levels'])
+
+    return build_log_index(data_dir, index_path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = build_log_index()
+    start, end = index.date_range
+    print(f"✓ {len(index.names)} series, {start} to {end}")
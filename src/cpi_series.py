@@ -0,0 +1,128 @@
+"""
+Selective CPI series fetch through the StatCan WDS vector endpoints.
+
+Instead of downloading the whole of table 18-10-0004-01 (every geography
+and every unit of measure), the requested products are resolved to cube
+coordinates for GEO=Canada, UOM=2002=100 and only those series are pulled,
+in batched getDataFromCubePidCoordAndLatestNPeriods requests.
+
+The result has the same shape as the category_data dictionaries built by the
+CSV extractors, so it feeds the existing series/data JSON outputs directly.
+"""
+
+from typing import Dict, List, Tuple
+import logging
+
+from statcan_client import StatCanClient, get_client, resolve_coordinates
+from fetch_inflation_data import CPI_PRODUCT_ID
+
+logger = logging.getLogger(__name__)
+
+# Filters applied by every CPI extractor
+CPI_GEO = "Canada"
+CPI_UOM = "2002=100"
+
+# Dimension names in table 18-10-0004-01
+GEO_DIMENSION = "Geography"
+PRODUCT_DIMENSION = "Products and product groups"
+
+
+def month_ordinal(ref_date: str) -> int:
+    """Parse 'YYYY-MM' into months since year 0 (year * 12 + month - 1)."""
+    if len(ref_date) != 7 or ref_date[4] != '-':
+        raise ValueError(f"Bad REF_DATE: {ref_date}")
+    month = int(ref_date[5:7])
+    if not 1 <= month <= 12:
+        raise ValueError(f"Bad REF_DATE: {ref_date}")
+    return int(ref_date[:4]) * 12 + month - 1
+
+
+def ordinal_to_date(ordinal: int) -> str:
+    """Inverse of month_ordinal: months since year 0 -> 'YYYY-MM'."""
+    return f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}"
+
+
+def make_data_point(ref_date: str, value: float) -> dict:
+    """Build one {'date', 'year', 'month', 'value'} point from a YYYY-MM date."""
+    return {
+        'date': ref_date,
+        'year': int(ref_date[:4]),
+        'month': int(ref_date[5:7]),
+        'value': value
+    }
+
+
+def periods_for_years(years: int) -> int:
+    """Number of monthly periods that covers the extractors' 'last N years' window."""
+    # The extractors keep every month from January of (latest year - years)
+    return (years + 1) * 12
+
+
+def fetch_cpi_series(
+    categories: List[Tuple[str, str]],
+    years: int = 10,
+    client: StatCanClient = None,
+) -> Dict[str, List[dict]]:
+    """
+    Fetch only the requested Canada 2002=100 CPI series.
+
+    Args:
+        categories: (StatCan product name, display name) pairs
+        years: Number of years of data needed (matches the extractors' years)
+        client: StatCan client (defaults to the shared pooled client)
+
+    Returns:
+        Dictionary mapping display name -> list of data points (unsorted)
+    """
+    if client is None:
+        client = get_client()
+
+    coordinates = resolve_cpi_coordinates(
+        {display_name: product for product, display_name in categories}, client
+    )
+
+    series_by_coord = client.get_data_by_coordinates(
+        CPI_PRODUCT_ID, coordinates.values(), latest_n=periods_for_years(years)
+    )
+
+    category_data = {display_name: [] for _, display_name in categories}
+    for display_name, coord in coordinates.items():
+        series = series_by_coord.get(coord)
+        if series is None:
+            continue
+        category_data[display_name] = vector_points_to_series(series.get('vectorDataPoint', []))
+
+    logger.info(f"Fetched {sum(len(v) for v in category_data.values())} data points for {len(coordinates)} series")
+    return category_data
+
+
+def resolve_cpi_coordinates(products: Dict[str, str], client: StatCanClient = None) -> Dict[str, str]:
+    """
+    Resolve Canada 2002=100 coordinates in table 18-10-0004-01.
+
+    Args:
+        products: key -> StatCan product name
+        client: StatCan client (defaults to the shared pooled client)
+
+    Returns:
+        Dictionary mapping key -> coordinate string
+    """
+    if client is None:
+        client = get_client()
+
+    metadata = client.get_cube_metadata([CPI_PRODUCT_ID])[CPI_PRODUCT_ID]
+    selections = {
+        key: {GEO_DIMENSION: CPI_GEO, PRODUCT_DIMENSION: product}
+        for key, product in products.items()
+    }
+    return resolve_coordinates(metadata, selections, uom=CPI_UOM, uom_names=client.get_uom_names())
+
+
+def vector_points_to_series(vector_points: List[dict]) -> List[dict]:
+    """Convert WDS vectorDataPoint entries (refPer 'YYYY-MM-01') into data points."""
+    data_points = []
+    for point in vector_points:
+        if point.get('value') is None:
+            continue
+        data_points.append(make_data_point(point['refPer'][:7], float(point['value'])))
+    return data_points
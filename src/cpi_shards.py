@@ -0,0 +1,138 @@
+"""
+Per-branch shards of all_subcategories.json for lazy drill-down loading.
+
+The series are split by top-level CPI category (Food, Shelter, ...):
+
+    all_subcategories/index.json    the top-level series, plus a listing
+                                    of every node: shard, date range and
+                                    latest value
+    all_subcategories/<slug>.json   every series below one top-level
+                                    category
+
+index.json and the shards are series documents in the layout of
+all_subcategories.json (columnar by default, see series_codec), so the
+same decoder reads them; the index adds "shard_version", "shards" and
+"nodes" keys. The icicle chart loads the index first and a shard when its
+branch is expanded.
+
+Shard an existing file:
+
+    python src/cpi_shards.py public/data/all_subcategories.json [--legacy]
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from cpi_hierarchy import ALL_CATEGORIES, CPI_HIERARCHY
+from series_codec import load_series_json, write_series_json
+
+SHARD_INDEX_VERSION = 1
+INDEX_NAME = "index.json"
+
+
+def shard_slug(display_name: str) -> str:
+    """File stem of a shard, e.g. 'Health & Care' -> 'health-care'."""
+    return re.sub(r'[^a-z0-9]+', '-', display_name.lower()).strip('-')
+
+
+def top_level_sections() -> Dict[str, str]:
+    """
+    Display name -> display name of its top-level category.
+
+    Series not drawn in CPI_HIERARCHY ("chart": false in cpi_hierarchy) are
+    placed in the section of ALL_CATEGORIES they are listed under.
+    """
+    def walk(tree):
+        for name, subtree in tree.items():
+            yield name
+            yield from walk(subtree)
+
+    section_of = {}
+    for top, subtree in CPI_HIERARCHY.items():
+        for product in [top, *walk(subtree)]:
+            section_of[product] = top
+
+    sections = {}
+    current = None
+    for product, display_name in ALL_CATEGORIES.items():
+        current = section_of.get(product, current)
+        if current is not None:
+            sections[display_name] = ALL_CATEGORIES[current]
+    return sections
+
+
+def shard_dir_for(output_path: Path) -> Path:
+    """Shard directory written next to a series file: all_subcategories.json -> all_subcategories/."""
+    return output_path.with_suffix("")
+
+
+def write_series_shards(series_json: dict, shard_dir: Path, columnar: bool = True) -> List[Path]:
+    """
+    Write index.json and one shard per top-level category of a legacy series document.
+
+    Returns:
+        Paths written (index first)
+    """
+    sections = top_level_sections()
+    top_levels = [ALL_CATEGORIES[product] for product in CPI_HIERARCHY]
+
+    top_series = []
+    shards = {name: [] for name in top_levels}
+    nodes = []
+    for series in series_json['series']:
+        category = series['category']
+        section = sections.get(category)
+        if section is None or not series['data']:
+            continue
+
+        is_top = category == section
+        (top_series if is_top else shards[section]).append(series)
+        nodes.append({
+            "category": category,
+            "shard": None if is_top else shard_slug(section),
+            "start": series['data'][0]['date'],
+            "end": series['data'][-1]['date'],
+            "latest": series['data'][-1]['value'],
+        })
+
+    def document(series):
+        return {
+            'series': series,
+            'date_range': series_json['date_range'],
+            'category_count': len(series),
+        }
+
+    index = document(top_series)
+    index.update({
+        # Not "version": that key belongs to the columnar encoding (series_codec)
+        "shard_version": SHARD_INDEX_VERSION,
+        "shards": [
+            {"name": name, "slug": shard_slug(name), "file": f"{shard_slug(name)}.json", "count": len(shards[name])}
+            for name in top_levels if shards[name]
+        ],
+        "nodes": nodes,
+    })
+
+    written = [shard_dir / INDEX_NAME]
+    write_series_json(index, written[0], columnar)
+    for name in top_levels:
+        if shards[name]:
+            path = shard_dir / f"{shard_slug(name)}.json"
+            write_series_json(document(shards[name]), path, columnar)
+            written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 1:
+        print("Usage: python src/cpi_shards.py all_subcategories.json [--legacy]")
+        exit(1)
+
+    series_path = Path(args[0])
+    paths = write_series_shards(load_series_json(series_path), shard_dir_for(series_path),
+                                columnar="--legacy" not in sys.argv)
+    for path in paths:
+        print(f"✓ {path} ({path.stat().st_size:,} bytes)")
@@ -0,0 +1,183 @@
+"""
+Incremental monthly refresh of the CPI series behind the inflation charts.
+
+Every tracked series (the union of CATEGORIES, FOOD_CATEGORIES and
+ALL_CATEGORIES) is kept in a local store, data/cpi_store.json, keyed by
+StatCan product name. A monthly refresh only asks StatCan for the latest
+few periods of each series by vector ID, merges them into the store
+(overwriting revised months), and regenerates inflation_multi_series.json,
+food_subcategories.json and all_subcategories.json from the store.
+
+Series that are not in the store yet are seeded once with their full
+recent history. Series that cannot be resolved in the cube are marked
+"unresolved" and not retried until a forced refresh.
+"""
+
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from statcan_client import StatCanClient, get_client
+from cpi_series import make_data_point, periods_for_years, resolve_cpi_coordinates, vector_points_to_series
+from fetch_inflation_data import CPI_PRODUCT_ID
+from process_multi_series_inflation import CATEGORIES, save_multi_series
+from fetch_food_subcategories import FOOD_CATEGORIES, save_food_subcategories
+from fetch_all_subcategories import ALL_CATEGORIES, save_all_subcategories
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Periods re-fetched on every refresh: the new month plus recent revisions
+DEFAULT_LATEST_N = 6
+
+# History pulled the first time a series is added to the store
+SEED_YEARS = 25
+
+
+def tracked_products() -> List[str]:
+    """Every StatCan product name used by one of the CPI outputs."""
+    products = [name for name, _ in CATEGORIES]
+    products += [name for name, _ in FOOD_CATEGORIES]
+    products += list(ALL_CATEGORIES)
+    return list(dict.fromkeys(products))
+
+
+def default_store_path() -> Path:
+    return Path(__file__).parent.parent / "data" / "cpi_store.json"
+
+
+def load_store(store_path: Path) -> dict:
+    """Load the store (empty if it does not exist yet)."""
+    if not store_path.exists():
+        return {"series": {}}
+    with open(store_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_store(store: dict, store_path: Path):
+    store["updated_at"] = datetime.now().isoformat(timespec='seconds')
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = store_path.with_suffix(".json.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(store, f, indent=1, sort_keys=True)
+    tmp_path.replace(store_path)
+
+
+def merge_points(entry: dict, vector_points: List[dict]) -> int:
+    """
+    Merge WDS data points into a store entry, overwriting revised months.
+
+    Returns:
+        Number of months that were added or changed
+    """
+    data = entry.setdefault("data", {})
+    changed = 0
+    for point in vector_points_to_series(vector_points):
+        if data.get(point['date']) != point['value']:
+            data[point['date']] = point['value']
+            changed += 1
+    return changed
+
+
+def refresh_store(
+    store_path: Path = None,
+    latest_n: int = DEFAULT_LATEST_N,
+    client: StatCanClient = None,
+    force: bool = False,
+) -> dict:
+    """
+    Fetch the latest N periods of every tracked series and merge them into the store.
+
+    Args:
+        store_path: Path to the store JSON (defaults to data/cpi_store.json)
+        latest_n: Number of most recent periods to re-fetch for known series
+        client: StatCan client (defaults to the shared pooled client)
+        force: Retry series previously marked unresolved
+
+    Returns:
+        The updated store
+    """
+    if store_path is None:
+        store_path = default_store_path()
+    if client is None:
+        client = get_client()
+
+    store = load_store(store_path)
+    series = store.setdefault("series", {})
+
+    # Seed series we have never fetched: resolve coordinates, pull full recent history
+    new_products = [
+        p for p in tracked_products()
+        if "vector_id" not in series.get(p, {}) and (force or not series.get(p, {}).get("unresolved"))
+    ]
+    if new_products:
+        logger.info(f"Seeding {len(new_products)} new series with {SEED_YEARS} years of history...")
+        coordinates = resolve_cpi_coordinates({p: p for p in new_products}, client)
+        fetched = client.get_data_by_coordinates(
+            CPI_PRODUCT_ID, coordinates.values(), latest_n=periods_for_years(SEED_YEARS)
+        )
+        for product in new_products:
+            coord = coordinates.get(product)
+            if coord is None:
+                logger.warning(f"Could not resolve CPI series {product}; skipping it until a forced refresh")
+                series.setdefault(product, {})["unresolved"] = True
+                continue
+            result = fetched.get(coord)
+            if result is None:
+                # Possibly a transient per-series error: retried on the next refresh
+                logger.warning(f"No data returned for CPI series {product} ({coord}); will retry")
+                continue
+            entry = series.setdefault(product, {})
+            entry.pop("unresolved", None)
+            entry["coordinate"] = coord
+            entry["vector_id"] = result["vectorId"]
+            merge_points(entry, result.get("vectorDataPoint", []))
+
+    # Known series: only the latest periods, by vector ID
+    known = {entry["vector_id"]: product for product, entry in series.items()
+             if "vector_id" in entry and product not in new_products}
+    if known:
+        logger.info(f"Fetching latest {latest_n} periods for {len(known)} series...")
+        fetched = client.get_data_by_vectors(known.keys(), latest_n=latest_n)
+        changed = 0
+        for vector_id, result in fetched.items():
+            changed += merge_points(series[known[vector_id]], result.get("vectorDataPoint", []))
+        logger.info(f"{changed} observations added or revised")
+
+    save_store(store, store_path)
+    logger.info(f"✓ Saved CPI store to {store_path}")
+    return store
+
+
+def store_category_data(store: dict, categories: Dict[str, str]) -> Dict[str, List[dict]]:
+    """Build an extractor-style category_data dict (display name -> points) from the store."""
+    category_data = {}
+    for product, display_name in categories.items():
+        data = store["series"].get(product, {}).get("data", {})
+        category_data[display_name] = [make_data_point(date, value) for date, value in sorted(data.items())]
+    return category_data
+
+
+def regenerate_outputs(store: dict, output_dir: Path = None, years: int = 10):
+    """Rewrite the three CPI series JSON files from the store."""
+    if output_dir is None:
+        output_dir = Path(__file__).parent.parent / "data"
+
+    save_multi_series(store_category_data(store, dict(CATEGORIES)),
+                      output_dir / "inflation_multi_series.json", years)
+    save_food_subcategories(store_category_data(store, dict(FOOD_CATEGORIES)),
+                            output_dir / "food_subcategories.json", years)
+    save_all_subcategories(store_category_data(store, ALL_CATEGORIES),
+                           output_dir / "all_subcategories.json", years)
+
+
+if __name__ == "__main__":
+    try:
+        store = refresh_store(force="--force" in sys.argv)
+        regenerate_outputs(store)
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        exit(1)
@@ -0,0 +1,33 @@
+// Loads chart data through data/manifest.json (see src/publish_data.py)
+// The manifest maps logical names such as "all_subcategories" to
+// content-hashed files that can be cached forever. Without a manifest
+// (e.g. on the dev server before publishing) data/<name>.json is used.
+
+let manifestPromise = null;
+
+function loadManifest() {
+  if (!manifestPromise) {
+    manifestPromise = fetch(import.meta.env.BASE_URL + "data/manifest.json", { cache: "no-cache" })
+      .then(response => (response.ok ? response.json() : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
+export function dataUrl(name, suffix = ".json") {
+  return loadManifest().then(manifest => {
+    const entry = manifest && manifest.artifacts && manifest.artifacts[name];
+    return import.meta.env.BASE_URL + "data/" + (entry ? entry.url : name + suffix);
+  });
+}
+
+export function loadDataJson(name) {
+  return dataUrl(name).then(url =>
+    fetch(url).then(response => {
+      if (!response.ok) {
+        throw new Error(`${response.status} ${response.statusText} loading ${url}`);
+      }
+      return response.json();
+    })
+  );
+}
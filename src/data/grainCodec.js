@@ -0,0 +1,107 @@
+// Decoders for the compact grain JSON files (see src/grain_codec.py)
+// Both return the legacy layout the grain charts use; legacy files are
+// returned unchanged.
+
+const DICTIONARY_FORMAT = "dictionary";
+const WATERFALL_FORMAT = "waterfall";
+const CODEC_VERSION = 1;
+
+function checkVersion(json) {
+  if (json.version !== CODEC_VERSION) {
+    throw new Error(`Unsupported ${json.format} version: ${json.version}`);
+  }
+}
+
+// grain_crop_components.json: string tables + columns, effective yield derived
+export function decodeCropComponents(json) {
+  if (!json || json.format !== DICTIONARY_FORMAT) {
+    return json;
+  }
+  checkVersion(json);
+
+  const { crops, measures, columns, derived } = json;
+  const data = [];
+  let numerator = null;
+  for (let i = 0; i < columns.year.length; i++) {
+    const record = {
+      year: columns.year[i],
+      crop: crops[columns.crop[i]],
+      measure: measures[columns.measure[i]],
+      value: columns.value[i]
+    };
+    data.push(record);
+    if (!derived) continue;
+
+    if (record.measure === derived.numerator) {
+      numerator = record;
+    } else if (record.measure === derived.denominator) {
+      if (numerator && numerator.year === record.year && numerator.crop === record.crop) {
+        data.push({
+          year: record.year,
+          crop: record.crop,
+          measure: derived.measure,
+          value: numerator.value / record.value
+        });
+      }
+      numerator = null;
+    }
+  }
+
+  const present = new Set(data.map(d => d.crop));
+  const { format, version, crops: _crops, measures: _measures, columns: _columns, derived: _derived, ...rest } = json;
+  return { crops: crops.filter(crop => present.has(crop)), data, ...rest };
+}
+
+// grain_decomposition.json: yearly component values, waterfall rebuilt here
+export function decodeDecomposition(json) {
+  if (!json || json.format !== WATERFALL_FORMAT) {
+    return json;
+  }
+  checkVersion(json);
+
+  const { components, years, values, barOffset } = json;
+  const positions = components.length === 3 ? [-barOffset, 0, barOffset] : components.map(() => 0);
+
+  const cumulativeData = [];
+  const connectingSegments = [];
+  const componentConnectors = [];
+  let cumulative = 0;
+  years.forEach((year, i) => {
+    const ends = [];
+    components.forEach((component, c) => {
+      const start = cumulative;
+      cumulative = start + values[c][i];
+      ends.push(cumulative);
+      cumulativeData.push({
+        year,
+        component,
+        value: values[c][i],
+        cumulativeStart: start,
+        cumulativeEnd: cumulative,
+        xPosition: year + positions[c]
+      });
+    });
+
+    if (i < years.length - 1) {
+      connectingSegments.push({ year, yearEnd: years[i + 1], yValue: cumulative });
+    }
+
+    for (let c = 0; c < components.length - 1; c++) {
+      componentConnectors.push({
+        year,
+        xStart: year + positions[c],
+        xEnd: year + positions[c + 1],
+        yValue: ends[c]
+      });
+    }
+  });
+
+  const { format, version, components: _components, barOffset: _barOffset, years: _years, values: _values, ...rest } = json;
+  return {
+    cumulativeData,
+    connectingSegments,
+    componentConnectors,
+    ...rest,
+    uniqueYears: Array.from(new Set(years)).sort((a, b) => a - b)
+  };
+}
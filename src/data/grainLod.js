@@ -0,0 +1,40 @@
+// Level-of-detail selection for the grain charts (see src/grain_lod.py)
+// data/grain_lod/index.json lists the full, decimated and decade levels of
+// each grain series with the number of years each plots. A chart passes
+// its plot width in pixels and the spacing one year needs; the finest
+// level that fits is loaded. Without the index the full file is used.
+
+import { loadDataJson } from "./artifacts.js";
+
+let indexPromise = null;
+
+function loadLodIndex() {
+  if (!indexPromise) {
+    indexPromise = loadDataJson("grain_lod/index").catch(() => null);
+  }
+  return indexPromise;
+}
+
+export function pickLevel(levels, pixels, pixelsPerPoint) {
+  const fits = levels.find(level => level.points * pixelsPerPoint <= pixels);
+  return fits || levels[levels.length - 1];
+}
+
+export function loadGrainLod(name, pixels, pixelsPerPoint) {
+  return loadLodIndex().then(index => {
+    const levels = index && index.series && index.series[name];
+    return loadDataJson(levels ? pickLevel(levels, pixels, pixelsPerPoint).name : name);
+  });
+}
+
+// Label of a plotted year: the years it covers on aggregated levels. Every
+// series plots a decade at its middle year and a decimated run at its last
+// year (src/grain_lod.py), so a year may be labelled by a period that does
+// not end there; look it up by the plotted year only.
+export function periodLabeller(json) {
+  const labels = new Map();
+  (json.periods || []).forEach(([year, start, end]) => {
+    labels.set(year, start === end ? String(start) : `${start}–${end}`);
+  });
+  return year => labels.get(year) || String(year);
+}
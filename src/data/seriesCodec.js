@@ -0,0 +1,57 @@
+// Decoder for the CPI series JSON files (see src/series_codec.py)
+// Turns the columnar layout back into the legacy layout the charts use:
+// { series: [{ category, data: [{ date, year, month, value }] }], date_range, category_count }
+// Legacy files are returned unchanged.
+
+const COLUMNAR_FORMAT = "columnar";
+const COLUMNAR_VERSION = 1;
+
+function monthOrdinal(date) {
+  const [year, month] = date.split("-").map(Number);
+  return year * 12 + month - 1;
+}
+
+function dataPoint(ordinal, value) {
+  const year = Math.floor(ordinal / 12);
+  const month = ordinal % 12 + 1;
+  return {
+    date: `${String(year).padStart(4, "0")}-${String(month).padStart(2, "0")}`,
+    year,
+    month,
+    value
+  };
+}
+
+export function decodeSeries(json) {
+  if (!json || json.format !== COLUMNAR_FORMAT) {
+    return json;
+  }
+  if (json.version !== COLUMNAR_VERSION) {
+    throw new Error(`Unsupported columnar series version: ${json.version}`);
+  }
+
+  const first = monthOrdinal(json.months.start);
+  const scale = json.scale;
+
+  const series = json.series.map(entry => {
+    const start = first + entry.offset;
+    const data = [];
+    if (entry.deltas) {
+      let total = 0;
+      entry.deltas.forEach((delta, i) => {
+        total += delta;
+        data.push(dataPoint(start + i, total / scale));
+      });
+    } else {
+      entry.values.forEach((value, i) => {
+        if (value !== null) {
+          data.push(dataPoint(start + i, value));
+        }
+      });
+    }
+    return { category: entry.category, data };
+  });
+
+  const { format, version, months, scale: _scale, series: _series, ...rest } = json;
+  return { series, ...rest };
+}
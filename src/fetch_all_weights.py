@@ -5,47 +5,21 @@ Table 18-10-0007-01: Consumer Price Index basket weights, Canada
 This script fetches weights for ALL categories and subcategories.
 """
 
-import requests
-import zipfile
 import io
 import csv
 from pathlib import Path
 import json
 import logging
 
+from statcan_client import check_for_update, fetch_table_csv, record_download
+from observation_store import store_table_content
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-STATCAN_BASE_URL = "https://www150.statcan.gc.ca/t1/wds/rest"
 BASKET_WEIGHTS_TABLE = "18100007"
 
 
-def fetch_statcan_table(table_id: str) -> str:
-    """Fetch CSV data from Statistics Canada."""
-    url = f"{STATCAN_BASE_URL}/getFullTableDownloadCSV/{table_id}/en"
-    
-    logger.info(f"Fetching table {table_id} from Statistics Canada...")
-    
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    result = response.json()
-    
-    download_url = result.get('object')
-    logger.info(f"Downloading from: {download_url}")
-    
-    zip_response = requests.get(download_url, timeout=120)
-    zip_response.raise_for_status()
-    
-    with zipfile.ZipFile(io.BytesIO(zip_response.content)) as z:
-        csv_files = [f for f in z.namelist() if f.endswith('.csv') and not f.endswith('_MetaData.csv')]
-        if not csv_files:
-            raise ValueError("No CSV file found")
-        
-        with z.open(csv_files[0]) as f:
-            # Use utf-8-sig to handle BOM
-            return f.read().decode('utf-8-sig')
-
-
 def parse_all_weights(csv_content: str) -> dict:
     """Parse all weights from the CSV and build a comprehensive hierarchy."""
     
@@ -289,14 +263,46 @@ def save_weights(data: dict, output_path: Path, latest_year: str):
     return output
 
 
-def main():
-    project_root = Path(__file__).parent.parent
-    output_path = project_root / "data" / "basket_weights.json"
+def save_weight_vintages(weights_by_year: dict, output_path: Path):
+    """Save the flat weights of every basket vintage (used for chain-linking)."""
+    output = {
+        "source": "Statistics Canada Table 18-10-0007-01",
+        "price_period": "Weight at link month prices",
+        "weights_pct_by_year": {year: weights_by_year[year] for year in sorted(weights_by_year)}
+    }
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(output, f, indent=2)
+    
+    logger.info(f"Saved {len(weights_by_year)} basket vintages to {output_path}")
+    return output
+
+
+def weights_output_paths():
+    """Latest-year hierarchy and per-year vintages written by process_weights()."""
+    data_dir = Path(__file__).parent.parent / "data"
+    return data_dir / "basket_weights.json", data_dir / "basket_weights_by_year.json"
+
+
+def download_weights(force: bool = False):
+    """
+    Download the basket weights table unless StatCan has not republished it.
+
+    Returns:
+        (csv_content, release_time), or None when the table is unchanged
+    """
+    needs_download, release_time = check_for_update(BASKET_WEIGHTS_TABLE, list(weights_output_paths()), force=force)
+    if not needs_download:
+        return None
+    return fetch_table_csv(BASKET_WEIGHTS_TABLE), release_time
+
+
+def process_weights(csv_content: str, release_time=None):
+    """Parse a downloaded weights table, save the JSON outputs and store it."""
+    output_path, vintages_path = weights_output_paths()
     
     try:
-        # Fetch the data
-        csv_content = fetch_statcan_table(BASKET_WEIGHTS_TABLE)
-        
         # Parse all weights by year
         weights_by_year = parse_all_weights(csv_content)
         
@@ -311,6 +317,9 @@ def main():
         
         # Save
         output = save_weights(hierarchy, output_path, latest_year)
+        save_weight_vintages(weights_by_year, vintages_path)
+        store_table_content(BASKET_WEIGHTS_TABLE, csv_content, release_time)
+        record_download(BASKET_WEIGHTS_TABLE, release_time)
         
         print("\n" + "="*70)
         print(f"CPI BASKET WEIGHTS - {latest_year}")
@@ -380,5 +389,11 @@ def main():
         raise
 
 
+def main(force: bool = False):
+    download = download_weights(force=force)
+    if download is not None:
+        process_weights(*download)
+
+
 if __name__ == "__main__":
     main()
@@ -3,81 +3,24 @@ Script to fetch CPI basket weights from Statistics Canada.
 Statistics Canada provides basket weights at reference period prices and link month prices.
 """
 
-import requests
-import zipfile
 import io
 import csv
 from pathlib import Path
 import logging
 import json
 
+from statcan_client import fetch_table_csv
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Statistics Canada API base URL
-STATCAN_BASE_URL = "https://www150.statcan.gc.ca/t1/wds/rest"
-
 # CPI Basket Weights product ID - need to verify this is correct
 # Common product IDs for basket weights might be different
 # This may need to be updated based on actual StatCan API documentation
 BASKET_WEIGHTS_PRODUCT_ID = "18100005"  # This is a placeholder - may need adjustment
 
 
-def fetch_statcan_data(product_id: str, language: str = "en") -> str:
-    """
-    Fetch data from Statistics Canada API using getFullTableDownloadCSV.
-    Returns the CSV content as a string.
-    """
-    url = f"{STATCAN_BASE_URL}/getFullTableDownloadCSV/{product_id}/{language}"
-    
-    logger.info(f"Fetching StatCan data from: {url}")
-    
-    try:
-        # Step 1: Get the CSV download URL
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        result = response.json()
-        
-        # Extract download URL
-        if not isinstance(result, dict) or 'object' not in result:
-            raise ValueError(f"Unexpected API response format: {result}")
-        
-        download_url = result.get('object')
-        logger.info(f"Download URL: {download_url}")
-        
-        # Step 2: Download the ZIP file
-        logger.info("Downloading ZIP file...")
-        zip_response = requests.get(download_url, timeout=60)
-        zip_response.raise_for_status()
-        
-        # Step 3: Extract CSV from ZIP
-        logger.info("Extracting CSV from ZIP...")
-        with zipfile.ZipFile(io.BytesIO(zip_response.content)) as z:
-            # Find CSV file (should be {PID}.csv, exclude metadata files)
-            csv_files = [f for f in z.namelist() if f.endswith('.csv') and not f.endswith('_MetaData.csv')]
-            
-            if not csv_files:
-                raise ValueError("No CSV file found in ZIP archive")
-            
-            csv_file = csv_files[0]
-            logger.info(f"Reading CSV file: {csv_file}")
-            
-            # Read CSV content
-            with z.open(csv_file) as f:
-                csv_content = f.read().decode('utf-8')
-        
-        logger.info(f"Successfully extracted {len(csv_content)} characters of CSV data")
-        return csv_content
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching StatCan data: {e}")
-        raise
-    except Exception as e:
-        logger.error(f"Error processing StatCan data: {e}")
-        raise
-
-
 def extract_basket_weights_from_csv(csv_content: str, output_path: Path = None):
     """
     Extract basket weights from CSV content and save as JSON.
@@ -164,7 +107,7 @@ def save_basket_weights(output_dir: Path = None, product_id: str = None):
     
     try:
         # Fetch the data
-        csv_content = fetch_statcan_data(product_id, language="en")
+        csv_content = fetch_table_csv(product_id, language="en")
         
         # Extract and save weights
         output_file = output_dir / "basket_weights.json"
@@ -3,11 +3,13 @@ Script to fetch Food subcategory CPI data from Statistics Canada.
 Extracts Food and all Food subcategories for contribution analysis.
 """
 
-import csv
+import sys
 from pathlib import Path
-from datetime import datetime
 import json
 
+from cpi_series import fetch_cpi_series
+from cpi_extract import SeriesExtractor, run_extractors
+
 # Food subcategories to extract
 # Note: We use only leaf categories to avoid double-counting
 # "Food from Restaurants" is a parent of the other restaurant categories
@@ -29,43 +31,34 @@ def process_food_subcategory_data(csv_path: Path, output_path: Path = None, year
         output_path: Path to save the processed JSON file
         years: Number of years of data to extract (default 10)
     """
+    results = run_extractors(csv_path, [food_subcategory_extractor(output_path)], years)
+    return results["food_subcategories"]
+
+
+def food_subcategory_extractor(output_path: Path = None) -> SeriesExtractor:
+    """Extractor for the shared CPI scan (see cpi_extract.run_extractors)."""
     if output_path is None:
         project_root = Path(__file__).parent.parent
         output_path = project_root / "data" / "food_subcategories.json"
     
-    # Dictionary to store data for each category
-    category_data = {display_name: [] for _, display_name in FOOD_CATEGORIES}
-    
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            geo = row.get('GEO', '').strip('"')
-            product = row.get('Products and product groups', '').strip('"')
-            uom = row.get('UOM', '').strip('"')
-            
-            # Filter for Canada, 2002=100
-            if geo == 'Canada' and uom == '2002=100':
-                # Check if this product matches any of our Food categories
-                for category_name, display_name in FOOD_CATEGORIES:
-                    if product == category_name:
-                        # Parse date
-                        ref_date = row.get('REF_DATE', '').strip('"')
-                        value_str = row.get('VALUE', '').strip('"')
-                        try:
-                            date_obj = datetime.strptime(ref_date, '%Y-%m')
-                            value = float(value_str)
-                            
-                            category_data[display_name].append({
-                                'date': ref_date,
-                                'year': date_obj.year,
-                                'month': date_obj.month,
-                                'value': value
-                            })
-                        except (ValueError, KeyError):
-                            continue
-                        break  # Found match, move to next row
+    return SeriesExtractor("food_subcategories", dict(FOOD_CATEGORIES), save_food_subcategories, output_path)
+
+
+def fetch_food_subcategory_data(output_path: Path = None, years: int = 10):
+    """
+    Fetch only the FOOD_CATEGORIES series from the StatCan vector endpoints
+    (no full-table download) and save them like process_food_subcategory_data.
+    """
+    if output_path is None:
+        project_root = Path(__file__).parent.parent
+        output_path = project_root / "data" / "food_subcategories.json"
     
+    category_data = fetch_cpi_series(FOOD_CATEGORIES, years)
+    return save_food_subcategories(category_data, output_path, years)
+
+
+def save_food_subcategories(category_data: dict, output_path: Path, years: int):
+    """Keep the last N years of each Food category and save the series JSON."""
     # Process each category
     series_data = []
     
@@ -120,5 +113,8 @@ if __name__ == "__main__":
     csv_path = project_root / "data" / "inflation_data.csv"
     output_path = project_root / "data" / "food_subcategories.json"
     
-    process_food_subcategory_data(csv_path, output_path, years=10)
+    if "--vectors" in sys.argv:
+        fetch_food_subcategory_data(output_path, years=10)
+    else:
+        process_food_subcategory_data(csv_path, output_path, years=10)
 
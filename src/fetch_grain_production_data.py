@@ -3,23 +3,56 @@ Script to fetch grain production data from Statistics Canada API.
 Table 32-10-0359: Estimated areas, yield and production of principal field crops
 """
 
-import requests
-import zipfile
 import io
 import csv
 import json
-import math
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 import logging
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from statcan_client import check_for_update, download_table, record_download
+from observation_store import MEMBER_SEPARATOR, connect, get_member_columns, query_table, store_table_file
+from parallel_csv import default_workers, map_csv_ranges, read_range_lines
+from grain_codec import load_grain_json, write_grain_json
+from grain_lod import write_grain_lod
+from grain_decomposition import (
+    DECOMPOSITION_KEYS, CropPanel, annual_aggregates, decompose_groups, decomposition_records,
+    default_panel_path, group_decomposition_records
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-STATCAN_BASE_URL = "https://www150.statcan.gc.ca/t1/wds/rest"
 GRAIN_PRODUCTION_TABLE = "32100359"
 
+# Files written by process_grain_data (into public/data/)
+GRAIN_OUTPUT_FILES = [
+    "crop_groupings.json",
+    "grain_statistics.json",
+    "grain_production_by_year.json",
+    "grain_area_by_year.json",
+    "grain_crop_components.json",
+    "grain_decomposition.json",
+    "grain_group_decomposition.json",
+]
+
+# Geography whose figures make up the national files above
+NATIONAL_GEO = "Canada"
+
+# Per-GEO outputs: public/data/grain_provinces/<geo>/ plus manifest.json
+PROVINCIAL_OUTPUT_DIR = "grain_provinces"
+GEO_OUTPUT_FILES = GRAIN_OUTPUT_FILES[1:]
+
+# Layout of the per-GEO state saved for update_grain_outputs
+GRAIN_STATE_VERSION = 1
+
 # Crop groupings structure (from YAML)
 CROP_GROUPINGS = {
     "crop_groupings": {
@@ -39,31 +72,6 @@ CROP_GROUPINGS = {
 }
 
 
-def fetch_statcan_table(table_id: str) -> str:
-    """Fetch CSV data from Statistics Canada."""
-    url = f"{STATCAN_BASE_URL}/getFullTableDownloadCSV/{table_id}/en"
-    
-    logger.info(f"Fetching table {table_id} from Statistics Canada...")
-    
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    result = response.json()
-    
-    download_url = result.get('object')
-    logger.info(f"Downloading from: {download_url}")
-    
-    zip_response = requests.get(download_url, timeout=120)
-    zip_response.raise_for_status()
-    
-    with zipfile.ZipFile(io.BytesIO(zip_response.content)) as z:
-        csv_files = [f for f in z.namelist() if f.endswith('.csv') and not f.endswith('_MetaData.csv')]
-        if not csv_files:
-            raise ValueError("No CSV file found")
-        
-        with z.open(csv_files[0]) as f:
-            return f.read().decode('utf-8-sig')
-
-
 def find_column_name(reader, possible_names):
     """Find the actual column name from a list of possible names (case-insensitive)."""
     if not reader.fieldnames:
@@ -78,25 +86,56 @@ def find_column_name(reader, possible_names):
     return None
 
 
-def process_grain_data(csv_content: str, output_dir: Path):
-    """Process grain production data and generate JSON files."""
-    
-    # Extract all crop names from groupings
+def grouped_crops() -> list:
+    """All crop names listed in CROP_GROUPINGS."""
     all_crops = []
     for group in CROP_GROUPINGS["crop_groupings"].values():
         all_crops.extend(group["crops"])
+    return all_crops
+
+
+def empty_grain_data():
+    """(production_data, area_data) sums: crop -> year -> value."""
+    return defaultdict(lambda: defaultdict(float)), defaultdict(lambda: defaultdict(float))
+
+
+def plain_grain_data(production_data, area_data):
+    """Copy of grain sums as plain dicts, so they can be pickled to and from a process pool."""
+    return (
+        {crop: dict(years) for crop, years in production_data.items()},
+        {crop: dict(years) for crop, years in area_data.items()},
+    )
+
+
+def add_grain_observation(production_data, area_data, all_crops, crop, disposition, ref_date, value_str):
+    """Add one table row to the crop -> year production/area sums if it is a row we use."""
+    # Filter for major crops
+    if crop not in all_crops:
+        return
     
-    logger.info(f"Processing data for {len(all_crops)} crops")
-    
-    # Save crop groupings JSON
-    groupings_path = output_dir / "crop_groupings.json"
-    with open(groupings_path, 'w', encoding='utf-8') as f:
-        json.dump(CROP_GROUPINGS, f, indent=2)
-    logger.info(f"Saved crop groupings to {groupings_path}")
-    
-    # Parse CSV and identify column names
-    reader = csv.DictReader(io.StringIO(csv_content))
+    if disposition not in ['Production (metric tonnes)', 'Seeded area (hectares)']:
+        return
     
+    try:
+        # Parse year from REF_DATE (could be YYYY or YYYY-MM format)
+        if '-' in ref_date:
+            year = int(ref_date.split('-')[0])
+        else:
+            year = int(ref_date)
+        
+        value = float(value_str)
+        
+        if disposition == 'Production (metric tonnes)':
+            production_data[crop][year] += value
+        elif disposition == 'Seeded area (hectares)':
+            area_data[crop][year] += value
+            
+    except (ValueError, KeyError) as e:
+        logger.debug(f"Skipping row: {e}")
+
+
+def find_grain_columns(reader):
+    """Resolve the GEO, crop, disposition, date and value column names of the table."""
     # Find column names (try common variations)
     geo_col = find_column_name(reader, ['GEO', 'Geography', 'geo'])
     crop_col = find_column_name(reader, ['Type_of_crop', 'Type of crop', 'TYPE_OF_CROP', 'Crop', 'crop'])
@@ -108,80 +147,275 @@ def process_grain_data(csv_content: str, output_dir: Path):
         logger.error(f"Missing required columns. Found: {reader.fieldnames}")
         raise ValueError("Could not identify all required columns")
     
-    logger.info(f"Using columns: GEO={geo_col}, Crop={crop_col}, Disposition={disposition_col}, Date={ref_date_col}, Value={value_col}")
+    return geo_col, crop_col, disposition_col, ref_date_col, value_col
+
+
+def accumulate_grain_rows(reader, columns, grain_by_geo: dict, geos=None):
+    """
+    Add every usable row of a DictReader to per-GEO crop -> year sums.
     
-    # Filter and process data
-    production_data = defaultdict(lambda: defaultdict(float))  # crop -> year -> production
-    area_data = defaultdict(lambda: defaultdict(float))  # crop -> year -> area
+    Args:
+        grain_by_geo: GEO -> (production_data, area_data), filled in place
+        geos: GEOs to keep (all if None)
+    """
+    all_crops = grouped_crops()
+    geo_col, crop_col, disposition_col, ref_date_col, value_col = columns
     
     for row in reader:
         geo = row.get(geo_col, '').strip('"').strip()
-        crop = row.get(crop_col, '').strip('"').strip()
-        disposition = row.get(disposition_col, '').strip('"').strip()
-        ref_date = row.get(ref_date_col, '').strip('"').strip()
-        value_str = row.get(value_col, '').strip('"').strip()
-        
-        # Filter for Canada and major crops
-        if geo != 'Canada':
+        if geos is not None and geo not in geos:
             continue
         
-        if crop not in all_crops:
-            continue
-        
-        if disposition not in ['Production (metric tonnes)', 'Seeded area (hectares)']:
-            continue
+        grain_data = grain_by_geo.get(geo)
+        if grain_data is None:
+            grain_data = grain_by_geo[geo] = empty_grain_data()
         
-        try:
-            # Parse year from REF_DATE (could be YYYY or YYYY-MM format)
-            if '-' in ref_date:
-                year = int(ref_date.split('-')[0])
-            else:
-                year = int(ref_date)
-            
-            value = float(value_str)
-            
-            if disposition == 'Production (metric tonnes)':
-                production_data[crop][year] += value
-            elif disposition == 'Seeded area (hectares)':
-                area_data[crop][year] += value
-                
-        except (ValueError, KeyError) as e:
-            logger.debug(f"Skipping row: {e}")
-            continue
+        add_grain_observation(
+            *grain_data, all_crops,
+            row.get(crop_col, '').strip('"').strip(),
+            row.get(disposition_col, '').strip('"').strip(),
+            row.get(ref_date_col, '').strip('"').strip(),
+            row.get(value_col, '').strip('"').strip(),
+        )
+
+
+def parse_grain_csv(csv_content: str):
+    """
+    Sum Canada production and seeded area per crop and year from the table CSV.
+    
+    Returns:
+        (production_data, area_data): crop -> year -> value
+    """
+    # Parse CSV and identify column names
+    reader = csv.DictReader(io.StringIO(csv_content))
+    columns = find_grain_columns(reader)
+    logger.info("Using columns: GEO={}, Crop={}, Disposition={}, Date={}, Value={}".format(*columns))
     
-    # Calculate aggregates and effective yields
-    # Collect all years from all crops (ensure they're all integers)
-    all_years = set()
-    for crop_data in production_data.values():
-        all_years.update(crop_data.keys())
-    for crop_data in area_data.values():
-        all_years.update(crop_data.keys())
-    years = sorted(all_years)
+    # Filter and process data
+    grain_by_geo = {}
+    accumulate_grain_rows(reader, columns, grain_by_geo, geos={NATIONAL_GEO})
     
-    # Annual aggregates
-    production_by_year = []
-    area_by_year = []
+    return grain_by_geo.get(NATIONAL_GEO) or empty_grain_data()
+
+
+def parse_grain_range(csv_path: Path, header: list, start: int, end: int, geos=None):
+    """Worker for parse_grain_file_by_geo: partial per-GEO crop -> year sums for one byte range."""
+    reader = csv.DictReader(read_range_lines(csv_path, start, end), fieldnames=header)
+    columns = find_grain_columns(reader)
+    
+    grain_by_geo = {}
+    accumulate_grain_rows(reader, columns, grain_by_geo, geos)
     
-    for year in years:
-        total_production = sum(production_data[crop].get(year, 0) for crop in all_crops)
-        total_area = sum(area_data[crop].get(year, 0) for crop in all_crops)
+    # Plain dicts so the result can be pickled back to the parent
+    return {geo: plain_grain_data(*grain_data) for geo, grain_data in grain_by_geo.items()}
+
+
+def parse_grain_file_by_geo(csv_path: Path, workers: int = None, geos=None) -> dict:
+    """
+    Parse every GEO of the table CSV in one parallel pass: byte ranges are
+    parsed on a process pool and the partial crop -> year sums merged.
+    
+    Args:
+        geos: GEOs to keep (all if None)
         
-        if total_production > 0:
-            production_by_year.append({"year": year, "value": total_production})
-        if total_area > 0:
-            area_by_year.append({"year": year, "value": total_area})
+    Returns:
+        GEO -> (production_data, area_data), as plain dicts
+    """
+    grain_by_geo = {}
+    
+    for partial_by_geo in map_csv_ranges(csv_path, parse_grain_range, geos, workers=workers):
+        for geo, partial_data in partial_by_geo.items():
+            grain_data = grain_by_geo.get(geo)
+            if grain_data is None:
+                grain_data = grain_by_geo[geo] = empty_grain_data()
+            for merged, partial in zip(grain_data, partial_data):
+                for crop, years in partial.items():
+                    for year, value in years.items():
+                        merged[crop][year] += value
+    
+    return {geo: plain_grain_data(*grain_data) for geo, grain_data in grain_by_geo.items()}
+
+
+def parse_grain_file(csv_path: Path, workers: int = None):
+    """
+    Parallel parse_grain_csv over a CSV file (Canada only).
+    
+    Returns:
+        (production_data, area_data): crop -> year -> value
+    """
+    grain_by_geo = parse_grain_file_by_geo(csv_path, workers, geos={NATIONAL_GEO})
+    return grain_by_geo.get(NATIONAL_GEO, ({}, {}))
+
+
+def load_grain_from_store(conn):
+    """
+    Same sums as parse_grain_csv, read from the observation store instead of the CSV.
+    
+    Returns:
+        (production_data, area_data): crop -> year -> value
+    """
+    all_crops = grouped_crops()
+    member_columns = [name.lower() for name in get_member_columns(conn, GRAIN_PRODUCTION_TABLE)]
+    crop_pos = member_columns.index('type of crop')
+    disposition_pos = member_columns.index('harvest disposition')
     
-    # Crop components data
+    production_data = defaultdict(lambda: defaultdict(float))  # crop -> year -> production
+    area_data = defaultdict(lambda: defaultdict(float))  # crop -> year -> area
+    
+    for _geo, member_path, _uom, ref_period, value in query_table(conn, GRAIN_PRODUCTION_TABLE, geo=NATIONAL_GEO):
+        members = member_path.split(MEMBER_SEPARATOR)
+        add_grain_observation(
+            production_data, area_data, all_crops,
+            members[crop_pos].strip(), members[disposition_pos].strip(),
+            ref_period.strip(), value,
+        )
+    
+    return production_data, area_data
+
+
+def process_grain_data(csv_content: str, output_dir: Path):
+    """Process grain production data and generate JSON files."""
+    production_data, area_data = parse_grain_csv(csv_content)
+    build_grain_outputs(production_data, area_data, output_dir)
+
+
+def process_grain_file(csv_path: Path, output_dir: Path, workers: int = None):
+    """Same as process_grain_data for a CSV on disk, parsed in parallel."""
+    production_data, area_data = parse_grain_file(csv_path, workers)
+    build_grain_outputs(production_data, area_data, output_dir)
+
+
+def geo_slug(geo: str) -> str:
+    """Directory name for a GEO, e.g. 'Prince Edward Island' -> 'prince-edward-island'."""
+    ascii_name = unicodedata.normalize('NFKD', geo).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-')
+
+
+def build_geo_outputs(geo: str, production_data: dict, area_data: dict, output_dir: Path,
+                      panel_dir: Path = None) -> dict:
+    """
+    Worker for process_grain_file_by_geo: write one GEO's grain files.
+    
+    Returns:
+        The GEO's manifest entry
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_groupings = geo == NATIONAL_GEO
+    if panel_dir is not None:
+        update_grain_outputs(production_data, area_data, output_dir, panel_dir / f"{geo_slug(geo)}.npz", write_groupings)
+    else:
+        build_grain_outputs(production_data, area_data, output_dir, write_groupings)
+    
+    years = sorted({year for data in (production_data, area_data) for crop in data.values() for year in crop})
+    return {
+        "geo": geo,
+        "firstYear": years[0] if years else None,
+        "lastYear": years[-1] if years else None,
+        "crops": sorted(crop for crop in production_data if any(v > 0 for v in production_data[crop].values())),
+    }
+
+
+def process_grain_file_by_geo(csv_path: Path, output_dir: Path, workers: int = None,
+                              panel_dir: Path = None) -> dict:
+    """
+    Parse the table once and build the grain outputs for every GEO on a process pool.
+    
+    The national (Canada) files are written to output_dir as before; every
+    other GEO gets the same files under output_dir/grain_provinces/<slug>/,
+    listed in output_dir/grain_provinces/manifest.json. If panel_dir is
+    given, each GEO's state is kept there as <slug>.npz and only the years
+    that changed since the last run are recomputed (see update_grain_outputs).
+    
+    Returns:
+        The manifest
+    """
+    if workers is None:
+        workers = default_workers()
+    
+    grain_by_geo = parse_grain_file_by_geo(csv_path, workers)
+    geo_root = output_dir / PROVINCIAL_OUTPUT_DIR
+    
+    def geo_dir(geo):
+        return output_dir if geo == NATIONAL_GEO else geo_root / geo_slug(geo)
+    
+    geos = sorted(grain_by_geo)
+    logger.info(f"Building grain outputs for {len(geos)} geographies")
+    if workers <= 1:
+        entries = [build_geo_outputs(geo, *grain_by_geo[geo], geo_dir(geo), panel_dir) for geo in geos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(build_geo_outputs, geo, *grain_by_geo[geo], geo_dir(geo), panel_dir)
+                       for geo in geos]
+            entries = [future.result() for future in futures]
+    
+    for entry in entries:
+        entry["path"] = "" if entry["geo"] == NATIONAL_GEO else f"{PROVINCIAL_OUTPUT_DIR}/{geo_slug(entry['geo'])}/"
+    
+    manifest = {
+        "table": GRAIN_PRODUCTION_TABLE,
+        "national": NATIONAL_GEO,
+        "files": GEO_OUTPUT_FILES,
+        "geographies": entries,
+        "generated": datetime.now().isoformat(timespec='seconds'),
+    }
+    geo_root.mkdir(parents=True, exist_ok=True)
+    with open(geo_root / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    
+    logger.info(f"✓ Wrote grain outputs for {len(entries)} geographies")
+    return manifest
+
+
+def year_breaks(years):
+    """X-axis breaks every 10, 20 or 25 years depending on the span, ending at the last year."""
+    if not years:
+        return []
+    min_year = min(years)
+    max_year = max(years)
+    span = max_year - min_year
+    
+    if span > 100:
+        interval = 25
+    elif span >= 50:
+        interval = 20
+    else:
+        interval = 10
+    
+    first_break = min_year
+    while first_break % interval != 0:
+        first_break += 1
+    
+    breaks = list(range(first_break, max_year + 1, interval))
+    if breaks and breaks[-1] < max_year:
+        breaks.append(max_year)
+    
+    return breaks
+
+
+def annual_series(years, totals, from_year=None):
+    """[{year, value}] for years with a positive total (from from_year on, if given)."""
+    return [
+        {"year": year, "value": value}
+        for year, value in zip(years, totals.tolist())
+        if value > 0 and (from_year is None or year >= from_year)
+    ]
+
+
+def crop_component_records(production_data, area_data, crops, from_year=None):
+    """Production, seeded area and effective yield records by crop and year (from from_year on, if given)."""
     crop_components = []
-    for crop in sorted(all_crops):
+    for crop in sorted(crops):
         crop_years = sorted(set(
-            list(production_data[crop].keys()) + 
-            list(area_data[crop].keys())
+            list(production_data.get(crop, {}).keys()) + 
+            list(area_data.get(crop, {}).keys())
         ))
         
         for year in crop_years:
-            production = production_data[crop].get(year, 0)
-            area = area_data[crop].get(year, 0)
+            if from_year is not None and year < from_year:
+                continue
+            
+            production = production_data.get(crop, {}).get(year, 0)
+            area = area_data.get(crop, {}).get(year, 0)
             
             if production > 0:
                 crop_components.append({
@@ -208,122 +442,24 @@ def process_grain_data(csv_content: str, output_dir: Path):
                     "value": effective_yield
                 })
     
-    # Calculate year breaks for x-axis
-    def year_breaks(years):
-        if not years:
-            return []
-        min_year = min(years)
-        max_year = max(years)
-        span = max_year - min_year
-        
-        if span > 100:
-            interval = 25
-        elif span >= 50:
-            interval = 20
-        else:
-            interval = 10
-        
-        first_break = min_year
-        while first_break % interval != 0:
-            first_break += 1
-        
-        breaks = list(range(first_break, max_year + 1, interval))
-        if breaks and breaks[-1] < max_year:
-            breaks.append(max_year)
-        
-        return breaks
-    
-    # Decomposition calculation
-    crop_panel = []
-    for crop in sorted(all_crops):
-        crop_years = sorted(set(
-            list(production_data[crop].keys()) + 
-            list(area_data[crop].keys())
-        ))
-        
-        for year in crop_years:
-            production = production_data[crop].get(year, 0)
-            area = area_data[crop].get(year, 0)
-            
-            if production > 0 and area > 0:
-                crop_panel.append({
-                    "year": year,
-                    "crop": crop,
-                    "production": production,
-                    "area": area,
-                    "effective_yield": production / area
-                })
-    
-    # Calculate annual aggregates for decomposition
-    annual_aggregates = []
-    for year in sorted(years):
-        year_crops = [c for c in crop_panel if c["year"] == year]
-        if not year_crops:
-            continue
-        
-        total_prod = sum(c["production"] for c in year_crops)
-        total_area = sum(c["area"] for c in year_crops)
-        
-        if total_area > 0:
-            # Area-weighted average yield
-            shares = [c["area"] / total_area for c in year_crops]
-            avg_yield = sum(s * c["effective_yield"] for s, c in zip(shares, year_crops))
-            
-            annual_aggregates.append({
-                "year": year,
-                "p_total": total_prod,
-                "a_total": total_area,
-                "y_bar": avg_yield
-            })
+    return crop_components
+
+
+def waterfall_records(log_changes, cumulative_start: float = 0.0):
+    """
+    Cumulative decomposition waterfall for a run of log changes.
     
-    # Calculate log changes and decomposition
-    log_changes = []
-    for i in range(1, len(annual_aggregates)):
-        prev = annual_aggregates[i-1]
-        curr = annual_aggregates[i]
+    Args:
+        log_changes: Decomposition records, in year order
+        cumulative_start: Cumulative log change before the first record
         
-        if prev["p_total"] > 0 and prev["a_total"] > 0 and curr["p_total"] > 0 and curr["a_total"] > 0:
-            delta_ln_p = math.log(curr["p_total"]) - math.log(prev["p_total"])
-            delta_ln_a = math.log(curr["a_total"]) - math.log(prev["a_total"])
-            delta_ln_y_bar = math.log(curr["y_bar"]) - math.log(prev["y_bar"])
-            
-            # Within-crop yield effect
-            prev_year = prev["year"]
-            curr_year = curr["year"]
-            
-            prev_crops = {c["crop"]: c for c in crop_panel if c["year"] == prev_year}
-            curr_crops = {c["crop"]: c for c in crop_panel if c["year"] == curr_year}
-            
-            common_crops = set(prev_crops.keys()) & set(curr_crops.keys())
-            
-            within_effect = 0.0
-            if common_crops and prev["a_total"] > 0:
-                for crop in common_crops:
-                    prev_crop = prev_crops[crop]
-                    curr_crop = curr_crops[crop]
-                    
-                    if prev_crop["effective_yield"] > 0 and curr_crop["effective_yield"] > 0:
-                        share = prev_crop["area"] / prev["a_total"]
-                        delta_ln_y = math.log(curr_crop["effective_yield"]) - math.log(prev_crop["effective_yield"])
-                        within_effect += share * delta_ln_y
-            
-            mix_effect = delta_ln_y_bar - within_effect
-            
-            log_changes.append({
-                "year": curr_year,
-                "delta_ln_p": delta_ln_p,
-                "delta_ln_a": delta_ln_a,
-                "delta_ln_y_bar": delta_ln_y_bar,
-                "within_effective_yield": within_effect,
-                "crop_mix": mix_effect
-            })
-    
-    # Calculate cumulative decomposition
+    Returns:
+        (cumulative_data, connecting_segments, component_connectors)
+    """
     cumulative_data = []
     connecting_segments = []
     component_connectors = []
     
-    cumulative_start = 0.0
     for i, change in enumerate(log_changes):
         # Seeded Area
         area_start = cumulative_start
@@ -390,7 +526,11 @@ def process_grain_data(csv_content: str, output_dir: Path):
         
         cumulative_start = mix_end
     
-    # Calculate statistics
+    return cumulative_data, connecting_segments, component_connectors
+
+
+def grain_statistics(production_by_year, area_by_year, log_changes) -> dict:
+    """Headline figures quoted in the grain story text."""
     if production_by_year:
         first_year = min(p["year"] for p in production_by_year)
         last_year = max(p["year"] for p in production_by_year)
@@ -452,8 +592,7 @@ def process_grain_data(csv_content: str, output_dir: Path):
         if abs(c["within_effective_yield"]) > 0.15 and c["year"] >= 1960
     )
     
-    # Save JSON files
-    stats = {
+    return {
         "firstYear": first_year,
         "lastYear": last_year,
         "production2025MillionTonnes": production_2025_million,
@@ -469,23 +608,39 @@ def process_grain_data(csv_content: str, output_dir: Path):
         "withinExceeds15Pre1960": within_exceeds_15_pre_1960,
         "withinExceeds15Post1960": within_exceeds_15_post_1960
     }
+
+
+def write_grain_outputs(output_dir: Path, production_by_year, area_by_year, crop_components, log_changes,
+                        waterfall, group_names, group_records):
+    """
+    Write the grain JSON files (all of GRAIN_OUTPUT_FILES except crop_groupings.json).
     
+    grain_crop_components.json and grain_decomposition.json are written in
+    the compact layouts of grain_codec. The decimated and decade levels of
+    the plotted series are written to grain_lod/ (see grain_lod).
+    """
+    cumulative_data, connecting_segments, component_connectors = waterfall
+    
+    # Save JSON files
+    stats = grain_statistics(production_by_year, area_by_year, log_changes)
     with open(output_dir / "grain_statistics.json", 'w', encoding='utf-8') as f:
         json.dump(stats, f, indent=2)
     
     prod_breaks = year_breaks([p["year"] for p in production_by_year])
+    production_json = {
+        "data": production_by_year,
+        "xAxisBreaks": prod_breaks
+    }
     with open(output_dir / "grain_production_by_year.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "data": production_by_year,
-            "xAxisBreaks": prod_breaks
-        }, f, indent=2)
+        json.dump(production_json, f, indent=2)
     
     area_breaks = year_breaks([a["year"] for a in area_by_year])
+    area_json = {
+        "data": area_by_year,
+        "xAxisBreaks": area_breaks
+    }
     with open(output_dir / "grain_area_by_year.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "data": area_by_year,
-            "xAxisBreaks": area_breaks
-        }, f, indent=2)
+        json.dump(area_json, f, indent=2)
     
     crop_breaks = year_breaks([c["year"] for c in crop_components])
     unique_crops = sorted(set(c["crop"] for c in crop_components))
@@ -495,13 +650,13 @@ def process_grain_data(csv_content: str, output_dir: Path):
         "Production (tonnes)": "#000000"
     }
     
-    with open(output_dir / "grain_crop_components.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "crops": unique_crops,
-            "data": crop_components,
-            "xAxisBreaks": crop_breaks,
-            "measureColours": measure_colours
-        }, f, indent=2)
+    crop_components_json = {
+        "crops": unique_crops,
+        "data": crop_components,
+        "xAxisBreaks": crop_breaks,
+        "measureColours": measure_colours
+    }
+    write_grain_json(crop_components_json, output_dir / "grain_crop_components.json")
     
     decomp_breaks = year_breaks([d["year"] for d in cumulative_data])
     unique_years = sorted(set(d["year"] for d in cumulative_data))
@@ -511,33 +666,295 @@ def process_grain_data(csv_content: str, output_dir: Path):
         "Crop Mix": "#4b3d60"
     }
     
-    with open(output_dir / "grain_decomposition.json", 'w', encoding='utf-8') as f:
+    decomposition_json = {
+        "cumulativeData": cumulative_data,
+        "connectingSegments": connecting_segments,
+        "componentConnectors": component_connectors,
+        "xAxisBreaks": decomp_breaks,
+        "colours": colour_palette,
+        "uniqueYears": unique_years
+    }
+    write_grain_json(decomposition_json, output_dir / "grain_decomposition.json")
+    
+    with open(output_dir / "grain_group_decomposition.json", 'w', encoding='utf-8') as f:
         json.dump({
-            "cumulativeData": cumulative_data,
-            "connectingSegments": connecting_segments,
-            "componentConnectors": component_connectors,
-            "xAxisBreaks": decomp_breaks,
-            "colours": colour_palette,
-            "uniqueYears": unique_years
+            "groups": group_names,
+            "data": group_records,
+            "xAxisBreaks": decomp_breaks
         }, f, indent=2)
     
+    # Coarser levels of detail for narrow charts
+    write_grain_lod(output_dir, {
+        "grain_production_by_year": production_json,
+        "grain_area_by_year": area_json,
+        "grain_crop_components": crop_components_json,
+        "grain_decomposition": decomposition_json,
+    })
+    
     logger.info("✓ Successfully generated all JSON files")
 
 
-def main():
-    """Main function to fetch and process grain production data."""
-    project_root = Path(__file__).parent.parent
-    output_dir = project_root / "public" / "data"
+def crop_group_members() -> dict:
+    """Group name -> crops, from CROP_GROUPINGS."""
+    return {name: group["crops"] for name, group in CROP_GROUPINGS["crop_groupings"].items()}
+
+
+def save_grain_state(state_path: Path, panel: CropPanel, decomposition: dict, cumulative_end: list):
+    """
+    Persist what update_grain_outputs needs to recompute only the tail:
+    the crop x year panel, the aggregate years, the decomposition arrays
+    and the running cumulative log change after each decomposition year.
+    """
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp.npz")
+    np.savez(
+        tmp_path,
+        version=np.array(GRAIN_STATE_VERSION),
+        crops=np.array(panel.crops),
+        years=np.array(panel.years, dtype=np.int64),
+        production=panel.production,
+        area=panel.area,
+        aggregate_years=annual_aggregates(panel)["year"],
+        cumulative_end=np.array(cumulative_end, dtype=np.float64),
+        **{f"decomposition_{key}": values for key, values in decomposition.items()},
+    )
+    tmp_path.replace(state_path)
+
+
+def load_grain_state(state_path: Path):
+    """The saved state as (panel, aggregate years, decomposition arrays, cumulative end), or None."""
+    if state_path is None or not state_path.exists():
+        return None
+    with np.load(state_path) as data:
+        if 'version' not in data or int(data['version']) != GRAIN_STATE_VERSION:
+            return None
+        panel = CropPanel(data['crops'].tolist(), data['years'].tolist(), data['production'], data['area'])
+        decomposition = {key[len("decomposition_"):]: data[key] for key in data.files if key.startswith("decomposition_")}
+        return panel, data['aggregate_years'].tolist(), decomposition, data['cumulative_end'].tolist()
+
+
+def first_changed_year(old: CropPanel, new: CropPanel):
+    """
+    First year whose figures differ between two panels of the same crops,
+    new years after the old last year counting as changes.
+    
+    Returns:
+        The year, None if nothing changed, or False if the panels cannot be
+        compared column by column (different crops or years not a tail update)
+    """
+    n = len(old.years)
+    if old.crops != new.crops or new.years[:n] != old.years:
+        return False
+    
+    differs = ((old.production != new.production[:, :n]) | (old.area != new.area[:, :n])).any(axis=0)
+    changed = np.flatnonzero(differs)
+    if len(changed):
+        return old.years[changed[0]]
+    if len(new.years) > n:
+        return new.years[n]
+    return None
+
+
+def build_grain_outputs(production_data, area_data, output_dir: Path, write_groupings: bool = True,
+                        panel_path: Path = None):
+    """
+    Compute aggregates and the decomposition and write the grain JSON files.
+    
+    If panel_path is given, the crop x year panel and the state used by
+    update_grain_outputs are saved there (see also grain_decomposition).
+    """
+    all_crops = grouped_crops()
+    
+    logger.info(f"Processing data for {len(all_crops)} crops")
+    
+    # Save crop groupings JSON
+    if write_groupings:
+        groupings_path = output_dir / "crop_groupings.json"
+        with open(groupings_path, 'w', encoding='utf-8') as f:
+            json.dump(CROP_GROUPINGS, f, indent=2)
+        logger.info(f"Saved crop groupings to {groupings_path}")
+    
+    # Crop x year matrices of production and seeded area
+    panel = CropPanel.from_dicts(production_data, area_data, all_crops)
+    
+    # Annual aggregates
+    total_production, total_area = panel.totals()
+    production_by_year = annual_series(panel.years, total_production)
+    area_by_year = annual_series(panel.years, total_area)
+    
+    # Crop components data
+    crop_components = crop_component_records(production_data, area_data, all_crops)
+    
+    # Decomposition: log changes of production, area, within-crop yield and crop mix,
+    # split by crop group in the same pass
+    group_decomposition = decompose_groups(panel, crop_group_members())
+    decomposition = {key: group_decomposition[key] for key in DECOMPOSITION_KEYS}
+    log_changes = decomposition_records(decomposition)
+    group_records = group_decomposition_records(group_decomposition)
+    
+    # Calculate cumulative decomposition
+    waterfall = waterfall_records(log_changes)
+    
+    write_grain_outputs(output_dir, production_by_year, area_by_year, crop_components, log_changes,
+                        waterfall, group_decomposition["groups"], group_records)
+    
+    if panel_path is not None:
+        cumulative_end = [d["cumulativeEnd"] for d in waterfall[0] if d["component"] == "Crop Mix"]
+        save_grain_state(panel_path, panel, decomposition, cumulative_end)
+
+
+def update_grain_outputs(production_data, area_data, output_dir: Path, state_path: Path,
+                         write_groupings: bool = True) -> bool:
+    """
+    Bring the grain JSON files up to date, recomputing only the years that changed.
+    
+    The new panel is compared with the saved state: aggregates, log changes,
+    the cumulative waterfall and the group decomposition are recomputed from
+    the first changed year on (anchored at the aggregate year before it and
+    its running cumulative sum), and spliced onto the unchanged head of the
+    existing JSON files. Falls back to build_grain_outputs when there is no
+    usable state or a file is missing.
+    
+    Returns:
+        True if any output was written
+    """
+    all_crops = grouped_crops()
+    panel = CropPanel.from_dicts(production_data, area_data, all_crops)
+    
+    state = load_grain_state(state_path)
+    changed_year = first_changed_year(state[0], panel) if state is not None else False
+    outputs = [output_dir / name for name in (GRAIN_OUTPUT_FILES if write_groupings else GEO_OUTPUT_FILES)]
+    if changed_year is False or not all(path.exists() for path in outputs):
+        build_grain_outputs(production_data, area_data, output_dir, write_groupings, state_path)
+        return True
+    if changed_year is None:
+        logger.info("Grain data unchanged, outputs are up to date")
+        return False
+    
+    _, aggregate_years, old_decomposition, old_cumulative_end = state
+    
+    # Recompute from the aggregate year before the first change
+    anchor = max((year for year in aggregate_years if year < changed_year), default=None)
+    start = panel.years.index(anchor) if anchor is not None else 0
+    tail_panel = CropPanel(
+        panel.crops, panel.years[start:],
+        np.ascontiguousarray(panel.production[:, start:]), np.ascontiguousarray(panel.area[:, start:])
+    )
+    logger.info(f"Updating grain outputs from {changed_year} ({len(tail_panel.years)} of {len(panel.years)} years)")
+    
+    def load(name):
+        return load_grain_json(output_dir / name)
+    
+    def head(records):
+        return [r for r in records if r["year"] < changed_year]
+    
+    total_production, total_area = tail_panel.totals()
+    production_by_year = head(load("grain_production_by_year.json")["data"]) + \
+        annual_series(tail_panel.years, total_production, changed_year)
+    area_by_year = head(load("grain_area_by_year.json")["data"]) + \
+        annual_series(tail_panel.years, total_area, changed_year)
+    
+    # Stable sort keeps each crop's head records before its new ones
+    crop_components = sorted(
+        head(load("grain_crop_components.json")["data"])
+        + crop_component_records(production_data, area_data, all_crops, changed_year),
+        key=lambda c: c["crop"]
+    )
+    
+    # Decomposition of the tail; every record is a year after the anchor
+    group_decomposition = decompose_groups(tail_panel, crop_group_members())
+    kept = int(np.searchsorted(old_decomposition["year"], changed_year))
+    decomposition = {
+        key: np.concatenate([old_decomposition[key][:kept], group_decomposition[key]])
+        for key in DECOMPOSITION_KEYS
+    }
+    log_changes = decomposition_records(decomposition)
+    tail_changes = log_changes[kept:]
+    
+    # Waterfall: continue from the running cumulative sum of the last unchanged year
+    cumulative_start = old_cumulative_end[kept - 1] if kept else 0.0
+    old_waterfall = load("grain_decomposition.json")
+    tail_data, tail_segments, tail_connectors = waterfall_records(tail_changes, cumulative_start)
+    connecting_segments = [s for s in old_waterfall["connectingSegments"] if s["yearEnd"] < changed_year]
+    if kept and tail_changes:
+        connecting_segments.append({
+            "year": log_changes[kept - 1]["year"],
+            "yearEnd": tail_changes[0]["year"],
+            "yValue": cumulative_start
+        })
+    waterfall = (
+        head(old_waterfall["cumulativeData"]) + tail_data,
+        connecting_segments + tail_segments,
+        head(old_waterfall["componentConnectors"]) + tail_connectors,
+    )
+    
+    group_records = head(load("grain_group_decomposition.json")["data"]) + \
+        group_decomposition_records(group_decomposition)
+    
+    write_grain_outputs(output_dir, production_by_year, area_by_year, crop_components, log_changes,
+                        waterfall, group_decomposition["groups"], group_records)
+    
+    cumulative_end = old_cumulative_end[:kept] + [d["cumulativeEnd"] for d in tail_data if d["component"] == "Crop Mix"]
+    save_grain_state(state_path, panel, decomposition, cumulative_end)
+    return True
+
+
+def build_grain_outputs_from_store(output_dir: Path):
+    """Regenerate the grain JSON files from the observation store (no download)."""
+    conn = connect()
+    try:
+        production_data, area_data = load_grain_from_store(conn)
+    finally:
+        conn.close()
+    update_grain_outputs(production_data, area_data, output_dir, default_panel_path())
+
+
+def grain_output_dir() -> Path:
+    """public/data, where the chart JSON files are written."""
+    output_dir = Path(__file__).parent.parent / "public" / "data"
     output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def download_grain_data(force: bool = False):
+    """
+    Stream the grain production table to disk unless it is unchanged.
+
+    Returns:
+        (csv_path, release_time), or None when the table is unchanged
+    """
+    output_dir = grain_output_dir()
+    outputs = [output_dir / name for name in GRAIN_OUTPUT_FILES]
+    outputs.append(output_dir / PROVINCIAL_OUTPUT_DIR / "manifest.json")
+    needs_download, release_time = check_for_update(GRAIN_PRODUCTION_TABLE, outputs, force=force)
+    if not needs_download:
+        return None
     
+    csv_path = download_table(GRAIN_PRODUCTION_TABLE, Path(__file__).parent.parent / "data" / "grain_production_data.csv")
+    return csv_path, release_time
+
+
+def process_grain_download(csv_path: Path, release_time=None):
+    """Build every GEO's outputs in parallel from a downloaded table, then store it."""
     try:
-        csv_content = fetch_statcan_table(GRAIN_PRODUCTION_TABLE)
-        process_grain_data(csv_content, output_dir)
+        process_grain_file_by_geo(csv_path, grain_output_dir(), panel_dir=default_panel_path().parent)
+        store_table_file(GRAIN_PRODUCTION_TABLE, csv_path, release_time)
+        record_download(GRAIN_PRODUCTION_TABLE, release_time)
         logger.info("✓ Grain production data processing complete")
     except Exception as e:
         logger.error(f"✗ Error: {e}")
         raise
 
 
+def main(force: bool = False):
+    """Main function to fetch and process grain production data."""
+    download = download_grain_data(force=force)
+    if download is not None:
+        process_grain_download(*download)
+
+
 if __name__ == "__main__":
-    main()
+    if "--from-store" in sys.argv:
+        build_grain_outputs_from_store(Path(__file__).parent.parent / "public" / "data")
+    else:
+        main(force="--force" in sys.argv)
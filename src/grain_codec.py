@@ -0,0 +1,254 @@
+"""
+Compact encodings of grain_crop_components.json and grain_decomposition.json.
+
+grain_crop_components.json ("dictionary" layout) keeps the crop and
+measure names once, in string tables, and the records as columns:
+
+    {
+      "format": "dictionary", "version": 1,
+      "crops": [...], "measures": [...],
+      "columns": {"year": [...], "crop": [indices], "measure": [indices], "value": [...]},
+      "derived": {"measure": "Effective yield (t/ha seeded)",
+                  "numerator": "Production (tonnes)", "denominator": "Seeded area (hectares)"},
+      "xAxisBreaks": [...], "measureColours": {...}
+    }
+
+Effective yield rows are not stored: the decoder adds one after every
+crop-year with both production and area, as numerator / denominator.
+
+grain_decomposition.json ("waterfall" layout) stores only the yearly log
+changes of each component; the cumulative bars, connecting segments,
+component connectors and x positions are rebuilt by the decoder with the
+same additions as fetch_grain_production_data.waterfall_records:
+
+    {
+      "format": "waterfall", "version": 1,
+      "components": ["Seeded Area", "Within-Crop Effective Yield", "Crop Mix"],
+      "barOffset": 0.25,
+      "years": [...], "values": [[...], [...], [...]],
+      "xAxisBreaks": [...], "colours": {...}
+    }
+
+Both decode to the original documents exactly; the chart modules use
+src/data/grainCodec.js. Convert the files of an output directory:
+
+    python src/grain_codec.py public/data [--legacy]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+DICTIONARY_FORMAT = "dictionary"
+WATERFALL_FORMAT = "waterfall"
+CODEC_VERSION = 1
+
+PRODUCTION_MEASURE = "Production (tonnes)"
+AREA_MEASURE = "Seeded area (hectares)"
+YIELD_MEASURE = "Effective yield (t/ha seeded)"
+
+# Horizontal offset of the first and last component bar from the year
+BAR_OFFSET = 0.25
+
+
+def check_version(document: dict):
+    if document.get("version") != CODEC_VERSION:
+        raise ValueError(f"Unsupported {document.get('format')} version: {document.get('version')}")
+
+
+def encode_crop_components(document: dict) -> dict:
+    """Dictionary layout of a grain_crop_components.json document."""
+    records = document["data"]
+    derived = {"measure": YIELD_MEASURE, "numerator": PRODUCTION_MEASURE, "denominator": AREA_MEASURE}
+    stored = [r for r in records if r["measure"] != YIELD_MEASURE]
+
+    crops = list(document["crops"])
+    crops += sorted({r["crop"] for r in records} - set(crops))
+    measures = []
+    for r in stored:
+        if r["measure"] not in measures:
+            measures.append(r["measure"])
+    crop_index = {crop: i for i, crop in enumerate(crops)}
+    measure_index = {measure: i for i, measure in enumerate(measures)}
+
+    encoded = {
+        "format": DICTIONARY_FORMAT,
+        "version": CODEC_VERSION,
+        "crops": crops,
+        "measures": measures,
+        "columns": {
+            "year": [r["year"] for r in stored],
+            "crop": [crop_index[r["crop"]] for r in stored],
+            "measure": [measure_index[r["measure"]] for r in stored],
+            "value": [r["value"] for r in stored],
+        },
+        "derived": derived,
+    }
+    for key, value in document.items():
+        if key not in ("crops", "data"):
+            encoded[key] = value
+
+    # Yields that are not exactly numerator / denominator are stored as rows
+    if decode_crop_components(encoded)["data"] != records:
+        encoded["measures"] = measures + [YIELD_MEASURE]
+        measure_index[YIELD_MEASURE] = len(measures)
+        encoded["columns"] = {
+            "year": [r["year"] for r in records],
+            "crop": [crop_index[r["crop"]] for r in records],
+            "measure": [measure_index[r["measure"]] for r in records],
+            "value": [r["value"] for r in records],
+        }
+        del encoded["derived"]
+    return encoded
+
+
+def decode_crop_components(document: dict) -> dict:
+    """Legacy grain_crop_components.json document (legacy documents are returned unchanged)."""
+    if document.get("format") != DICTIONARY_FORMAT:
+        return document
+    check_version(document)
+
+    crops, measures, columns = document["crops"], document["measures"], document["columns"]
+    derived = document.get("derived")
+
+    data = []
+    numerator = None
+    for year, crop, measure, value in zip(columns["year"], columns["crop"], columns["measure"], columns["value"]):
+        record = {"year": year, "crop": crops[crop], "measure": measures[measure], "value": value}
+        data.append(record)
+        if derived is None:
+            continue
+        if record["measure"] == derived["numerator"]:
+            numerator = record
+        elif record["measure"] == derived["denominator"]:
+            if numerator is not None and numerator["year"] == year and numerator["crop"] == record["crop"]:
+                data.append({"year": year, "crop": record["crop"], "measure": derived["measure"],
+                             "value": numerator["value"] / value})
+            numerator = None
+
+    decoded = {"crops": [crop for crop in crops if any(r["crop"] == crop for r in data)], "data": data}
+    for key, value in document.items():
+        if key not in ("format", "version", "crops", "measures", "columns", "derived", "data"):
+            decoded[key] = value
+    return decoded
+
+
+def encode_decomposition(document: dict) -> dict:
+    """Waterfall layout of a grain_decomposition.json document."""
+    bars = document["cumulativeData"]
+    components = []
+    for bar in bars:
+        if bar["component"] in components:
+            break
+        components.append(bar["component"])
+
+    encoded = {
+        "format": WATERFALL_FORMAT,
+        "version": CODEC_VERSION,
+        "components": components,
+        "barOffset": BAR_OFFSET,
+        "years": [bar["year"] for bar in bars[::len(components) or 1]],
+        "values": [[bar["value"] for bar in bars[i::len(components)]] for i in range(len(components))],
+    }
+    for key, value in document.items():
+        if key not in ("cumulativeData", "connectingSegments", "componentConnectors", "uniqueYears"):
+            encoded[key] = value
+
+    if decode_decomposition(encoded) != document:
+        raise ValueError("grain_decomposition.json is not a waterfall of its component values")
+    return encoded
+
+
+def decode_decomposition(document: dict) -> dict:
+    """Legacy grain_decomposition.json document (legacy documents are returned unchanged)."""
+    if document.get("format") != WATERFALL_FORMAT:
+        return document
+    check_version(document)
+
+    components, years, values = document["components"], document["years"], document["values"]
+    offset = document["barOffset"]
+    positions = [-offset, 0, offset] if len(components) == 3 else [0] * len(components)
+
+    cumulative_data = []
+    connecting_segments = []
+    component_connectors = []
+    cumulative = 0.0
+    for i, year in enumerate(years):
+        ends = []
+        for c, component in enumerate(components):
+            start = cumulative
+            cumulative = start + values[c][i]
+            ends.append(cumulative)
+            cumulative_data.append({
+                "year": year,
+                "component": component,
+                "value": values[c][i],
+                "cumulativeStart": start,
+                "cumulativeEnd": cumulative,
+                "xPosition": year + positions[c]
+            })
+
+        if i < len(years) - 1:
+            connecting_segments.append({"year": year, "yearEnd": years[i + 1], "yValue": cumulative})
+
+        for c in range(len(components) - 1):
+            component_connectors.append({
+                "year": year,
+                "xStart": year + positions[c],
+                "xEnd": year + positions[c + 1],
+                "yValue": ends[c]
+            })
+
+    decoded = {
+        "cumulativeData": cumulative_data,
+        "connectingSegments": connecting_segments,
+        "componentConnectors": component_connectors,
+    }
+    for key, value in document.items():
+        if key not in ("format", "version", "components", "barOffset", "years", "values"):
+            decoded[key] = value
+    decoded["uniqueYears"] = sorted(set(years))
+    return decoded
+
+
+# File name -> (encoder, decoder)
+GRAIN_CODECS = {
+    "grain_crop_components.json": (encode_crop_components, decode_crop_components),
+    "grain_decomposition.json": (encode_decomposition, decode_decomposition),
+}
+
+
+def write_grain_json(document: dict, path: Path, compact: bool = True):
+    """Write a legacy grain document, encoded (compact JSON) if it has a codec, else indented."""
+    path = Path(path)
+    codec = GRAIN_CODECS.get(path.name)
+    with open(path, 'w', encoding='utf-8') as f:
+        if compact and codec is not None:
+            json.dump(codec[0](document), f, separators=(',', ':'))
+        else:
+            json.dump(document, f, indent=2)
+
+
+def load_grain_json(path: Path) -> dict:
+    """Read a grain JSON file in either layout, as the legacy layout."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    codec = GRAIN_CODECS.get(path.name)
+    return codec[1](document) if codec is not None else document
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 1:
+        print("Usage: python src/grain_codec.py <output dir> [--legacy]")
+        exit(1)
+
+    for name in GRAIN_CODECS:
+        path = Path(args[0]) / name
+        if not path.exists():
+            print(f"⚠ {path} not found")
+            continue
+        size = path.stat().st_size
+        write_grain_json(load_grain_json(path), path, compact="--legacy" not in sys.argv)
+        print(f"✓ {path}: {size:,} -> {path.stat().st_size:,} bytes")
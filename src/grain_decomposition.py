@@ -0,0 +1,362 @@
+"""
+Vectorized decomposition of grain production growth.
+
+Crop production and seeded area are held as crop x year NumPy matrices
+(CropPanel). For each pair of consecutive years with data:
+
+    Δln P = Δln A + Δln ȳ
+    Δln ȳ = within-crop effective yield + crop mix
+
+where ȳ is the area-weighted mean effective yield, the within-crop effect
+is Σ s_i,t-1 Δln y_i over crops grown in both years (s = area share in
+the earlier year) and the crop mix effect is the remainder. Every step is
+an array operation over the whole panel, so the cost grows linearly with
+crops x years.
+
+decompose_groups nests this in crop groups g (CROP_GROUPINGS or any
+analyst-supplied grouping), with S_g the group's area share and ȳ_g its
+mean effective yield:
+
+    Δln ȳ   = Σ_g S_g,t-1 Δln ȳ_g + between-group mix
+    Δln ȳ_g = within-crop effective yield of g + within-group mix of g
+
+so crop mix = between-group mix + Σ_g S_g,t-1 (within-group mix of g),
+and the within-crop yield effect splits exactly into per-group parts.
+Panels are saved to data/cache/grain_panels/ when the grain outputs are
+built, so a grouping file can be evaluated without re-parsing the table:
+
+    python src/grain_decomposition.py groupings.json [output.json] [--geo=<slug>]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+# Group that collects panel crops a grouping does not list
+OTHER_GROUP = "Other"
+
+# Arrays returned by decompose, in record order
+DECOMPOSITION_KEYS = ["year", "delta_ln_p", "delta_ln_a", "delta_ln_y_bar", "within_effective_yield", "crop_mix"]
+
+
+class CropPanel:
+    """
+    Production and seeded area of a set of crops by year.
+
+    Args:
+        crops: Crop names (row order)
+        years: Years (column order, ascending)
+        production: (crops, years) tonnes, 0 where missing
+        area: (crops, years) hectares, 0 where missing
+    """
+
+    def __init__(self, crops: List[str], years: List[int], production: np.ndarray, area: np.ndarray):
+        self.crops = list(crops)
+        self.years = list(years)
+        self.production = production
+        self.area = area
+
+    @classmethod
+    def from_dicts(cls, production_data: Dict, area_data: Dict, crops: List[str]) -> "CropPanel":
+        """Build from crop -> year -> value dicts (years are taken from every crop in the dicts)."""
+        all_years = set()
+        for crop_data in production_data.values():
+            all_years.update(crop_data.keys())
+        for crop_data in area_data.values():
+            all_years.update(crop_data.keys())
+        years = sorted(all_years)
+        columns = {year: j for j, year in enumerate(years)}
+
+        production = np.zeros((len(crops), len(years)))
+        area = np.zeros((len(crops), len(years)))
+        for i, crop in enumerate(crops):
+            for matrix, data in ((production, production_data), (area, area_data)):
+                for year, value in data.get(crop, {}).items():
+                    matrix[i, columns[year]] = value
+        return cls(crops, years, production, area)
+
+    def totals(self):
+        """Total production and area per year, summed over crops in row order."""
+        return self.production.sum(axis=0), self.area.sum(axis=0)
+
+    def sorted_by_crop(self) -> "CropPanel":
+        order = sorted(range(len(self.crops)), key=lambda i: self.crops[i])
+        return CropPanel([self.crops[i] for i in order], self.years, self.production[order], self.area[order])
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(tmp_path, crops=np.array(self.crops), years=np.array(self.years, dtype=np.int64),
+                 production=self.production, area=self.area)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CropPanel":
+        with np.load(path) as data:
+            return cls(data['crops'].tolist(), data['years'].tolist(), data['production'], data['area'])
+
+
+def annual_aggregates(panel: CropPanel) -> Dict[str, np.ndarray]:
+    """
+    Totals over crops with both production and area, for years that have any.
+
+    Returns:
+        Arrays per aggregate year: year, p_total, a_total, y_bar (area-weighted
+        mean effective yield), plus column (position in panel.years)
+    """
+    valid = (panel.production > 0) & (panel.area > 0)
+    production = np.where(valid, panel.production, 0.0)
+    area = np.where(valid, panel.area, 0.0)
+
+    p_total = production.sum(axis=0)
+    a_total = area.sum(axis=0)
+    columns = np.flatnonzero(valid.any(axis=0) & (a_total > 0))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = area[:, columns] / a_total[columns]
+        effective_yield = np.where(valid, panel.production / np.where(valid, panel.area, 1.0), 0.0)
+    y_bar = (shares * effective_yield[:, columns]).sum(axis=0)
+
+    return {
+        "column": columns,
+        "year": np.array(panel.years, dtype=np.int64)[columns],
+        "p_total": p_total[columns],
+        "a_total": a_total[columns],
+        "y_bar": y_bar,
+    }
+
+
+def _decomposition_pass(panel: CropPanel) -> dict:
+    """Shared arrays of decompose and decompose_groups, over consecutive aggregate years."""
+    aggregates = annual_aggregates(panel)
+    columns = aggregates["column"]
+
+    valid = (panel.production > 0) & (panel.area > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_yield = np.where(valid, np.log(panel.production / np.where(valid, panel.area, 1.0)), 0.0)
+
+    prev, curr = columns[:-1], columns[1:]
+    ok = (
+        (aggregates["p_total"][:-1] > 0) & (aggregates["a_total"][:-1] > 0)
+        & (aggregates["p_total"][1:] > 0) & (aggregates["a_total"][1:] > 0)
+    )
+
+    # Within-crop yield effect per crop: crops grown in both years, weighted by earlier area share
+    common = valid[:, prev] & valid[:, curr]
+    shares = panel.area[:, prev] / aggregates["a_total"][:-1]
+    crop_within = np.where(common, shares * (log_yield[:, curr] - log_yield[:, prev]), 0.0)
+
+    return {
+        "aggregates": aggregates,
+        "valid": valid,
+        "ok": ok,
+        "prev": prev,
+        "curr": curr,
+        "crop_within": crop_within,
+    }
+
+
+def decompose(panel: CropPanel) -> Dict[str, np.ndarray]:
+    """
+    Year-over-year decomposition of log production growth.
+
+    Crops are taken in name order so results do not depend on row order.
+
+    Returns:
+        Arrays per year with a previous aggregate year: year, delta_ln_p,
+        delta_ln_a, delta_ln_y_bar, within_effective_yield, crop_mix
+    """
+    return _national_effects(_decomposition_pass(panel.sorted_by_crop()))
+
+
+def _national_effects(state: dict) -> Dict[str, np.ndarray]:
+    """The arrays of decompose, from a _decomposition_pass state."""
+    aggregates, ok = state["aggregates"], state["ok"]
+
+    log_p = np.log(aggregates["p_total"])
+    log_a = np.log(aggregates["a_total"])
+    log_y_bar = np.log(aggregates["y_bar"])
+    within = state["crop_within"].sum(axis=0)
+
+    delta_ln_y_bar = np.diff(log_y_bar)
+    return {
+        "year": aggregates["year"][1:][ok],
+        "delta_ln_p": np.diff(log_p)[ok],
+        "delta_ln_a": np.diff(log_a)[ok],
+        "delta_ln_y_bar": delta_ln_y_bar[ok],
+        "within_effective_yield": within[ok],
+        "crop_mix": (delta_ln_y_bar - within)[ok],
+    }
+
+
+def group_membership(crops: List[str], groups: Dict[str, List[str]]):
+    """
+    (group names, groups x crops 0/1 matrix) for a grouping of panel crops.
+
+    Panel crops the grouping does not list go into OTHER_GROUP; listed
+    crops that are not in the panel are ignored.
+    """
+    rows = {crop: i for i, crop in enumerate(crops)}
+    names = list(groups)
+    membership = np.zeros((len(names), len(crops)))
+    for g, name in enumerate(names):
+        for crop in groups[name]:
+            if crop in rows:
+                membership[g, rows[crop]] = 1.0
+
+    overlap = membership.sum(axis=0) > 1
+    if overlap.any():
+        duplicated = [crop for crop, flag in zip(crops, overlap) if flag]
+        raise ValueError(f"Crops in more than one group: {', '.join(duplicated)}")
+
+    ungrouped = membership.sum(axis=0) == 0
+    if ungrouped.any():
+        names.append(OTHER_GROUP)
+        membership = np.vstack([membership, ungrouped.astype(float)])
+    return names, membership
+
+
+def group_sums(membership: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    (groups, years) sums of a (crops, years) array over each group's crops.
+
+    Summed in crop order rather than with a matrix product, so a year's
+    result does not depend on which other years are in the array.
+    """
+    return (membership[:, :, None] * values[None, :, :]).sum(axis=1)
+
+
+def decompose_groups(panel: CropPanel, groups: Dict[str, List[str]]) -> Dict[str, object]:
+    """
+    decompose plus the two-level split by crop group.
+
+    Returns:
+        The arrays of decompose, plus between_group_mix and within_group_mix
+        per year (they add up to crop_mix), "groups" (group names) and
+        (groups, years) arrays: group_area_share (S_g in the later year),
+        group_within_effective_yield and group_within_mix (each group's
+        part of the national effect; they sum over groups to
+        within_effective_yield and within_group_mix)
+    """
+    panel = panel.sorted_by_crop()
+    state = _decomposition_pass(panel)
+    result = _national_effects(state)
+    aggregates, valid, ok = state["aggregates"], state["valid"], state["ok"]
+    columns = aggregates["column"]
+    names, membership = group_membership(panel.crops, groups)
+
+    # Group totals over crops with both production and area
+    production = np.where(valid, panel.production, 0.0)[:, columns]
+    area = np.where(valid, panel.area, 0.0)[:, columns]
+    group_production = group_sums(membership, production)
+    group_area = group_sums(membership, area)
+    area_share = group_area / aggregates["a_total"]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_group_yield = np.log(group_production / group_area)
+
+    # Groups present in both years: share-weighted change of group mean yield
+    common = (group_area[:, :-1] > 0) & (group_area[:, 1:] > 0)
+    group_change = np.where(common, area_share[:, :-1] * (log_group_yield[:, 1:] - log_group_yield[:, :-1]), 0.0)
+
+    group_within = group_sums(membership, state["crop_within"])
+    group_mix = group_change - group_within
+
+    delta_ln_y_bar = np.diff(np.log(aggregates["y_bar"]))
+    result.update({
+        "between_group_mix": (delta_ln_y_bar - group_change.sum(axis=0))[ok],
+        "within_group_mix": group_mix.sum(axis=0)[ok],
+        "groups": names,
+        "group_area_share": area_share[:, 1:][:, ok],
+        "group_within_effective_yield": group_within[:, ok],
+        "group_within_mix": group_mix[:, ok],
+    })
+    return result
+
+
+def decomposition_records(decomposition: Dict[str, np.ndarray]) -> List[dict]:
+    """The decomposition as one dict per year (the log_changes list of the grain outputs)."""
+    keys = list(decomposition)
+    columns = [decomposition[key].tolist() for key in keys]
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+# Per-group arrays of decompose_groups and their keys in group_decomposition_records
+GROUP_FIELDS = {
+    "group_area_share": "area_share",
+    "group_within_effective_yield": "within_effective_yield",
+    "group_within_mix": "within_group_mix",
+}
+
+
+def group_decomposition_records(decomposition: Dict[str, object]) -> List[dict]:
+    """decompose_groups output as one dict per year, with a "groups" dict of per-group effects."""
+    names = decomposition["groups"]
+    national = {key: value for key, value in decomposition.items()
+                if key != "groups" and key not in GROUP_FIELDS}
+    records = decomposition_records(national)
+
+    by_group = {field: decomposition[key].T.tolist() for key, field in GROUP_FIELDS.items()}
+    for i, record in enumerate(records):
+        record["groups"] = {
+            name: {field: by_group[field][i][g] for field in by_group}
+            for g, name in enumerate(names)
+        }
+    return records
+
+
+def load_groupings(path: Path) -> Dict[str, List[str]]:
+    """
+    Group name -> crops from a JSON grouping file, either in the
+    crop_groupings.json layout ({"crop_groupings": {name: {"crops": [...]}}})
+    or as a plain {name: [crops]} mapping.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        groupings = json.load(f)
+    groupings = groupings.get("crop_groupings", groupings)
+    return {name: group["crops"] if isinstance(group, dict) else list(group) for name, group in groupings.items()}
+
+
+def default_panel_path(geo_slug: str = "canada") -> Path:
+    return Path(__file__).parent.parent / "data" / "cache" / "grain_panels" / f"{geo_slug}.npz"
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    geo = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("--geo=")), "canada")
+    if not args:
+        print("Usage: python src/grain_decomposition.py groupings.json [output.json] [--geo=<slug>]")
+        exit(1)
+
+    try:
+        panel_path = default_panel_path(geo)
+        if not panel_path.exists():
+            raise FileNotFoundError(f"{panel_path} not found; run fetch_grain_production_data.py first")
+
+        started = time.perf_counter()
+        panel = CropPanel.load(panel_path)
+        groups = load_groupings(Path(args[0]))
+        decomposition = decompose_groups(panel, groups)
+        records = group_decomposition_records(decomposition)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        names = decomposition["groups"]
+        print(f"✓ {len(names)} groups over {len(panel.crops)} crops x {len(panel.years)} years in {elapsed:.1f} ms")
+        print(f"  {'Cumulative (log points x 100)':<32} {'within yield':>12} {'within mix':>12}")
+        for name in names:
+            within = sum(r["groups"][name]["within_effective_yield"] for r in records) * 100
+            mix = sum(r["groups"][name]["within_group_mix"] for r in records) * 100
+            print(f"  {name:<32} {within:>12.1f} {mix:>12.1f}")
+        print(f"  {'Between-group mix':<32} {sum(r['between_group_mix'] for r in records) * 100:>25.1f}")
+
+        if len(args) > 1:
+            with open(args[1], 'w', encoding='utf-8') as f:
+                json.dump({"groups": names, "data": records}, f, indent=2)
+            print(f"✓ Saved to {args[1]}")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        exit(1)
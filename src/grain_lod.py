@@ -0,0 +1,279 @@
+"""
+Level-of-detail versions of the grain series, for charts narrower than the 1908-present history.
+
+Each series is written at three resolutions:
+
+    full        the output file itself, one point per year
+    decimated   grain_lod/<name>.decimated.json, at most DECIMATED_POINTS years
+                picked by largest-triangle-three-buckets (LTTB), which keeps
+                peaks and troughs; values are the annual values
+    decade      grain_lod/<name>.decade.json, one point per decade
+
+for grain_production_by_year, grain_area_by_year, grain_crop_components
+(one LTTB pick per crop, shared by its measures) and grain_decomposition.
+The decomposition is a waterfall of log changes, so its coarser levels
+sum the changes over runs of years (ending at the LTTB picks of the
+cumulative change, or over each decade) and the cumulative bars still end
+at the exact cumulative change. Level documents carry their "level", and
+aggregated ones list their periods as [year, first year, last year]. A
+decade is plotted at its middle year (bucket_year) in every series, and a
+decimated run at the LTTB pick that ends it, so the levels of different
+series line up on one chart.
+
+grain_lod/index.json lists the levels of every series with the number of
+years each plots; src/data/grainLod.js picks the finest level that fits
+a chart's pixel width. Files keep the layouts of the full outputs
+(grain_crop_components and grain_decomposition via grain_codec).
+fetch_grain_production_data writes them with its outputs; for an
+existing output directory:
+
+    python src/grain_lod.py public/data
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from grain_codec import AREA_MEASURE, BAR_OFFSET, PRODUCTION_MEASURE, YIELD_MEASURE, encode_crop_components, \
+    encode_decomposition, load_grain_json
+
+LOD_DIR = "grain_lod"
+LOD_INDEX_VERSION = 1
+LOD_LEVELS = ["full", "decimated", "decade"]
+
+# Years kept by the decimated level
+DECIMATED_POINTS = 40
+DECADE = 10
+
+
+def lttb_indices(xs: List[float], ys: List[float], threshold: int) -> List[int]:
+    """
+    Indices of the points kept by largest-triangle-three-buckets downsampling.
+
+    The first and last points are always kept; every bucket in between
+    keeps the point forming the largest triangle with the previously kept
+    point and the mean of the next bucket.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, next_start):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def decade_buckets(years: List[int]) -> List[List[int]]:
+    """Years grouped by decade, in order."""
+    buckets = {}
+    for year in years:
+        buckets.setdefault(year // DECADE, []).append(year)
+    return [buckets[decade] for decade in sorted(buckets)]
+
+
+def bucket_year(bucket: List[int]) -> int:
+    """Year plotted for an aggregated run of years: the middle of the years present."""
+    return (bucket[0] + bucket[-1]) // 2
+
+
+def decimate_annual(document: dict) -> dict:
+    """Decimated level of a {data: [{year, value}]} series."""
+    data = document["data"]
+    keep = lttb_indices([d["year"] for d in data], [d["value"] for d in data], DECIMATED_POINTS)
+    return {**document, "data": [data[i] for i in keep]}
+
+
+def decade_annual(document: dict) -> dict:
+    """Decade level of a {data: [{year, value}]} series: the mean of each decade."""
+    values = {d["year"]: d["value"] for d in document["data"]}
+    buckets = decade_buckets(sorted(values))
+    return {
+        **document,
+        "data": [
+            {"year": bucket_year(bucket), "value": sum(values[y] for y in bucket) / len(bucket)}
+            for bucket in buckets
+        ],
+        "periods": [[bucket_year(bucket), bucket[0], bucket[-1]] for bucket in buckets],
+    }
+
+
+def crop_measure_values(document: dict) -> Dict[str, Dict[str, Dict[int, float]]]:
+    """crop -> measure -> {year: value} of a legacy grain_crop_components document."""
+    values = {}
+    for record in document["data"]:
+        values.setdefault(record["crop"], {}).setdefault(record["measure"], {})[record["year"]] = record["value"]
+    return values
+
+
+def decimate_crop_components(document: dict) -> dict:
+    """Decimated level of grain_crop_components: per crop, the union of the LTTB picks of its stored measures."""
+    kept = {}
+    for crop, measures in crop_measure_values(document).items():
+        kept[crop] = set()
+        for measure, series in measures.items():
+            if measure == YIELD_MEASURE:
+                continue
+            years = sorted(series)
+            keep = lttb_indices(years, [series[y] for y in years], DECIMATED_POINTS)
+            kept[crop].update(years[i] for i in keep)
+    return {**document, "data": [r for r in document["data"] if r["year"] in kept[r["crop"]]]}
+
+
+def decade_crop_components(document: dict) -> dict:
+    """
+    Decade level of grain_crop_components: mean production and seeded area
+    of each decade, with effective yield as their ratio.
+    """
+    values = crop_measure_values(document)
+    buckets = decade_buckets(sorted({r["year"] for r in document["data"]}))
+
+    data = []
+    for crop in sorted(values):
+        measures = values[crop]
+        for bucket in buckets:
+            year = bucket_year(bucket)
+            means = {}
+            for measure, series in measures.items():
+                present = [series[y] for y in bucket if y in series]
+                if measure != YIELD_MEASURE and present:
+                    means[measure] = sum(present) / len(present)
+                    data.append({"year": year, "crop": crop, "measure": measure, "value": means[measure]})
+            production = means.get(PRODUCTION_MEASURE)
+            area = means.get(AREA_MEASURE)
+            if production and area:
+                data.append({"year": year, "crop": crop, "measure": YIELD_MEASURE, "value": production / area})
+
+    return {
+        **document,
+        "data": data,
+        "periods": [[bucket_year(bucket), bucket[0], bucket[-1]] for bucket in buckets],
+    }
+
+
+def aggregate_waterfall(encoded: dict, bucket_ends: List[int], plot_year=None) -> dict:
+    """
+    Waterfall-layout grain_decomposition with the component changes summed
+    over runs of years, each ending at one of bucket_ends (indices into the years).
+    plot_year maps a run's years to the year it is plotted at (default: its last year).
+    """
+    years, values = encoded["years"], encoded["values"]
+
+    run_years = []
+    run_values = [[] for _ in values]
+    periods = []
+    start = 0
+    for end in bucket_ends:
+        year = plot_year(years[start:end + 1]) if plot_year else years[end]
+        run_years.append(year)
+        periods.append([year, years[start], years[end]])
+        for c, component in enumerate(values):
+            run_values[c].append(sum(component[start:end + 1]))
+        start = end + 1
+
+    gaps = [b - a for a, b in zip(run_years, run_years[1:])]
+    return {
+        **encoded,
+        "barOffset": BAR_OFFSET * min(gaps, default=1),
+        "years": run_years,
+        "values": run_values,
+        "periods": periods,
+    }
+
+
+def decimate_decomposition(document: dict) -> dict:
+    """Decimated level of grain_decomposition: runs ending at the LTTB picks of the cumulative change."""
+    encoded = encode_decomposition(document)
+    years = encoded["years"]
+    cumulative = []
+    total = 0.0
+    for i in range(len(years)):
+        total += sum(component[i] for component in encoded["values"])
+        cumulative.append(total)
+    return aggregate_waterfall(encoded, lttb_indices(years, cumulative, DECIMATED_POINTS))
+
+
+def decade_decomposition(document: dict) -> dict:
+    """Decade level of grain_decomposition: the change over each decade, plotted at its middle year."""
+    encoded = encode_decomposition(document)
+    ends = []
+    for bucket in decade_buckets(encoded["years"]):
+        ends.append((ends[-1] if ends else -1) + len(bucket))
+    return aggregate_waterfall(encoded, ends, bucket_year)
+
+
+# Output name -> (decimated level, decade level), from the legacy document
+LOD_BUILDERS = {
+    "grain_production_by_year": (decimate_annual, decade_annual),
+    "grain_area_by_year": (decimate_annual, decade_annual),
+    "grain_crop_components": (decimate_crop_components, decade_crop_components),
+    "grain_decomposition": (decimate_decomposition, decade_decomposition),
+}
+
+
+def plotted_years(document: dict) -> int:
+    """Most years plotted by one line of a legacy or waterfall-layout document (one crop of grain_crop_components)."""
+    if "years" in document:
+        return len(document["years"])
+    if "cumulativeData" in document:
+        return len(document["uniqueYears"])
+    years = {}
+    for record in document["data"]:
+        years.setdefault(record.get("crop"), set()).add(record["year"])
+    return max(map(len, years.values()), default=0)
+
+
+def write_grain_lod(output_dir: Path, documents: Dict[str, dict]) -> dict:
+    """
+    Write the decimated and decade levels of the legacy documents
+    (output name -> document) and grain_lod/index.json.
+
+    Returns:
+        The index
+    """
+    lod_dir = output_dir / LOD_DIR
+    lod_dir.mkdir(parents=True, exist_ok=True)
+
+    index = {"version": LOD_INDEX_VERSION, "levels": LOD_LEVELS, "series": {}}
+    for name, document in documents.items():
+        levels = [{"level": "full", "name": name, "points": plotted_years(document)}]
+        for level, build in zip(LOD_LEVELS[1:], LOD_BUILDERS[name]):
+            lod = {**build(document), "level": level}
+            levels.append({"level": level, "name": f"{LOD_DIR}/{name}.{level}", "points": plotted_years(lod)})
+            if name == "grain_crop_components":
+                lod = encode_crop_components(lod)
+            with open(lod_dir / f"{name}.{level}.json", 'w', encoding='utf-8') as f:
+                json.dump(lod, f, separators=(',', ':'))
+        index["series"][name] = levels
+
+    with open(lod_dir / "index.json", 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python src/grain_lod.py <output dir>")
+        exit(1)
+
+    output_dir = Path(sys.argv[1])
+    documents = {name: load_grain_json(output_dir / f"{name}.json") for name in LOD_BUILDERS}
+    index = write_grain_lod(output_dir, documents)
+    for name, levels in index["series"].items():
+        points = ", ".join(f"{level['level']} {level['points']}" for level in levels)
+        print(f"✓ {name}: {points} years")
@@ -0,0 +1,225 @@
+"""
+Contributions of every node of the CPI weight tree to its parent and to All-items.
+
+The tree (CPI_HIERARCHY, see cpi_hierarchy) is the drill-down hierarchy of
+the inflation icicle chart, in StatCan product names. Weights come from
+basket_weights.json (all_weights_pct, percent of the All-items basket) and
+index series from all_subcategories.json, matched through ALL_CATEGORIES.
+
+For each node and period:
+    contribution            weight / 100 x percentage change (pp of All-items)
+    contribution_to_parent  weight / parent weight x percentage change (pp of parent)
+
+The tree is walked once per batch of periods, bottom-up, with every node's
+values held as NumPy arrays over the periods. A node without its own series
+takes its percentage change from its children's already computed results
+(weighted by their weights), so All-items and any gaps are filled in
+without recomputing subtrees.
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from calculate_contributions import IndexedSeries
+from cpi_hierarchy import ALL_CATEGORIES, CPI_HIERARCHY
+from cpi_series import month_ordinal, ordinal_to_date
+from series_codec import load_series_json
+
+ALL_ITEMS = "All-items"
+
+
+class WeightNode:
+    """One node of the weight tree and, after compute(), its per-period results."""
+    
+    def __init__(self, name: str, weight: float, children: List["WeightNode"]):
+        self.name = name
+        self.category = ALL_CATEGORIES.get(name, name)
+        self.weight = weight
+        self.children = children
+        self.series: Optional[IndexedSeries] = None
+    
+    def walk(self):
+        """Yield this node and all its descendants (pre-order)."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def build_weight_tree(weights_pct: Dict[str, float], tree: dict = None, name: str = ALL_ITEMS) -> WeightNode:
+    """
+    Build the weight tree below `name`.
+    
+    Nodes with no weight are dropped unless they still have children, as in the chart.
+    """
+    if tree is None:
+        tree = CPI_HIERARCHY
+    
+    children = []
+    for child_name, subtree in tree.items():
+        child = build_weight_tree(weights_pct, subtree, child_name)
+        if child.weight > 0 or child.children:
+            children.append(child)
+    
+    weight = 100.0 if name == ALL_ITEMS else weights_pct.get(name, 0.0)
+    return WeightNode(name, weight, children)
+
+
+class HierarchyContributionEngine:
+    """
+    Contributions across the full CPI hierarchy for any number of periods.
+    
+    Args:
+        series_data: Parsed all_subcategories.json
+        weights_data: Parsed basket_weights.json
+    """
+    
+    def __init__(self, series_data: Dict, weights_data: Dict):
+        self.root = build_weight_tree(weights_data.get('all_weights_pct', {}))
+        
+        series_by_category = {series['category']: series['data'] for series in series_data['series']}
+        for node in self.root.walk():
+            data = series_by_category.get(node.category)
+            if data:
+                node.series = IndexedSeries(node.category, data)
+    
+    @classmethod
+    def from_files(cls, series_path: Path, weights_path: Path):
+        """Load all_subcategories.json and basket_weights.json once."""
+        series_data = load_series_json(series_path)
+        with open(weights_path, 'r', encoding='utf-8') as f:
+            weights_data = json.load(f)
+        return cls(series_data, weights_data)
+    
+    def compute(self, start_ordinals: np.ndarray, end_ordinals: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Vectorized results for every node over N (start, end) month-ordinal pairs.
+        
+        Returns:
+            StatCan name -> arrays of length N (NaN where not computable):
+                percentage_change, contribution, contribution_to_parent,
+                children_contribution (sum of the children's contribution_to_parent)
+        """
+        start_ordinals = np.asarray(start_ordinals, dtype=np.int64)
+        end_ordinals = np.asarray(end_ordinals, dtype=np.int64)
+        results = {}
+        
+        def evaluate(node: WeightNode, parent_weight: float) -> np.ndarray:
+            # Children first, so their results can stand in for a missing series
+            child_pct = [(child, evaluate(child, node.weight)) for child in node.children]
+            
+            pct_change = np.full(len(start_ordinals), np.nan)
+            if node.series is not None:
+                start_values = node.series.values_at(start_ordinals)
+                end_values = node.series.values_at(end_ordinals)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    pct_change = np.where(start_values == 0, np.nan, (end_values / start_values - 1) * 100)
+            
+            children_contribution = np.full(len(start_ordinals), np.nan)
+            if child_pct:
+                weighted = np.zeros(len(start_ordinals))
+                covered = np.zeros(len(start_ordinals))
+                for child, pct in child_pct:
+                    valid = ~np.isnan(pct)
+                    weighted += np.where(valid, child.weight * np.nan_to_num(pct), 0.0)
+                    covered += np.where(valid, child.weight, 0.0)
+                if node.weight > 0:
+                    children_contribution = np.where(covered > 0, weighted / node.weight, np.nan)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    derived = np.where(covered > 0, weighted / covered, np.nan)
+                pct_change = np.where(np.isnan(pct_change), derived, pct_change)
+            
+            results[node.name] = {
+                'percentage_change': pct_change,
+                'contribution': node.weight / 100 * pct_change,
+                'contribution_to_parent': (node.weight / parent_weight * pct_change
+                                           if parent_weight > 0 else np.full(len(start_ordinals), np.nan)),
+                'children_contribution': children_contribution,
+            }
+            return pct_change
+        
+        evaluate(self.root, self.root.weight)
+        return results
+    
+    def calculate_batch(self, periods: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Contribution trees for many (start_date, end_date) pairs.
+        
+        Each result has the shape the icicle chart draws: startDate, endDate,
+        totalOverallInflation, totalContribution and a nested contributions list.
+        """
+        results = self.compute(
+            [month_ordinal(start) for start, _ in periods],
+            [month_ordinal(end) for _, end in periods],
+        )
+        
+        def value(name: str, key: str, n: int) -> Optional[float]:
+            v = results[name][key][n]
+            return None if np.isnan(v) else float(v)
+        
+        def to_tree(node: WeightNode, n: int) -> Dict:
+            tree = {
+                'name': node.category,
+                'statcanName': node.name,
+                'weight': node.weight / 100,
+                'percentageChange': value(node.name, 'percentage_change', n),
+                'contribution': value(node.name, 'contribution', n),
+                'contributionToParent': value(node.name, 'contribution_to_parent', n),
+            }
+            if node.children:
+                tree['childrenContribution'] = value(node.name, 'children_contribution', n)
+                tree['children'] = sorted(
+                    (to_tree(child, n) for child in node.children),
+                    key=lambda c: abs(c['contribution'] or 0), reverse=True
+                )
+            return tree
+        
+        batch = []
+        for n, (start_date, end_date) in enumerate(periods):
+            root = to_tree(self.root, n)
+            total_contribution = sum(child['contribution'] or 0 for child in root['children'])
+            batch.append({
+                'startDate': start_date,
+                'endDate': end_date,
+                'totalOverallInflation': root['percentageChange'],
+                'totalContribution': total_contribution,
+                'contributions': root['children'],
+            })
+        return batch
+    
+    def calculate(self, start_date: str, end_date: str) -> Dict:
+        """Contribution tree for a single period."""
+        return self.calculate_batch([(start_date, end_date)])[0]
+
+
+if __name__ == "__main__":
+    project_root = Path(__file__).parent.parent
+    series_path = project_root / "data" / "all_subcategories.json"
+    weights_path = project_root / "data" / "basket_weights.json"
+    output_path = project_root / "data" / "hierarchy_contributions.json"
+    
+    try:
+        engine = HierarchyContributionEngine.from_files(series_path, weights_path)
+        
+        # Period from the command line, or the latest 12 months
+        if len(sys.argv) >= 3:
+            start_date, end_date = sys.argv[1], sys.argv[2]
+        else:
+            end_date = load_series_json(series_path)['date_range']['end']
+            start_date = ordinal_to_date(month_ordinal(end_date) - 12)
+        
+        results = engine.calculate(start_date, end_date)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        
+        print(f"Contributions to All-items, {start_date} to {end_date}:")
+        for node in results['contributions']:
+            print(f"  {node['name']:<25} {node['contribution'] or 0:>7.2f} pp")
+        print(f"  {'Total':<25} {results['totalContribution']:>7.2f} pp")
+        print(f"\n✓ Results saved to {output_path}")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        exit(1)
@@ -0,0 +1,238 @@
+"""
+Local SQLite store of every StatCan observation we fetch.
+
+Observations from all tables live in one indexed table keyed by
+(product ID, GEO, member path, UOM, reference period), where the member
+path joins a row's dimension members (e.g. "Food" for the CPI, or
+"Production (metric tonnes)|Wheat, all" for field crops). Fetchers bulk
+upsert full-table CSVs after downloading them, and consumers query single
+series instead of rescanning whole files, for example:
+
+    query_series(conn, "18100004", "Shelter", geo="Ontario", start="2019-01")
+"""
+
+import csv
+import io
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Separator between dimension members in member_path
+MEMBER_SEPARATOR = "|"
+
+# Rows per executemany batch during bulk loads
+UPSERT_BATCH_SIZE = 10000
+
+# Seconds a connection waits for another writer's lock before giving up.
+# A full-table load holds the write lock for tens of seconds.
+BUSY_TIMEOUT = 300
+
+# Table loads in this process take turns instead of racing for the write lock
+_write_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    product_id TEXT PRIMARY KEY,
+    member_columns TEXT NOT NULL,
+    release_time TEXT,
+    loaded_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS observations (
+    product_id TEXT NOT NULL,
+    geo TEXT NOT NULL,
+    member_path TEXT NOT NULL,
+    uom TEXT NOT NULL,
+    ref_period TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (product_id, geo, member_path, uom, ref_period)
+) WITHOUT ROWID;
+
+-- One series across every geography, or one period across every series
+CREATE INDEX IF NOT EXISTS idx_observations_member
+    ON observations (product_id, member_path, ref_period);
+CREATE INDEX IF NOT EXISTS idx_observations_period
+    ON observations (product_id, ref_period);
+"""
+
+
+def default_db_path() -> Path:
+    return Path(__file__).parent.parent / "data" / "statcan_observations.sqlite"
+
+
+def connect(db_path: Path = None) -> sqlite3.Connection:
+    """Open (and create if needed) the observation store."""
+    if db_path is None:
+        db_path = default_db_path()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def member_columns_from_header(header: List[str]) -> List[str]:
+    """Dimension columns of a StatCan CSV: everything between GEO/DGUID and UOM."""
+    start = header.index("DGUID") + 1 if "DGUID" in header else header.index("GEO") + 1
+    return header[start:header.index("UOM")]
+
+
+def upsert_table_csv(conn: sqlite3.Connection, product_id: str, csv_file, release_time: Optional[str] = None) -> int:
+    """
+    Bulk upsert every non-empty observation of a full-table CSV.
+
+    Args:
+        conn: Connection from connect()
+        product_id: Statistics Canada product ID the CSV belongs to
+        csv_file: Open text file (or io.StringIO) positioned at the header
+        release_time: StatCan release time of the data, if known
+
+    Returns:
+        Number of observations written
+    """
+    reader = csv.reader(csv_file)
+    header = next(reader)
+
+    member_columns = member_columns_from_header(header)
+    member_idx = [header.index(name) for name in member_columns]
+    geo_idx = header.index("GEO")
+    uom_idx = header.index("UOM")
+    date_idx = header.index("REF_DATE")
+    value_idx = header.index("VALUE")
+
+    sql = """
+        INSERT INTO observations (product_id, geo, member_path, uom, ref_period, value)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (product_id, geo, member_path, uom, ref_period)
+        DO UPDATE SET value = excluded.value
+    """
+
+    count = 0
+    batch = []
+    with _write_lock, conn:
+        for row in reader:
+            try:
+                value = float(row[value_idx])
+            except (ValueError, IndexError):
+                continue
+            member_path = MEMBER_SEPARATOR.join(row[i] for i in member_idx)
+            batch.append((product_id, row[geo_idx], member_path, row[uom_idx], row[date_idx], value))
+            if len(batch) >= UPSERT_BATCH_SIZE:
+                conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            count += len(batch)
+
+        conn.execute(
+            """
+            INSERT INTO tables (product_id, member_columns, release_time, loaded_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (product_id) DO UPDATE SET
+                member_columns = excluded.member_columns,
+                release_time = excluded.release_time,
+                loaded_at = excluded.loaded_at
+            """,
+            (product_id, json.dumps(member_columns), release_time, datetime.now().isoformat(timespec='seconds')),
+        )
+
+    logger.info(f"✓ Stored {count} observations for table {product_id}")
+    return count
+
+
+def store_table_file(product_id: str, csv_path: Path, release_time: Optional[str] = None, db_path: Path = None) -> int:
+    """Upsert a downloaded table CSV file into the store."""
+    conn = connect(db_path)
+    try:
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            return upsert_table_csv(conn, product_id, f, release_time)
+    finally:
+        conn.close()
+
+
+def store_table_content(product_id: str, csv_content: str, release_time: Optional[str] = None, db_path: Path = None) -> int:
+    """Upsert a table CSV already held in memory into the store."""
+    conn = connect(db_path)
+    try:
+        return upsert_table_csv(conn, product_id, io.StringIO(csv_content), release_time)
+    finally:
+        conn.close()
+
+
+def get_member_columns(conn: sqlite3.Connection, product_id: str) -> List[str]:
+    """Dimension column names making up member_path for a stored table."""
+    row = conn.execute("SELECT member_columns FROM tables WHERE product_id = ?", (product_id,)).fetchone()
+    if row is None:
+        raise KeyError(f"Table {product_id} is not in the observation store")
+    return json.loads(row[0])
+
+
+def query_series(
+    conn: sqlite3.Connection,
+    product_id: str,
+    member_path: str,
+    geo: str = "Canada",
+    uom: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Return (ref_period, value) pairs for one series, ordered by period.
+
+    Args:
+        product_id: Statistics Canada product ID
+        member_path: Dimension members joined with MEMBER_SEPARATOR
+        geo: Geography (default Canada)
+        uom: Unit of measure; any if None
+        start, end: Inclusive reference period bounds ('YYYY-MM' or 'YYYY')
+    """
+    sql = "SELECT ref_period, value FROM observations WHERE product_id = ? AND geo = ? AND member_path = ?"
+    params = [product_id, geo, member_path]
+    if uom is not None:
+        sql += " AND uom = ?"
+        params.append(uom)
+    if start is not None:
+        sql += " AND ref_period >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND ref_period <= ?"
+        params.append(end)
+    sql += " ORDER BY ref_period"
+    return conn.execute(sql, params).fetchall()
+
+
+def query_members(
+    conn: sqlite3.Connection,
+    product_id: str,
+    member_paths: Iterable[str],
+    geo: str = "Canada",
+    uom: Optional[str] = None,
+) -> Dict[str, List[Tuple[str, float]]]:
+    """Return {member_path: [(ref_period, value), ...]} for several series of one table."""
+    return {path: query_series(conn, product_id, path, geo=geo, uom=uom) for path in member_paths}
+
+
+def query_table(
+    conn: sqlite3.Connection,
+    product_id: str,
+    geo: Optional[str] = "Canada",
+) -> Iterable[Tuple[str, str, str, str, float]]:
+    """Iterate (geo, member_path, uom, ref_period, value) for a whole table (one GEO or all)."""
+    if geo is None:
+        return conn.execute(
+            "SELECT geo, member_path, uom, ref_period, value FROM observations WHERE product_id = ?",
+            (product_id,),
+        )
+    return conn.execute(
+        "SELECT geo, member_path, uom, ref_period, value FROM observations WHERE product_id = ? AND geo = ?",
+        (product_id, geo),
+    )
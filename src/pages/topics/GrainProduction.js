@@ -1,3 +1,5 @@
+import { loadDataJson } from "../../data/artifacts.js";
+
 export function GrainProductionPage() {
   return {
     title: "Grain Production",
@@ -766,10 +768,7 @@ function loadD3() {
 }
 
 function loadStatistics() {
-  const baseUrl = import.meta.env.BASE_URL;
-  
-  return fetch(baseUrl + 'data/grain_statistics.json')
-    .then(response => response.json())
+  return loadDataJson('grain_statistics')
     .then(stats => {
       document.getElementById('production-ratio').textContent = stats.productionRatio;
       document.getElementById('last-year').textContent = stats.lastYear;
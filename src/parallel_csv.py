@@ -0,0 +1,84 @@
+"""
+Parallel parsing of large StatCan CSVs.
+
+The file is split into byte ranges that start and end on line boundaries,
+and each range is parsed by a worker on a ProcessPoolExecutor. Workers
+return partial results, which the caller merges in file order.
+
+StatCan full-table CSVs have one record per line, so splitting on newlines
+never cuts a record in half.
+"""
+
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def read_header(csv_path: Path) -> Tuple[List[str], int]:
+    """Return (column names, byte offset where the data rows start)."""
+    with open(csv_path, 'rb') as f:
+        first_line = f.readline()
+    header = next(csv.reader([first_line.decode('utf-8-sig')]))
+    return header, len(first_line)
+
+
+def split_line_ranges(csv_path: Path, data_start: int, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Split the data part of a file into roughly equal byte ranges aligned on line starts.
+
+    Returns:
+        List of (start, end) byte offsets; ranges are contiguous and cover the file.
+    """
+    size = os.path.getsize(csv_path)
+    if size <= data_start or chunks <= 1:
+        return [(data_start, size)]
+
+    boundaries = [data_start]
+    step = (size - data_start) // chunks
+    with open(csv_path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(data_start + i * step)
+            f.readline()  # move to the start of the next line
+            pos = f.tell()
+            if boundaries[-1] < pos < size:
+                boundaries.append(pos)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def read_range_lines(csv_path: Path, start: int, end: int) -> io.StringIO:
+    """Read one byte range and return it as a line iterator (line endings untouched)."""
+    with open(csv_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return io.StringIO(data.decode('utf-8'), newline='')
+
+
+def map_csv_ranges(csv_path: Path, worker: Callable, *args, workers: int = None) -> list:
+    """
+    Run worker(csv_path, header, start, end, *args) over every byte range in parallel.
+
+    worker must be a module-level function (it is pickled to the pool).
+
+    Returns:
+        Worker results in file order
+    """
+    if workers is None:
+        workers = default_workers()
+
+    header, data_start = read_header(csv_path)
+    ranges = split_line_ranges(csv_path, data_start, workers)
+
+    if workers <= 1 or len(ranges) == 1:
+        return [worker(csv_path, header, start, end, *args) for start, end in ranges]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker, csv_path, header, start, end, *args) for start, end in ranges]
+        return [future.result() for future in futures]
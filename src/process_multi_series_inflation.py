@@ -3,11 +3,13 @@ Script to process inflation data for multi-series index chart visualization.
 Extracts the last 10 years of monthly Canada CPI data for 6 main categories.
 """
 
-import csv
+import sys
 from pathlib import Path
-from datetime import datetime
 import json
 
+from cpi_series import fetch_cpi_series
+from cpi_extract import SeriesExtractor, run_extractors
+
 # Category mapping: (category_name_in_csv, display_name)
 CATEGORIES = [
     ("All-items", "Overall"),
@@ -27,43 +29,34 @@ def process_multi_series_inflation_data(csv_path: Path, output_path: Path = None
         output_path: Path to save the processed JSON file
         years: Number of years of data to extract (default 10)
     """
+    results = run_extractors(csv_path, [multi_series_extractor(output_path)], years)
+    return results["multi_series"]
+
+
+def multi_series_extractor(output_path: Path = None) -> SeriesExtractor:
+    """Extractor for the shared CPI scan (see cpi_extract.run_extractors)."""
     if output_path is None:
         project_root = Path(__file__).parent.parent
         output_path = project_root / "data" / "inflation_multi_series.json"
     
-    # Dictionary to store data for each category
-    category_data = {display_name: [] for _, display_name in CATEGORIES}
-    
-    with open(csv_path, 'r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            geo = row.get('GEO', '').strip('"')
-            product = row.get('Products and product groups', '').strip('"')
-            uom = row.get('UOM', '').strip('"')
-            
-            # Filter for Canada, 2002=100
-            if geo == 'Canada' and uom == '2002=100':
-                # Check if this product matches any of our categories
-                for category_name, display_name in CATEGORIES:
-                    if product == category_name:
-                        # Parse date
-                        ref_date = row.get('REF_DATE', '').strip('"')
-                        value_str = row.get('VALUE', '').strip('"')
-                        try:
-                            date_obj = datetime.strptime(ref_date, '%Y-%m')
-                            value = float(value_str)
-                            
-                            category_data[display_name].append({
-                                'date': ref_date,
-                                'year': date_obj.year,
-                                'month': date_obj.month,
-                                'value': value
-                            })
-                        except (ValueError, KeyError):
-                            continue
-                        break  # Found match, move to next row
+    return SeriesExtractor("multi_series", dict(CATEGORIES), save_multi_series, output_path)
+
+
+def fetch_multi_series_inflation_data(output_path: Path = None, years: int = 10):
+    """
+    Fetch only the CATEGORIES series from the StatCan vector endpoints
+    (no full-table download) and save them like process_multi_series_inflation_data.
+    """
+    if output_path is None:
+        project_root = Path(__file__).parent.parent
+        output_path = project_root / "data" / "inflation_multi_series.json"
     
+    category_data = fetch_cpi_series(CATEGORIES, years)
+    return save_multi_series(category_data, output_path, years)
+
+
+def save_multi_series(category_data: dict, output_path: Path, years: int):
+    """Keep the last N years of each category and save the series JSON."""
     # Process each category
     series_data = []
     
@@ -118,5 +111,8 @@ if __name__ == "__main__":
     csv_path = project_root / "data" / "inflation_data.csv"
     output_path = project_root / "data" / "inflation_multi_series.json"
     
-    process_multi_series_inflation_data(csv_path, output_path, years=10)
+    if "--vectors" in sys.argv:
+        fetch_multi_series_inflation_data(output_path, years=10)
+    else:
+        process_multi_series_inflation_data(csv_path, output_path, years=10)
 
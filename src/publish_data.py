@@ -0,0 +1,161 @@
+"""
+Publish stage for the chart data in public/data/.
+
+Every data artifact (the JSON and CSV files under public/data/) is copied
+to public/data/hashed/ under a content-hashed name, with a gzip variant and,
+when the brotli module is installed, a brotli variant next to it:
+
+    hashed/all_subcategories.3f9c0a1b2d4e.json
+    hashed/all_subcategories.3f9c0a1b2d4e.json.gz
+    hashed/all_subcategories.3f9c0a1b2d4e.json.br
+
+(the names gzip_static / brotli_static style servers look for).
+public/data/manifest.json maps each logical name, e.g. "all_subcategories"
+or "grain_provinces/alberta/grain_statistics", to its hashed URL, size and
+hash. Hashed files never change, so they can be cached forever; a data
+update only changes the names of the files whose content changed. Files
+no longer referenced by the manifest are removed unless --keep is given.
+
+Run after the pipeline scripts (the deploy workflow runs it before the
+site build):
+
+    python src/publish_data.py [--keep]
+"""
+
+import gzip
+import hashlib
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+HASHED_DIR = "hashed"
+
+# Files published from public/data/
+ARTIFACT_SUFFIXES = {".json", ".csv"}
+
+# Hex digits of the SHA-256 kept in file names
+HASH_LENGTH = 12
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def iter_artifacts(data_dir: Path):
+    """Data files under data_dir, excluding the manifest and the hashed copies."""
+    for path in sorted(data_dir.rglob("*")):
+        relative = path.relative_to(data_dir)
+        if not path.is_file() or path.suffix not in ARTIFACT_SUFFIXES:
+            continue
+        if relative.parts[0] == HASHED_DIR or relative.as_posix() == MANIFEST_NAME:
+            continue
+        yield path
+
+
+def logical_name(path: Path, data_dir: Path) -> str:
+    """Manifest key of an artifact: its path under data_dir without the suffix."""
+    return path.relative_to(data_dir).with_suffix("").as_posix()
+
+
+def compressed_variants(data: bytes) -> dict:
+    """Encoding -> (file suffix, compressed bytes). gzip output has no timestamp, so it is reproducible."""
+    variants = {"gzip": (".gz", gzip.compress(data, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        variants["br"] = (".br", brotli.compress(data, quality=11))
+    return variants
+
+
+def publish_artifact(path: Path, data_dir: Path, hashed_dir: Path) -> tuple:
+    """
+    Write the hashed copy and compressed variants of one artifact (unless already there).
+
+    Returns:
+        (manifest entry, True if new files were written)
+    """
+    data = path.read_bytes()
+    digest = content_hash(data)
+    name = logical_name(path, data_dir)
+    hashed_name = f"{name}.{digest[:HASH_LENGTH]}{path.suffix}"
+    hashed_path = hashed_dir / hashed_name
+    url = f"{HASHED_DIR}/{hashed_name}"
+
+    written = False
+    entry = {"url": url, "size": len(data), "sha256": digest, "encodings": {}}
+    for encoding, (suffix, compressed) in compressed_variants(data).items():
+        variant_path = hashed_path.with_name(hashed_path.name + suffix)
+        if not variant_path.exists():
+            variant_path.parent.mkdir(parents=True, exist_ok=True)
+            variant_path.write_bytes(compressed)
+            written = True
+        entry["encodings"][encoding] = {"url": url + suffix, "size": len(compressed)}
+
+    if not hashed_path.exists():
+        hashed_path.parent.mkdir(parents=True, exist_ok=True)
+        hashed_path.write_bytes(data)
+        written = True
+    return entry, written
+
+
+def prune_hashed(hashed_dir: Path, manifest: dict) -> int:
+    """Remove hashed files the manifest no longer references."""
+    keep = set()
+    for entry in manifest["artifacts"].values():
+        keep.add(entry["url"])
+        keep.update(variant["url"] for variant in entry["encodings"].values())
+
+    removed = 0
+    for path in sorted(hashed_dir.rglob("*"), reverse=True):
+        if path.is_file() and f"{HASHED_DIR}/{path.relative_to(hashed_dir).as_posix()}" not in keep:
+            path.unlink()
+            removed += 1
+        elif path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+    return removed
+
+
+def publish(data_dir: Path = None, prune: bool = True) -> dict:
+    """Publish every artifact under data_dir and write its manifest.json."""
+    if data_dir is None:
+        data_dir = Path(__file__).parent.parent / "public" / "data"
+    hashed_dir = data_dir / HASHED_DIR
+
+    artifacts = {}
+    changed = []
+    for path in iter_artifacts(data_dir):
+        entry, written = publish_artifact(path, data_dir, hashed_dir)
+        name = logical_name(path, data_dir)
+        artifacts[name] = entry
+        if written:
+            changed.append(name)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated": datetime.now().isoformat(timespec='seconds'),
+        "encodings": ["gzip"] + (["br"] if brotli is not None else []),
+        "artifacts": artifacts,
+    }
+    tmp_path = data_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    tmp_path.replace(data_dir / MANIFEST_NAME)
+
+    removed = prune_hashed(hashed_dir, manifest) if prune and hashed_dir.exists() else 0
+
+    print(f"✓ Published {len(artifacts)} artifacts ({len(changed)} changed, {removed} stale files removed)")
+    for name in changed:
+        print(f"   - {name}")
+    if brotli is None:
+        print("⚠ brotli not installed, wrote gzip variants only")
+    return manifest
+
+
+if __name__ == "__main__":
+    publish(prune="--keep" not in sys.argv)
@@ -0,0 +1,292 @@
+"""
+Local HTTP query service for CPI series and contributions.
+
+Loads the log-level index (see cpi_log_index) and the hierarchy
+contribution engine once, then answers JSON GET requests:
+
+    /series?name=Food&start=2020-01&end=2024-12   index values for a range
+    /yoy?name=Food&start=2020-01                    12-month % changes
+    /change?start=2024-11&end=2025-11&name=Food&name=Shelter
+    /contributions?start=2024-11&end=2025-11&node=Food
+    /stats                                          cache and latency stats
+
+Series may be named by StatCan product name or chart display name; /change
+takes one name= parameter per series, since product names contain commas.
+Responses are kept in a bounded LRU cache, and /stats reports request
+latency percentiles. Run it next to the Vite dev server:
+
+    python src/query_service.py [port]
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from cpi_log_index import LogIndex, load_log_index
+from cpi_series import ordinal_to_date
+from fetch_all_subcategories import ALL_CATEGORIES
+from hierarchy_contributions import HierarchyContributionEngine
+from process_multi_series_inflation import CATEGORIES
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+# Responses kept in the LRU cache
+DEFAULT_CACHE_SIZE = 1024
+
+# Request latencies kept for the percentiles in /stats
+LATENCY_WINDOW = 10000
+
+
+class QueryError(ValueError):
+    """Bad request parameters (answered with HTTP 400)."""
+
+
+class LRUCache:
+    """Bounded, thread-safe least-recently-used cache."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+def param(params: Dict[str, List[str]], name: str, default: Optional[str] = None) -> Optional[str]:
+    """Last value of a query parameter, or default if it is absent."""
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+class QueryService:
+    """
+    Query handlers over data loaded once at startup.
+
+    Args:
+        data_dir: Directory with the CPI series JSON files and basket_weights.json
+        cache_size: Maximum number of cached responses
+    """
+
+    def __init__(self, data_dir: Path = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        if data_dir is None:
+            data_dir = Path(__file__).parent.parent / "data"
+
+        self.index: LogIndex = load_log_index(data_dir)
+        self.hierarchy = HierarchyContributionEngine.from_files(
+            data_dir / "all_subcategories.json", data_dir / "basket_weights.json"
+        )
+
+        # Display names -> StatCan product names
+        self.aliases = {display_name: product for product, display_name in ALL_CATEGORIES.items()}
+        self.aliases.update({display_name: product for product, display_name in CATEGORIES})
+
+        self.cache = LRUCache(cache_size)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.latency_lock = threading.Lock()
+
+        self.handlers = {
+            "/series": self.series,
+            "/yoy": self.yoy,
+            "/change": self.change,
+            "/contributions": self.contributions,
+        }
+
+    # Parameter helpers
+
+    def series_name(self, name: Optional[str]) -> str:
+        if not name:
+            raise QueryError("Missing parameter: name")
+        product = name if name in self.index.columns else self.aliases.get(name)
+        if product not in self.index.columns:
+            raise QueryError(f"Unknown series: {name}")
+        return product
+
+    def month_bounds(self, params: Dict[str, List[str]]) -> tuple:
+        """Row positions for the optional start/end parameters (default: whole index)."""
+        first, last = self.index.date_range
+        try:
+            start, end = self.index.positions([param(params, "start", first), param(params, "end", last)])
+        except ValueError as e:
+            raise QueryError(str(e))
+        if start > end:
+            raise QueryError("start must not be after end")
+        return int(start), int(end)
+
+    def period(self, params: Dict[str, List[str]]) -> tuple:
+        if param(params, "start") is None or param(params, "end") is None:
+            raise QueryError("Missing parameter: start and end are required")
+        self.month_bounds(params)
+        return param(params, "start"), param(params, "end")
+
+    # Handlers
+
+    def series(self, params: Dict[str, List[str]]) -> dict:
+        product = self.series_name(param(params, "name"))
+        start, end = self.month_bounds(params)
+        values = self.index.levels(product)[start:end + 1]
+        return {
+            "name": product,
+            "dates": [ordinal_to_date(self.index.first + i) for i in range(start, end + 1)],
+            "values": [None if np.isnan(v) else round(v, 6) for v in values.tolist()],
+        }
+
+    def yoy(self, params: Dict[str, List[str]]) -> dict:
+        product = self.series_name(param(params, "name"))
+        start, end = self.month_bounds(params)
+        start = max(start, 12)
+        column = self.index.log_levels[:, self.index.columns[product]]
+        changes = np.expm1(column[start:end + 1] - column[start - 12:end - 11]) * 100 if start <= end else np.array([])
+        return {
+            "name": product,
+            "dates": [ordinal_to_date(self.index.first + i) for i in range(start, end + 1)],
+            "yoy_pct": [None if np.isnan(v) else v for v in changes.tolist()],
+        }
+
+    def change(self, params: Dict[str, List[str]]) -> dict:
+        start, end = self.period(params)
+        names = params.get("name", [])
+        products = [self.series_name(name) for name in names] if names else None
+        return {
+            "start_date": start,
+            "end_date": end,
+            "percentage_change": self.index.percentage_change(start, end, products),
+        }
+
+    def contributions(self, params: Dict[str, List[str]]) -> dict:
+        start, end = self.period(params)
+        result = self.hierarchy.calculate(start, end)
+        node = param(params, "node")
+        if not node:
+            return result
+
+        def find(nodes):
+            for tree in nodes:
+                if node in (tree["name"], tree["statcanName"]):
+                    return tree
+                found = find(tree.get("children", []))
+                if found is not None:
+                    return found
+            return None
+
+        tree = find(result["contributions"])
+        if tree is None:
+            raise QueryError(f"Unknown node: {node}")
+        return {"startDate": start, "endDate": end, **tree}
+
+    def stats(self) -> dict:
+        with self.latency_lock:
+            latencies = np.array(self.latencies)
+        percentiles = {}
+        if len(latencies):
+            for p in (50, 90, 99):
+                percentiles[f"p{p}_ms"] = float(np.percentile(latencies, p)) * 1000
+        return {
+            "requests": len(latencies),
+            "latency": percentiles,
+            "cache": {
+                "size": len(self.cache.entries),
+                "max_size": self.cache.max_size,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+        }
+
+    def handle(self, path: str, params: Dict[str, List[str]]) -> tuple:
+        """
+        Answer one request (params as parsed by urllib.parse.parse_qs).
+
+        Returns:
+            (HTTP status, JSON body as bytes)
+        """
+        if path == "/stats":
+            return 200, json.dumps(self.stats()).encode("utf-8")
+
+        handler = self.handlers.get(path)
+        if handler is None:
+            return 404, json.dumps({"error": f"Unknown endpoint: {path}"}).encode("utf-8")
+
+        key = (path, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+        body = self.cache.get(key)
+        if body is None:
+            try:
+                body = json.dumps(handler(params)).encode("utf-8")
+            except QueryError as e:
+                return 400, json.dumps({"error": str(e)}).encode("utf-8")
+            self.cache.put(key, body)
+        return 200, body
+
+    def record_latency(self, seconds: float):
+        with self.latency_lock:
+            self.latencies.append(seconds)
+
+
+def make_handler(service: QueryService):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            started = time.perf_counter()
+            url = urlsplit(self.path)
+            try:
+                status, body = service.handle(url.path, parse_qs(url.query))
+            except Exception as e:
+                logger.exception(f"Error answering {self.path}")
+                status, body = 500, json.dumps({"error": str(e)}).encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            # The Vite dev server runs on another port
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+            service.record_latency(time.perf_counter() - started)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return QueryHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, data_dir: Path = None,
+          cache_size: int = DEFAULT_CACHE_SIZE):
+    service = QueryService(data_dir, cache_size)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    logger.info(f"✓ Query service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    serve(port=port)
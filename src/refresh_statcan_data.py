@@ -0,0 +1,63 @@
+"""
+Nightly refresh of every Statistics Canada table used by the site.
+
+Downloads every table concurrently on the shared pooled client, so the
+network time is close to the slowest single download rather than the sum of
+all of them. The downloaded tables are then parsed, written out and loaded
+into the observation store one at a time, so the pipelines never contend
+for the SQLite write lock and their logs stay in order.
+"""
+
+import logging
+import sys
+
+from statcan_client import DEFAULT_MAX_WORKERS, run_concurrently
+from fetch_inflation_data import CPI_PRODUCT_ID, download_inflation_data, store_inflation_data
+from fetch_all_weights import BASKET_WEIGHTS_TABLE, download_weights, process_weights
+from fetch_grain_production_data import GRAIN_PRODUCTION_TABLE, download_grain_data, process_grain_download
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Product ID -> (download step, process step). The download step returns
+# the arguments for the process step, or None if the table is unchanged.
+PIPELINES = {
+    CPI_PRODUCT_ID: (download_inflation_data, store_inflation_data),
+    BASKET_WEIGHTS_TABLE: (download_weights, process_weights),
+    GRAIN_PRODUCTION_TABLE: (download_grain_data, process_grain_download),
+}
+
+
+def refresh_all(product_ids=None, max_workers: int = DEFAULT_MAX_WORKERS, force: bool = False) -> dict:
+    """
+    Download the given product IDs (default: all) concurrently, then process
+    them one after another. Tables StatCan has not republished since the
+    last run are skipped unless force is True.
+
+    Returns:
+        Dictionary mapping product ID -> process step return value
+        (None for skipped tables)
+    """
+    if product_ids is None:
+        product_ids = list(PIPELINES)
+
+    logger.info(f"Refreshing {len(product_ids)} tables with up to {max_workers} concurrent downloads...")
+    downloads = run_concurrently(lambda pid: PIPELINES[pid][0](force=force), product_ids, max_workers)
+
+    results = {}
+    for pid in product_ids:
+        if downloads[pid] is None:
+            results[pid] = None
+            continue
+        logger.info(f"Processing table {pid}...")
+        results[pid] = PIPELINES[pid][1](*downloads[pid])
+    return results
+
+
+if __name__ == "__main__":
+    try:
+        refresh_all(force="--force" in sys.argv)
+        print("\n✓ All Statistics Canada tables refreshed")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        exit(1)
@@ -0,0 +1,140 @@
+"""
+Columnar encoding of the CPI series JSON files (all_subcategories.json).
+
+The legacy layout repeats {date, year, month, value} for every monthly
+point of every series. The columnar layout shares one month axis and
+stores each series as a run of values along it:
+
+    {
+      "format": "columnar", "version": 1,
+      "months": {"start": "2015-01", "count": 131},
+      "scale": 10,
+      "series": [
+        {"category": "Food", "offset": 0, "deltas": [1275, 3, -2, ...]},
+        {"category": "Rent", "offset": 12, "values": [130.1, null, ...]}
+      ],
+      "date_range": {...}, "category_count": 108
+    }
+
+"offset" is the series' first month on the shared axis. A series whose
+months are contiguous and whose values are exact at the file's scale is
+stored as scaled integers, first value then month-to-month differences
+("deltas"); any other series keeps plain "values" with null for missing
+months. Decoding gives back the legacy layout exactly, and
+src/data/seriesCodec.js does the same in the browser.
+
+Convert an existing file:
+
+    python src/series_codec.py data/all_subcategories.json public/data/all_subcategories.json [--legacy]
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from cpi_series import make_data_point, month_ordinal, ordinal_to_date
+
+COLUMNAR_FORMAT = "columnar"
+COLUMNAR_VERSION = 1
+
+# CPI index values are published to one decimal
+DEFAULT_SCALE = 10
+
+
+def encode_series(points: List[Dict], first: int, scale: int) -> dict:
+    """Columnar entry (without category) for one series' date-sorted points."""
+    ordinals = [month_ordinal(point['date']) for point in points]
+    values = [point['value'] for point in points]
+    entry = {"offset": ordinals[0] - first}
+
+    contiguous = ordinals == list(range(ordinals[0], ordinals[0] + len(ordinals)))
+    scaled = [round(value * scale) for value in values]
+    if contiguous and all(s / scale == value for s, value in zip(scaled, values)):
+        entry["deltas"] = [scaled[0]] + [b - a for a, b in zip(scaled, scaled[1:])]
+        return entry
+
+    by_month = dict(zip(ordinals, values))
+    entry["values"] = [by_month.get(o) for o in range(ordinals[0], ordinals[-1] + 1)]
+    return entry
+
+
+def encode_columnar(series_json: dict, scale: int = DEFAULT_SCALE) -> dict:
+    """Columnar layout of a legacy series JSON document."""
+    series = [s for s in series_json['series'] if s['data']]
+    first = min((month_ordinal(s['data'][0]['date']) for s in series), default=0)
+    last = max((month_ordinal(s['data'][-1]['date']) for s in series), default=first - 1)
+
+    encoded = {
+        "format": COLUMNAR_FORMAT,
+        "version": COLUMNAR_VERSION,
+        "months": {"start": ordinal_to_date(first), "count": last - first + 1},
+        "scale": scale,
+        "series": [{"category": s['category'], **encode_series(s['data'], first, scale)} for s in series],
+    }
+    for key, value in series_json.items():
+        if key != 'series':
+            encoded[key] = value
+    return encoded
+
+
+def decode_series(series_json: dict) -> dict:
+    """Legacy layout of a series JSON document (legacy documents are returned unchanged)."""
+    if series_json.get("format") != COLUMNAR_FORMAT:
+        return series_json
+    if series_json.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported columnar series version: {series_json.get('version')}")
+
+    first = month_ordinal(series_json["months"]["start"])
+    scale = series_json["scale"]
+
+    series = []
+    for entry in series_json["series"]:
+        start = first + entry["offset"]
+        if "deltas" in entry:
+            data = []
+            total = 0
+            for i, delta in enumerate(entry["deltas"]):
+                total += delta
+                data.append(make_data_point(ordinal_to_date(start + i), total / scale))
+        else:
+            data = [
+                make_data_point(ordinal_to_date(start + i), value)
+                for i, value in enumerate(entry["values"]) if value is not None
+            ]
+        series.append({'category': entry["category"], 'data': data})
+
+    decoded = {'series': series}
+    for key, value in series_json.items():
+        if key not in ("format", "version", "months", "scale", "series"):
+            decoded[key] = value
+    return decoded
+
+
+def load_series_json(path: Path) -> dict:
+    """Read a series JSON file in either layout, as the legacy layout."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return decode_series(json.load(f))
+
+
+def write_series_json(series_json: dict, path: Path, columnar: bool = False):
+    """Write a legacy series document, columnar (compact) or as indented legacy JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        if columnar:
+            json.dump(encode_columnar(series_json), f, separators=(',', ':'))
+        else:
+            json.dump(series_json, f, indent=2)
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 2:
+        print("Usage: python src/series_codec.py input.json output.json [--legacy]")
+        exit(1)
+
+    input_path, output_path = Path(args[0]), Path(args[1])
+    input_size = input_path.stat().st_size
+    series_json = load_series_json(input_path)
+    write_series_json(series_json, output_path, columnar="--legacy" not in sys.argv)
+    print(f"✓ {input_path} ({input_size:,} bytes) -> {output_path} ({output_path.stat().st_size:,} bytes)")
@@ -0,0 +1,432 @@
+"""
+Shared client for the Statistics Canada Web Data Service (WDS).
+
+All fetch scripts go through this module instead of calling requests.get
+directly, so connections are pooled and kept alive across calls and several
+tables can be downloaded at the same time (see run_concurrently).
+
+It also keeps a small manifest of the release time of every table we have
+downloaded, so a table that StatCan has not republished can be skipped.
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Statistics Canada API base URL
+STATCAN_BASE_URL = "https://www150.statcan.gc.ca/t1/wds/rest"
+
+# Timeouts (seconds) for the small JSON calls and the large ZIP downloads
+API_TIMEOUT = 30
+DOWNLOAD_TIMEOUT = 120
+
+# Upper bound on simultaneous table downloads
+DEFAULT_MAX_WORKERS = 4
+
+# Buffer size for streamed downloads and ZIP member extraction
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Maximum series per getDataFrom... request
+SERIES_BATCH_SIZE = 100
+
+# WDS coordinates always have 10 positions (unused dimensions are 0)
+COORDINATE_DIMENSIONS = 10
+
+# Last-downloaded release time per product ID
+MANIFEST_PATH = Path(__file__).parent.parent / "data" / "statcan_manifest.json"
+
+
+class StatCanClient:
+    """
+    Pooled HTTP client for the StatCan WDS REST API.
+
+    A single requests.Session is shared by every call, so the TCP/TLS
+    connection to the WDS host is reused between the download-URL lookup
+    and the ZIP download, and between tables.
+    """
+
+    def __init__(self, base_url: str = STATCAN_BASE_URL, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.session = requests.Session()
+        # One pool slot per worker so concurrent downloads never wait on a connection
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_download_url(self, product_id: str, language: str = "en") -> str:
+        """Ask WDS for the ZIP download URL of a full table."""
+        url = f"{self.base_url}/getFullTableDownloadCSV/{product_id}/{language}"
+        logger.info(f"Fetching StatCan data from: {url}")
+
+        response = self.session.get(url, timeout=API_TIMEOUT)
+        response.raise_for_status()
+        result = response.json()
+
+        if not isinstance(result, dict) or 'object' not in result:
+            raise ValueError(f"Unexpected API response format: {result}")
+
+        return result['object']
+
+    def get_cube_metadata(self, product_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Fetch cube metadata for several tables in one getCubeMetadata call.
+
+        Returns:
+            Dictionary mapping product ID -> metadata object (includes 'releaseTime')
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return {}
+
+        url = f"{self.base_url}/getCubeMetadata"
+        payload = [{"productId": int(pid)} for pid in product_ids]
+        response = self.session.post(url, json=payload, timeout=API_TIMEOUT)
+        response.raise_for_status()
+        result = response.json()
+
+        metadata = {}
+        for entry in result:
+            if entry.get('status') != 'SUCCESS':
+                logger.warning(f"Metadata request failed: {entry.get('object')}")
+                continue
+            cube = entry['object']
+            metadata[str(cube['productId'])] = cube
+        return metadata
+
+    def get_release_times(self, product_ids: Iterable[str]) -> Dict[str, str]:
+        """Return the current StatCan release time for each product ID."""
+        metadata = self.get_cube_metadata(product_ids)
+        return {pid: cube.get('releaseTime') for pid, cube in metadata.items()}
+
+    def get_code_sets(self) -> dict:
+        """Fetch the WDS code sets (UOM, scalar factor, ...), cached per client."""
+        if getattr(self, '_code_sets', None) is None:
+            response = self.session.get(f"{self.base_url}/getCodeSets", timeout=API_TIMEOUT)
+            response.raise_for_status()
+            self._code_sets = response.json()['object']
+        return self._code_sets
+
+    def get_uom_names(self) -> Dict[int, str]:
+        """Map memberUomCode -> English unit of measure (e.g. 17 -> '2002=100')."""
+        return {uom['memberUomCode']: uom['memberUomEn'] for uom in self.get_code_sets().get('uom', [])}
+
+    def get_data_by_coordinates(self, product_id: str, coordinates: Iterable[str], latest_n: int) -> Dict[str, dict]:
+        """
+        Fetch the latest N periods of individual series by cube coordinate.
+
+        Coordinates are sent in batches of SERIES_BATCH_SIZE per
+        getDataFromCubePidCoordAndLatestNPeriods request.
+
+        Returns:
+            Dictionary mapping coordinate -> series object ('vectorId', 'vectorDataPoint', ...)
+        """
+        requests_body = [
+            {"productId": int(product_id), "coordinate": coord, "latestN": latest_n}
+            for coord in dict.fromkeys(coordinates)
+        ]
+        series = self._post_series_batches("getDataFromCubePidCoordAndLatestNPeriods", requests_body)
+        return {s['coordinate']: s for s in series}
+
+    def get_data_by_vectors(self, vector_ids: Iterable[int], latest_n: int) -> Dict[int, dict]:
+        """
+        Fetch the latest N periods of individual series by vector ID.
+
+        Returns:
+            Dictionary mapping vector ID -> series object ('vectorDataPoint', ...)
+        """
+        requests_body = [
+            {"vectorId": int(vid), "latestN": latest_n}
+            for vid in dict.fromkeys(vector_ids)
+        ]
+        series = self._post_series_batches("getDataFromVectorsAndLatestNPeriods", requests_body)
+        return {s['vectorId']: s for s in series}
+
+    def _post_series_batches(self, method: str, requests_body: list) -> list:
+        """POST series requests in batches and return the successful series objects."""
+        url = f"{self.base_url}/{method}"
+        series = []
+        for start in range(0, len(requests_body), SERIES_BATCH_SIZE):
+            batch = requests_body[start:start + SERIES_BATCH_SIZE]
+            response = self.session.post(url, json=batch, timeout=API_TIMEOUT)
+            response.raise_for_status()
+            for entry in response.json():
+                if entry.get('status') != 'SUCCESS':
+                    logger.warning(f"{method} failed for a series: {entry.get('object')}")
+                    continue
+                series.append(entry['object'])
+        logger.info(f"Fetched {len(series)} series with {method}")
+        return series
+
+    def fetch_table_csv(self, product_id: str, language: str = "en") -> str:
+        """
+        Download a full table and return the data CSV as a string.
+
+        Args:
+            product_id: Statistics Canada product ID (PID) - must be 8 digits
+            language: Language code (en or fr)
+
+        Returns:
+            CSV content as string (BOM removed)
+        """
+        download_url = self.get_download_url(product_id, language)
+        logger.info(f"Downloading from: {download_url}")
+
+        zip_response = self.session.get(download_url, timeout=DOWNLOAD_TIMEOUT)
+        zip_response.raise_for_status()
+
+        with zipfile.ZipFile(io.BytesIO(zip_response.content)) as z:
+            csv_file = find_data_member(z)
+            logger.info(f"Reading CSV file: {csv_file}")
+            with z.open(csv_file) as f:
+                # Use utf-8-sig to handle BOM
+                csv_content = f.read().decode('utf-8-sig')
+
+        logger.info(f"Successfully extracted {len(csv_content)} characters of CSV data for {product_id}")
+        return csv_content
+
+    def download_table(self, product_id: str, output_path: Path, language: str = "en") -> Path:
+        """
+        Stream a full table straight to disk without holding it in memory.
+
+        The ZIP is written to a temporary file in chunks, the data CSV member
+        is copied out in chunks, and the result is renamed over output_path
+        atomically, so readers never see a half-written file and peak memory
+        does not grow with the table size.
+
+        Args:
+            product_id: Statistics Canada product ID (PID) - must be 8 digits
+            output_path: Where to write the extracted CSV
+            language: Language code (en or fr)
+
+        Returns:
+            output_path
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        download_url = self.get_download_url(product_id, language)
+        logger.info(f"Streaming download from: {download_url}")
+
+        # Temporary files live next to the output so os.replace stays on one filesystem
+        zip_fd, zip_tmp = tempfile.mkstemp(suffix=".zip", dir=output_path.parent)
+        csv_fd, csv_tmp = tempfile.mkstemp(suffix=".csv.tmp", dir=output_path.parent)
+        os.close(zip_fd)
+        os.close(csv_fd)
+        try:
+            with open(zip_tmp, 'wb') as zip_file:
+                with self.session.get(download_url, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+                    response.raise_for_status()
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        zip_file.write(chunk)
+
+            with zipfile.ZipFile(zip_tmp) as z:
+                csv_file = find_data_member(z)
+                logger.info(f"Extracting CSV file: {csv_file}")
+                with z.open(csv_file) as src, open(csv_tmp, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+
+            os.replace(csv_tmp, output_path)
+        except BaseException:
+            if os.path.exists(csv_tmp):
+                os.remove(csv_tmp)
+            raise
+        finally:
+            os.remove(zip_tmp)
+
+        logger.info(f"Successfully saved {output_path.stat().st_size} bytes of CSV data for {product_id}")
+        return output_path
+
+
+def find_data_member(z: zipfile.ZipFile) -> str:
+    """Return the data CSV member of a WDS ZIP ({PID}.csv, not the metadata file)."""
+    csv_files = [f for f in z.namelist() if f.endswith('.csv') and not f.endswith('_MetaData.csv')]
+    if not csv_files:
+        raise ValueError("No CSV file found in ZIP archive")
+    return csv_files[0]
+
+
+def resolve_coordinates(
+    cube_metadata: dict,
+    selections: Dict[str, Dict[str, str]],
+    uom: Optional[str] = None,
+    uom_names: Optional[Dict[int, str]] = None,
+) -> Dict[str, str]:
+    """
+    Turn member names into WDS coordinates using a table's cube metadata.
+
+    Args:
+        cube_metadata: Metadata object from get_cube_metadata()
+        selections: key -> {dimension name: member name}, e.g.
+            {"Food": {"Geography": "Canada", "Products and product groups": "Food"}}
+        uom: If given, only keep series whose unit of measure matches (e.g. '2002=100')
+        uom_names: memberUomCode -> name mapping, required when uom is given
+
+    Returns:
+        Dictionary mapping key -> coordinate string ("2.3.0.0.0.0.0.0.0.0").
+        Selections that cannot be resolved are logged and left out.
+    """
+    dimensions = sorted(cube_metadata['dimension'], key=lambda d: d['dimensionPositionId'])
+    members_by_dimension = {
+        dim['dimensionNameEn']: {m['memberNameEn']: m for m in dim['member']}
+        for dim in dimensions
+    }
+
+    coordinates = {}
+    for key, selection in selections.items():
+        member_ids = []
+        series_uom = None
+        for dim in dimensions:
+            name = dim['dimensionNameEn']
+            member = members_by_dimension[name].get(selection.get(name))
+            if member is None:
+                break
+            member_ids.append(str(member['memberId']))
+            if member.get('memberUomCode') is not None:
+                series_uom = member['memberUomCode']
+
+        if len(member_ids) != len(dimensions):
+            logger.warning(f"Could not resolve coordinate for {key}: {selection}")
+            continue
+        if uom is not None and uom_names is not None and uom_names.get(series_uom) != uom:
+            logger.warning(f"Skipping {key}: unit of measure is {uom_names.get(series_uom)}, not {uom}")
+            continue
+
+        member_ids += ["0"] * (COORDINATE_DIMENSIONS - len(member_ids))
+        coordinates[key] = ".".join(member_ids)
+
+    return coordinates
+
+
+def run_concurrently(func, product_ids: list, max_workers: int) -> dict:
+    """Call func(pid) for every product ID on a thread pool and collect results by PID."""
+    if not product_ids:
+        return {}
+
+    results = {}
+    errors = {}
+    workers = max(1, min(max_workers, len(product_ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pid: pool.submit(func, pid) for pid in product_ids}
+        for pid, future in futures.items():
+            try:
+                results[pid] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching table {pid}: {e}")
+                errors[pid] = e
+
+    if errors:
+        # Surface the first failure; the log already lists all of them
+        raise next(iter(errors.values()))
+    return results
+
+
+_manifest_lock = threading.Lock()
+
+
+def load_manifest(manifest_path: Path = MANIFEST_PATH) -> dict:
+    """Load the release-time manifest (empty if it does not exist yet)."""
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def record_download(product_id: str, release_time: Optional[str], manifest_path: Path = MANIFEST_PATH):
+    """Record that a table was downloaded at the given StatCan release time."""
+    if release_time is None:
+        return
+    # Pipelines run concurrently, so read-modify-write under a lock
+    with _manifest_lock:
+        manifest = load_manifest(manifest_path)
+        manifest[product_id] = {
+            "release_time": release_time,
+            "downloaded_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def check_for_update(
+    product_id: str,
+    output_paths: List[Path],
+    force: bool = False,
+    manifest_path: Path = MANIFEST_PATH,
+):
+    """
+    Decide whether a table needs to be downloaded again.
+
+    A table is skipped only when every output file exists and the release
+    time in the cube metadata matches the one recorded in the manifest.
+    If the metadata call fails, the table is downloaded as before.
+
+    Returns:
+        (needs_download, release_time) - pass release_time to record_download()
+        once the outputs have been written.
+    """
+    try:
+        release_time = get_client().get_release_times([product_id]).get(product_id)
+    except Exception as e:
+        logger.warning(f"Could not fetch metadata for {product_id}, downloading anyway: {e}")
+        return True, None
+
+    if force:
+        return True, release_time
+
+    recorded = load_manifest(manifest_path).get(product_id, {}).get("release_time")
+    outputs_exist = all(Path(p).exists() for p in output_paths)
+
+    if release_time is not None and release_time == recorded and outputs_exist:
+        logger.info(f"Table {product_id} unchanged since release {release_time}, skipping download")
+        return False, release_time
+
+    logger.info(f"Table {product_id} release {release_time} (last downloaded: {recorded})")
+    return True, release_time
+
+
+_default_client: Optional[StatCanClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> StatCanClient:
+    """Return the process-wide shared client, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = StatCanClient()
+        return _default_client
+
+
+def fetch_table_csv(product_id: str, language: str = "en") -> str:
+    """Fetch one full table through the shared pooled client."""
+    return get_client().fetch_table_csv(product_id, language)
+
+
+def download_table(product_id: str, output_path: Path, language: str = "en") -> Path:
+    """Stream one full table to output_path through the shared pooled client."""
+    return get_client().download_table(product_id, output_path, language)